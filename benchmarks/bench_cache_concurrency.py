@@ -0,0 +1,114 @@
+"""
+Benchmark insights cache lookups and inserts from concurrent threads
+
+Reader threads look up random cached keys while writer threads insert new
+entries for --seconds, first with a connection opened per call in rollback
+journal mode (the previous CacheManager), then with the pooled WAL
+connections of CacheManager. Usage:
+
+    python benchmarks/bench_cache_concurrency.py --readers 8 --writers 2 --seconds 5
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from csv_analyzer.core.config import Config
+from csv_analyzer.cache.cache_manager import CacheManager
+
+class ConnectPerCall:
+    """Cache access as before pooling: a new connection, default journal, for every call"""
+    
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+    
+    def save_insights(self, cache_key: str, insights: str) -> bool:
+        try:
+            conn = sqlite3.connect(self.db_file)
+            conn.execute("INSERT OR REPLACE INTO insights_cache (cache_key, insights) VALUES (?, ?)",
+                         (cache_key, insights))
+            conn.commit()
+            conn.close()
+            return True
+        except sqlite3.OperationalError:
+            return False
+    
+    def load_insights(self, cache_key: str):
+        try:
+            conn = sqlite3.connect(self.db_file)
+            result = conn.execute("SELECT insights FROM insights_cache WHERE cache_key = ?", (cache_key,)).fetchone()
+            conn.close()
+            return result[0] if result else None
+        except sqlite3.OperationalError:
+            return False
+    
+    def close(self):
+        pass
+
+def run(cache, keys, readers: int, writers: int, seconds: float):
+    """Counts of lookups, inserts and failed calls within `seconds`"""
+    counts = {"lookups": 0, "inserts": 0, "errors": 0}
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+    
+    def reader():
+        rng, done, errors = random.Random(), 0, 0
+        while time.perf_counter() < stop:
+            if cache.load_insights(rng.choice(keys)) is False:
+                errors += 1
+            done += 1
+        with lock:
+            counts["lookups"] += done
+            counts["errors"] += errors
+    
+    def writer(index):
+        done, errors = 0, 0
+        while time.perf_counter() < stop:
+            if not cache.save_insights(f"new-{index}-{done}", "insights " * 200):
+                errors += 1
+            done += 1
+        with lock:
+            counts["inserts"] += done
+            counts["errors"] += errors
+    
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    cache.close()
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--entries", type=int, default=10000)
+    args = parser.parse_args()
+    
+    keys = [f"key-{i}" for i in range(args.entries)]
+    with tempfile.TemporaryDirectory() as directory:
+        for name, pooled in [("per call", False), ("pooled", True)]:
+            db_file = os.path.join(directory, f"{name.replace(' ', '-')}.db")
+            Config.SQLITE_WAL = pooled
+            setup = CacheManager(db_file)
+            with setup.pool.transaction() as conn:
+                conn.executemany("INSERT INTO insights_cache (cache_key, insights) VALUES (?, ?)",
+                                 [(key, "insights " * 200) for key in keys])
+            setup.close()
+            
+            cache = CacheManager(db_file) if pooled else ConnectPerCall(db_file)
+            counts = run(cache, keys, args.readers, args.writers, args.seconds)
+            print(f"{name:>9}: {counts['lookups'] / args.seconds:10.0f} lookups/s "
+                  f"{counts['inserts'] / args.seconds:8.0f} inserts/s {counts['errors']:6d} errors")
+
+if __name__ == "__main__":
+    main()
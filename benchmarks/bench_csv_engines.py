@@ -0,0 +1,70 @@
+"""
+Benchmark CSV parse throughput for each configured engine
+
+Usage:
+
+    python benchmarks/bench_csv_engines.py --size-mb 200 --repeat 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from csv_analyzer.core.data_processor import load_data, resolve_csv_engine
+
+ENGINES = ["c", "pyarrow"]
+
+def write_csv(path: str, size_mb: int) -> None:
+    """Write a mixed-type CSV of roughly `size_mb` megabytes"""
+    rng = np.random.default_rng(0)
+    rows = 200000
+    chunk = pd.DataFrame({
+        "id": np.arange(rows),
+        "amount": rng.normal(100, 25, rows).round(2),
+        "quantity": rng.integers(1, 50, rows),
+        "ratio": rng.random(rows),
+        "region": rng.choice(["north", "south", "east", "west"], rows),
+        "status": rng.choice(["open", "closed", "pending"], rows),
+    })
+    block = chunk.to_csv(index=False, header=False).encode()
+    with open(path, "wb") as f:
+        f.write(b"id,amount,quantity,ratio,region,status\n")
+        while f.tell() < size_mb * 1024 * 1024:
+            f.write(block)
+
+def time_engine(path: str, engine: str, repeat: int) -> float:
+    """Return the best wall-clock time to parse the file with `engine`"""
+    best = float("inf")
+    for _ in range(repeat):
+        with open(path, "rb") as f:
+            start = time.perf_counter()
+            load_data(f, "csv", engine=engine)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.csv")
+        write_csv(path, args.size_mb)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"CSV size: {size_mb:.1f} MB, cores: {os.cpu_count()}")
+        
+        for engine in ENGINES:
+            if resolve_csv_engine(engine) != engine:
+                print(f"{engine:>8}: skipped (not installed)")
+                continue
+            seconds = time_engine(path, engine, args.repeat)
+            print(f"{engine:>8}: {seconds:.2f} s, {size_mb / seconds:.1f} MB/s")
+
+if __name__ == "__main__":
+    main()
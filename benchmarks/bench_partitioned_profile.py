@@ -0,0 +1,59 @@
+"""
+Benchmark profiling one large CSV file in byte ranges on a process pool
+
+Usage:
+
+    python benchmarks/bench_partitioned_profile.py --size-mb 500 --workers 1,2,4,8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from csv_analyzer.core.partitions import profile_partitioned
+
+def write_csv(path: str, size_mb: int) -> None:
+    """Append blocks of mixed rows until the file reaches size_mb"""
+    rng = np.random.default_rng(0)
+    rows = 100000
+    header = True
+    while not os.path.exists(path) or os.path.getsize(path) < size_mb * 1024 * 1024:
+        pd.DataFrame({
+            "amount": rng.normal(100, 15, rows).round(2),
+            "quantity": rng.integers(0, 1000, rows),
+            "region": rng.choice(["north", "south", "east", "west"], rows),
+            "customer": rng.integers(0, 50000, rows).astype(str),
+            "ratio": rng.random(rows),
+        }).to_csv(path, mode="a", header=header, index=False)
+        header = False
+
+def profile(path: str, workers: int) -> float:
+    start = time.perf_counter()
+    profile_partitioned(path, workers=workers, min_bytes=0).dataset_info()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=int, default=200)
+    parser.add_argument("--workers", default="1,2,4")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "data.csv")
+        write_csv(path, args.size_mb)
+        size_mb = os.path.getsize(path) / 1024 ** 2
+        print(f"File: {size_mb:.0f} MB, CPUs: {os.cpu_count()}")
+        
+        baseline = None
+        for workers in [int(w) for w in args.workers.split(",")]:
+            seconds = profile(path, workers)
+            baseline = baseline or seconds
+            print(f"{workers:>3} workers: {seconds:.2f} s, {size_mb / seconds:.1f} MB/s ({baseline / seconds:.2f}x)")
+
+if __name__ == "__main__":
+    main()
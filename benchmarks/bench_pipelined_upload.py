@@ -0,0 +1,87 @@
+"""
+Benchmark end-to-end latency of a throttled upload, parsed after or while it arrives
+
+The upload is sent to the API in-process at --mbps, with the LLM call
+stubbed out, once with PIPELINE_UPLOADS off and once on. Usage:
+
+    python benchmarks/bench_pipelined_upload.py --size-mb 100 --mbps 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+def write_csv(path: str, size_mb: int) -> None:
+    """Append blocks of mixed rows until the file reaches size_mb"""
+    rng = np.random.default_rng(0)
+    rows = 100000
+    header = True
+    while not os.path.exists(path) or os.path.getsize(path) < size_mb * 1024 * 1024:
+        pd.DataFrame({
+            "amount": rng.normal(100, 15, rows).round(2),
+            "quantity": rng.integers(0, 1000, rows),
+            "region": rng.choice(["north", "south", "east", "west"], rows),
+            "customer": rng.integers(0, 50000, rows).astype(str),
+        }).to_csv(path, mode="a", header=header, index=False)
+        header = False
+
+async def upload(app, path: str, mbps: float) -> float:
+    """Send the file as a multipart body at `mbps` megabytes per second"""
+    import httpx
+    
+    boundary = "benchmark-boundary"
+    
+    async def body():
+        yield (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"data.csv\"\r\n"
+               f"Content-Type: text/csv\r\n\r\n").encode()
+        with open(path, "rb") as handle:
+            while True:
+                chunk = handle.read(256 * 1024)
+                if not chunk:
+                    break
+                await asyncio.sleep(len(chunk) / (mbps * 1024 * 1024))
+                yield chunk
+        yield f"\r\n--{boundary}--\r\n".encode()
+    
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+        start = time.perf_counter()
+        response = await client.post("/insights/file", content=body(),
+                                     headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--mbps", type=float, default=50)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_FILE"] = os.path.join(directory, "cache.db")
+        os.environ.setdefault("LLM_PROVIDER", "ollama")
+        from csv_analyzer.core.config import Config
+        from csv_analyzer.api import main as api
+        from csv_analyzer.cache.cache_manager import CacheManager
+        api.analyzer.analyze = lambda data_info: "insights"
+        
+        path = os.path.join(directory, "data.csv")
+        write_csv(path, args.size_mb)
+        size_mb = os.path.getsize(path) / 1024 ** 2
+        print(f"File: {size_mb:.0f} MB, link: {args.mbps:.0f} MB/s, transfer alone: {size_mb / args.mbps:.2f} s")
+        
+        for pipeline in [False, True]:
+            Config.PIPELINE_UPLOADS = pipeline
+            # A fresh cache so every run is a miss
+            api.analyzer.cache_manager = CacheManager(os.path.join(directory, f"cache-{pipeline}.db"))
+            seconds = asyncio.run(upload(api.api_app, path, args.mbps))
+            print(f"{'pipelined' if pipeline else 'spooled':>10}: {seconds:.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark the column profiler against DataFrame.describe()
+
+The profiler runs with its default stages (correlations, anomalies and
+the time-series rollup, as configured) and with all of them off, so the
+cost of the stages shows next to plain describe(). Usage:
+
+    python benchmarks/bench_profiler.py --rows 2000000 --repeat 3
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from csv_analyzer.core.profiler import ColumnProfiler
+
+def make_frame(rows: int) -> pd.DataFrame:
+    """Build a mixed-type frame with missing values"""
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "id": np.arange(rows),
+        "created_at": pd.Timestamp("2024-01-01") + pd.to_timedelta(np.arange(rows) * 30, unit="s"),
+        "amount": rng.normal(100, 25, rows).round(2),
+        "quantity": rng.integers(1, 50, rows),
+        "ratio": np.where(rng.random(rows) < 0.1, np.nan, rng.random(rows)),
+        "region": rng.choice(["north", "south", "east", "west"], rows),
+        "status": rng.choice(["open", "closed", "pending"], rows),
+    })
+
+def best_time(func, repeat: int) -> float:
+    """Return the best wall-clock time of `repeat` calls"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    df = make_frame(args.rows)
+    print(f"Rows: {args.rows}, columns: {df.shape[1]}")
+    
+    stages_off = dict(correlations=False, anomalies=False, temporal=False)
+    results = {
+        "describe()": best_time(lambda: df.describe(), args.repeat),
+        "describe(include='all')": best_time(lambda: df.describe(include="all"), args.repeat),
+        "profile, stages off": best_time(lambda: ColumnProfiler(**stages_off).update(df).result(), args.repeat),
+        "profile, default stages": best_time(lambda: ColumnProfiler().update(df).result(), args.repeat),
+    }
+    for name, seconds in results.items():
+        print(f"{name:>24}: {seconds:.3f} s")
+    # describe() only covers the numeric columns, the profile and describe(include='all') cover all of them
+    numeric, everything = results["describe()"], results["describe(include='all')"]
+    for name in ["profile, stages off", "profile, default stages"]:
+        print(f"{name:>24}: {results[name] / numeric:.2f}x describe(), "
+              f"{results[name] / everything:.2f}x describe(include='all')")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark peak memory of the upload path before and after spooling
+
+Each mode runs in a fresh subprocess so the peak RSS of one does not leak
+into the other. Usage:
+
+    python benchmarks/bench_upload_memory.py --size-mb 200
+"""
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+def write_csv(path: str, size_mb: int) -> None:
+    """Write a mixed-type CSV of roughly `size_mb` megabytes"""
+    rng = np.random.default_rng(0)
+    rows = 200000
+    chunk = pd.DataFrame({
+        "id": np.arange(rows),
+        "amount": rng.normal(100, 25, rows).round(2),
+        "quantity": rng.integers(1, 50, rows),
+        "region": rng.choice(["north", "south", "east", "west"], rows),
+        "comment": rng.choice(["ok", "late delivery", "damaged", "refund requested"], rows),
+    })
+    block = chunk.to_csv(index=False, header=False).encode()
+    with open(path, "wb") as f:
+        f.write(b"id,amount,quantity,region,comment\n")
+        while f.tell() < size_mb * 1024 * 1024:
+            f.write(block)
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_baseline(path: str) -> None:
+    """The previous upload path: read the whole body, decode it, parse from text"""
+    from io import StringIO
+    with open(path, "rb") as f:
+        content = f.read()
+    pd.read_csv(StringIO(content.decode('utf-8')))
+
+def run_spooled(path: str) -> None:
+    """The current upload path: spool in chunks, parse from the binary handle"""
+    from starlette.datastructures import UploadFile
+    from csv_analyzer.api.uploads import spool_upload
+    from csv_analyzer.core.data_processor import load_data
+    
+    with open(path, "rb") as f:
+        spool = asyncio.run(spool_upload(UploadFile(f, filename="bench.csv")))
+    try:
+        load_data(spool, "csv")
+    finally:
+        spool.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=int, default=200)
+    parser.add_argument("--mode", choices=["baseline", "spooled"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.mode:
+        start = peak_rss_mb()
+        {"baseline": run_baseline, "spooled": run_spooled}[args.mode](args.path)
+        print(f"{peak_rss_mb() - start:.1f}")
+        return
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.csv")
+        write_csv(path, args.size_mb)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"CSV size: {size_mb:.1f} MB")
+        
+        results = {}
+        for mode in ["baseline", "spooled"]:
+            output = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--path", path],
+                check=True, capture_output=True, text=True
+            ).stdout
+            results[mode] = float(output.strip().splitlines()[-1])
+            print(f"{mode:>9}: peak RSS growth {results[mode]:.1f} MB")
+        
+        print(f"Reduction: {results['baseline'] / results['spooled']:.2f}x")
+
+if __name__ == "__main__":
+    main()
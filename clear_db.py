@@ -2,7 +2,7 @@ import sqlite3
 import os
 
 # Database file path
-DATABASE_FILE = "insights_cache.db"
+DATABASE_FILE = os.getenv("DATABASE_FILE", "insights_cache.db")
 
 def clear_database():
     """Clear all records from the insights_cache table"""
@@ -1,11 +1,19 @@
-from fastapi import FastAPI, UploadFile, HTTPException, status
+from fastapi import FastAPI, UploadFile, HTTPException, Header, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, Any
-import pandas as pd
-from io import StringIO, BytesIO
+from typing import IO, Dict, Any, Optional, List, Tuple
 from csv_analyzer.core.config import Config
-from csv_analyzer.core.data_processor import load_data, get_dataset_info, generate_cache_key
+from csv_analyzer.core.data_processor import (
+    load_data, get_dataset_info, profile_stream, split_file_extension, open_decompressed,
+    should_stream, should_pipeline, StreamingProfile
+)
+from csv_analyzer.core.profiler import profile_drift
+from csv_analyzer.core.partitions import should_partition, profile_partitioned
+from csv_analyzer.core.pushdown import Condition, parse_columns, parse_filter, format_filter
+from csv_analyzer.cache.cache_manager import content_hasher, content_cache_key, cache_scope
+from csv_analyzer.core.fingerprint import DatasetFingerprint
 from csv_analyzer.core.analyzer import DataAnalyzer
+from csv_analyzer.api.uploads import hash_file, UploadStore, PipelinedUpload
 
 # Initialize configuration
 config_valid, config_error = Config.validate()
@@ -31,41 +39,418 @@ api_app.add_middleware(
 # Initialize analyzer
 analyzer = DataAnalyzer()
 
-@api_app.post("/insights/file", response_model=Dict[str, Any])
-async def upload_file(file: UploadFile):
-    """Upload a file and get AI-generated insights"""
+# Resumable uploads in progress
+uploads = UploadStore()
+
+def parse_selection(columns: Optional[str], row_filter: Optional[str]) -> Tuple[Optional[List[str]], List[Condition]]:
+    """Parse the `columns` and `filter` parameters, rejecting invalid ones with 400"""
     try:
-        # Determine file extension
-        file_extension = file.filename.split('.')[-1].lower() if '.' in file.filename else ''
-        
-        # Read file content
-        content = await file.read()
+        return parse_columns(columns), parse_filter(row_filter)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+def upload_options(sheet: Optional[str], max_rows: Optional[int], flatten: bool, compact: Optional[bool],
+                   quantiles: Optional[bool], selected: Optional[List[str]], filters: List[Condition]) -> Dict[str, Any]:
+    """Resolve the analysis options of an upload, as they enter its cache key
+    
+    The format the file is parsed as is added with file_options() once its
+    name is known.
+    """
+    return {
+        "sheet": sheet, "max_rows": max_rows, "flatten": flatten or None,
+        "compact": (compact if compact is not None else Config.COMPACT_MODE) or None,
+        "quantiles": (quantiles if quantiles is not None else Config.INCLUDE_QUANTILES) or None,
+        "columns": tuple(selected) if selected else None, "filter": format_filter(filters)
+    }
+
+def file_options(options: Dict[str, Any], file_extension: str) -> Dict[str, Any]:
+    """Add the format of a file to its options, the same bytes parse differently as .json and .jsonl"""
+    return {**options, "format": file_extension}
+
+def parse_content_hash(value: Optional[str]) -> Optional[str]:
+    """Read the content hash of an If-None-Match header, quoted like an ETag or not"""
+    if not value or value.strip() == "*":
+        return None
+    return value.strip().removeprefix("W/").strip('"').lower() or None
+
+@api_app.post("/insights/file", response_model=Dict[str, Any], openapi_extra={
+    "requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object", "required": ["file"], "properties": {"file": {"type": "string", "format": "binary"}}
+    }}}}
+})
+async def upload_file(request: Request, sheet: Optional[str] = None, max_rows: Optional[int] = Query(None, ge=1),
+                      flatten: bool = False, compact: Optional[bool] = None, quantiles: Optional[bool] = None,
+                      columns: Optional[str] = None, row_filter: Optional[str] = Query(None, alias="filter"),
+                      if_none_match: Optional[str] = Header(None)):
+    """Upload a file and get AI-generated insights
+    
+    `sheet` selects the Excel worksheet (name or index), `max_rows` caps
+    how many rows are profiled and `flatten` expands nested NDJSON objects.
+    `compact` (defaults to Config.COMPACT_MODE) shrinks the dtypes of files
+    that are loaded whole and reports the memory saved. `quantiles`
+    (defaults to Config.INCLUDE_QUANTILES) adds p50/p95/p99 of numeric
+    columns to the statistics sent to the LLM. `columns` (comma-separated)
+    limits the analysis to those columns and `filter` to the rows meeting
+    conditions such as `region == 'north' and amount > 100`; both are
+    pushed down to the parser.
+    
+    The cache key is a hash of the uploaded bytes, the file format and
+    these options. A client that sends the hash in an `If-None-Match`
+    header gets cached insights as soon as the headers of the file part are
+    read, without the file being parsed; GET /insights/precheck answers
+    before anything is uploaded.
+    """
+    selected, filters = parse_selection(columns, row_filter)
+    options = upload_options(sheet, max_rows, flatten, compact, quantiles, selected, filters)
+    return await analyze_upload(request, options, selected, filters, parse_content_hash(if_none_match))
+
+@api_app.get("/insights/precheck", response_model=Dict[str, Any])
+async def precheck_file(hash: str, filename: str, sheet: Optional[str] = None,
+                        max_rows: Optional[int] = Query(None, ge=1), flatten: bool = False,
+                        compact: Optional[bool] = None, quantiles: Optional[bool] = None,
+                        columns: Optional[str] = None, row_filter: Optional[str] = Query(None, alias="filter")):
+    """Look up insights by the content hash of a file before uploading it
+    
+    `hash` is the hex blake2b digest (16 bytes, as `b2sum -l 128` prints)
+    of the file as it would be uploaded, `filename` the name it would be
+    uploaded with, whose extension selects the parser, and the other
+    parameters are those the upload would use. Returns 404 when the file
+    has to be uploaded.
+    """
+    selected, filters = parse_selection(columns, row_filter)
+    content_hash = parse_content_hash(hash)
+    if not content_hash:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing content hash")
+    options = upload_options(sheet, max_rows, flatten, compact, quantiles, selected, filters)
+    cache_key = content_cache_key(content_hash, file_options(options, split_file_extension(filename)[0]))
+    insights = analyzer.cache_manager.load_insights(cache_key)
+    if not insights:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Insights not cached for this content, upload the file"
+        )
+    return {"insights": insights, "cache_key": cache_key, "content_hash": content_hash}
+
+async def analyze_upload(request: Request, options: Dict[str, Any], selected: Optional[List[str]],
+                         filters: List[Condition], expected_hash: Optional[str] = None) -> Dict[str, Any]:
+    """Receive the file of a multipart upload and analyze it, unless its content is cached
+    
+    CSV and NDJSON files are profiled in a worker thread while the body
+    arrives, so parsing overlaps the upload. Other files are spooled first;
+    partitioned profiling needs a file the workers can open by name. A
+    client-sent `expected_hash` that is cached is answered before the file
+    content is read. Otherwise the content hash is known with the last
+    byte: a cached file is not parsed once spooled, and a pipelined parse
+    is stopped with whatever the upload left it to read. Profiling and
+    the LLM call run in the thread pool, off the event loop.
+    """
+    hasher = content_hasher()
+    try:
+        upload = PipelinedUpload(request, hasher)
+        filename = await upload.filename()
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         
-        # Load data
-        if file_extension in ['csv']:
-            df = load_data(content.decode('utf-8'), file_extension)
+    # Determine file extension and compression (e.g. data.csv.gz)
+    file_extension, compression = split_file_extension(filename)
+    options = file_options(options, file_extension)
+    if expected_hash:
+        cache_key = content_cache_key(expected_hash, options)
+        cached_insights = analyzer.cache_manager.load_insights(cache_key)
+        if cached_insights:
+            return {"insights": cached_insights, "cache_key": cache_key, "content_hash": expected_hash}
+    
+    partitioned = should_partition(file_extension, compression, options["max_rows"])
+    pipelined = not partitioned and should_pipeline(file_extension)
+    cached_insights = None
+    
+    def lookup_cache() -> bool:
+        # The hash is complete once the body is received, so the parser can be stopped on a hit
+        nonlocal cached_insights
+        cached_insights = analyzer.cache_manager.load_insights(content_cache_key(hasher.hexdigest(), options))
+        return bool(cached_insights)
+    
+    try:
+        if not pipelined:
+            spool = await upload.into_spool(named=partitioned)
         else:
-            df = load_data(content, file_extension)
-        
-        # Get dataset info
-        data_info = get_dataset_info(df)
+            parsed = await upload.into_parser(
+                lambda stream: profile_source(stream, file_extension, compression, options, selected, filters),
+                skip=lookup_cache)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing file: {str(e)}"
+        )
+    content_hash = hasher.hexdigest()
+    if not pipelined:
+        return await run_in_threadpool(analyze_spool, spool, filename, content_hash, options, selected, filters)
+    cache_key = content_cache_key(content_hash, options)
+    if parsed is None:
+        # Known content, the parser was stopped
+        return {"insights": cached_insights, "cache_key": cache_key, "content_hash": content_hash}
+    return await run_in_threadpool(analyze_profile, cache_key, content_hash, options, *parsed)
+
+def profile_source(source: IO[bytes], file_extension: str, compression: Optional[str], options: Dict[str, Any],
+                   selected: Optional[List[str]], filters: List[Condition]
+                   ) -> Tuple[Dict[str, str], Optional[StreamingProfile], Optional[Dict[str, Any]]]:
+    """Profile a file, returning its dataset info, profile state and memory report"""
+    sheet, max_rows, flatten = options["sheet"], options["max_rows"], bool(options["flatten"])
+    compact, quantiles = bool(options["compact"]), bool(options["quantiles"])
+    
+    # Compressed uploads are inflated as the parser reads them
+    source = open_decompressed(source, file_extension, compression)
+    if should_stream(file_extension, max_rows):
+        # Profile chunk by chunk so memory stays bounded for large files,
+        # columnar files are read one record batch at a time
+        profile = profile_stream(source, file_extension, sheet=sheet, max_rows=max_rows, flatten=flatten,
+                                 quantiles=quantiles, columns=selected, filters=filters)
+        return profile.dataset_info(), profile, None
+    
+    # Load data
+    df = load_data(source, file_extension, compact=compact, columns=selected, filters=filters)
+    
+    # Get dataset info, profiled as one chunk so appended rows can be merged in later
+    # and near-duplicates can be found
+    profile = None
+    if Config.PERSIST_PROFILE_STATE or Config.SIMILARITY_CACHE:
+        profile = StreamingProfile(quantiles=quantiles)
+        profile.update(df)
+    return get_dataset_info(df, profile.profiler if profile else None, quantiles=quantiles), profile, df.attrs.get("memory_report")
+
+def analyze_spool(spool: IO[bytes], filename: str, content_hash: str, options: Dict[str, Any],
+                  selected: Optional[List[str]], filters: List[Condition]) -> Dict[str, Any]:
+    """Analyze a received file, unless its content is cached, and close it
+    
+    The spool must be a named file on disk when the file is partitioned.
+    """
+    file_extension, compression = split_file_extension(filename)
+    options = file_options(options, file_extension)
+    partitioned = should_partition(file_extension, compression, options["max_rows"])
+    try:
+        try:
+            cache_key = content_cache_key(content_hash, options)
+            cached_insights = analyzer.cache_manager.load_insights(cache_key)
+            if cached_insights:
+                # Known content, nothing needs to be parsed
+                return {"insights": cached_insights, "cache_key": cache_key, "content_hash": content_hash}
+            
+            if partitioned:
+                # Byte ranges of a large CSV file are profiled on several processes
+                spool.flush()
+                profile = profile_partitioned(spool.name, quantiles=bool(options["quantiles"]), columns=selected,
+                                              filters=filters)
+                data_info, memory_report = profile.dataset_info(), None
+            else:
+                data_info, profile, memory_report = profile_source(spool, file_extension, compression, options,
+                                                                   selected, filters)
+        finally:
+            spool.close()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing file: {str(e)}"
+        )
+    return analyze_profile(cache_key, content_hash, options, data_info, profile, memory_report)
         
-        # Generate cache key
-        cache_key = generate_cache_key(df)
+def analyze_profile(cache_key: str, content_hash: str, options: Dict[str, Any], data_info: Dict[str, str],
+                    profile: Optional[StreamingProfile], memory_report: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Generate insights for a profiled file and store its profile state
+    
+    With Config.SIMILARITY_CACHE, the insights of a cached near-duplicate
+    of the file are returned instead, flagged as approximate.
+    """
+    try:
+        fingerprint = DatasetFingerprint.from_profile(profile) if profile is not None else None
+        if fingerprint is not None:
+            scope = cache_scope(options)
+            similar = analyzer.cache_manager.find_similar(scope, fingerprint)
+            if similar:
+                similar_key, insights, distance = similar
+                return {
+                    "insights": insights,
+                    "cache_key": similar_key,
+                    "content_hash": content_hash,
+                    "approximate": True,
+                    "distance": distance
+                }
         
         # Analyze data with caching
         insights = analyzer.analyze_with_caching(data_info, cache_key)
+        if profile is not None and Config.PERSIST_PROFILE_STATE:
+            profile.analyzed_stats = profile.stats_frame()
+            analyzer.cache_manager.save_profile_state(cache_key, profile.to_bytes())
+        if fingerprint is not None:
+            analyzer.cache_manager.save_fingerprint(cache_key, scope, fingerprint)
         
-        return {
+        response = {
             "insights": insights,
-            "cache_key": cache_key
+            "cache_key": cache_key,
+            "content_hash": content_hash
         }
+        if memory_report:
+            response["memory_report"] = memory_report
+        return response
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error processing file: {str(e)}"
         )
 
+@api_app.post("/uploads", response_model=Dict[str, Any], status_code=status.HTTP_201_CREATED)
+async def create_upload(filename: str, size: Optional[int] = None):
+    """Start a resumable upload of a file, optionally announcing its size in bytes
+    
+    Send the data with PUT /uploads/{upload_id}?offset=..., in as many
+    requests as needed, then POST /uploads/{upload_id}/finalize.
+    """
+    try:
+        upload = uploads.create(filename, size)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error starting upload: {str(e)}"
+        )
+    return upload.info()
+
+def find_upload(upload_id: str):
+    """Return an upload in progress or raise 404"""
+    try:
+        return uploads.get(upload_id)
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found or expired")
+
+@api_app.get("/uploads/{upload_id}", response_model=Dict[str, Any])
+async def get_upload(upload_id: str):
+    """Report how many bytes of an upload were received, the offset to resume from"""
+    return find_upload(upload_id).info()
+
+@api_app.put("/uploads/{upload_id}", response_model=Dict[str, Any])
+async def put_upload_chunk(upload_id: str, offset: int, request: Request):
+    """Append the request body to an upload at `offset`
+    
+    `offset` must equal the bytes received so far, otherwise 409 is
+    returned with the offset to resume from. Bytes received before a
+    dropped connection are kept.
+    """
+    upload = find_upload(upload_id)
+    async with upload.lock:
+        if offset != upload.offset:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"message": "Offset does not match the bytes received", "offset": upload.offset}
+            )
+        try:
+            await upload.write(request.stream())
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    return upload.info()
+
+@api_app.post("/uploads/{upload_id}/finalize", response_model=Dict[str, Any])
+async def finalize_upload(upload_id: str, sheet: Optional[str] = None, max_rows: Optional[int] = Query(None, ge=1),
+                          flatten: bool = False, compact: Optional[bool] = None, quantiles: Optional[bool] = None,
+                          columns: Optional[str] = None, row_filter: Optional[str] = Query(None, alias="filter")):
+    """Analyze a completed upload, taking the same options as /insights/file
+    
+    The upload is deleted once it is analyzed, or kept to retry if the
+    analysis fails.
+    """
+    selected, filters = parse_selection(columns, row_filter)
+    options = upload_options(sheet, max_rows, flatten, compact, quantiles, selected, filters)
+    upload = find_upload(upload_id)
+    async with upload.lock:
+        if upload.size is not None and upload.offset != upload.size:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"message": f"Upload is incomplete, expected {upload.size} bytes", "offset": upload.offset}
+            )
+        response = await run_in_threadpool(analyze_spool, upload.open(), upload.filename, upload.content_hash(),
+                                           options, selected, filters)
+        uploads.remove(upload)
+    return response
+
+@api_app.post("/insights/{cache_key}/append", response_model=Dict[str, Any])
+async def append_file(cache_key: str, file: UploadFile, sheet: Optional[str] = None, flatten: bool = False,
+                      columns: Optional[str] = None, row_filter: Optional[str] = Query(None, alias="filter")):
+    """Merge rows appended to a previously analyzed file into its stored profile
+    
+    The upload holds only the new rows, in the same format and with the
+    same header as the original file. The merged profile is stored under
+    a new cache key. The LLM is asked again only when the stats moved by
+    more than Config.REANALYSIS_THRESHOLD since the insights were generated,
+    otherwise the existing insights are reused. Pass the `columns` and
+    `filter` the original file was analyzed with.
+    """
+    try:
+        selected, filters = parse_columns(columns), parse_filter(row_filter)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    # Parsing, merging and the LLM call block, so they run off the event loop
+    return await run_in_threadpool(append_rows, cache_key, file, sheet, flatten, selected, filters)
+
+def append_rows(cache_key: str, file: UploadFile, sheet: Optional[str], flatten: bool,
+                selected: Optional[List[str]], filters: List[Condition]) -> Dict[str, Any]:
+    """Merge the rows of a received file into the stored profile of `cache_key`"""
+    try:
+        state = analyzer.cache_manager.load_profile_state(cache_key)
+        if state is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No stored profile for the provided cache key"
+            )
+        try:
+            profile = StreamingProfile.from_bytes(state)
+        except ValueError as e:
+            # E.g. stored by a version with another state format
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Stored profile cannot be merged, upload the whole file again: {str(e)}"
+            )
+        
+        file_extension, compression = split_file_extension(file.filename or '')
+        # The upload is already spooled by the server, so it is hashed where it lies
+        content_hash = hash_file(file.file, content_hasher())
+        appended_key = content_cache_key(content_hash, {
+            "appended_to": cache_key, "format": file_extension, "sheet": sheet, "flatten": flatten or None,
+            "columns": tuple(selected) if selected else None, "filter": format_filter(filters)
+        })
+        cached_insights = analyzer.cache_manager.load_insights(appended_key)
+        if cached_insights:
+            # The same rows were already appended to this analysis
+            return {"insights": cached_insights, "cache_key": appended_key}
+        source = open_decompressed(file.file, file_extension, compression)
+        # Only the new rows are parsed, sampled with a seed of their own
+        appended = profile_stream(source, file_extension, sheet=sheet, flatten=flatten,
+                                  quantiles=profile.profiler.quantiles, seed=Config.SAMPLE_SEED + profile.parts,
+                                  columns=selected, filters=filters)
+        profile.merge(appended)
+        
+        stats = profile.stats_frame()
+        drift = profile_drift(profile.analyzed_stats, stats)
+        insights = analyzer.cache_manager.load_insights(cache_key)
+        reanalyzed = insights is None or drift > Config.REANALYSIS_THRESHOLD
+        if reanalyzed:
+            insights = analyzer.analyze(profile.dataset_info())
+            profile.analyzed_stats = stats
+        analyzer.cache_manager.save_insights(appended_key, insights)
+        if Config.PERSIST_PROFILE_STATE:
+            analyzer.cache_manager.save_profile_state(appended_key, profile.to_bytes())
+        
+        return {
+            "insights": insights,
+            "cache_key": appended_key,
+            "rows": profile.row_count,
+            "drift": drift if drift != float("inf") else None,
+            "reanalyzed": reanalyzed
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error appending to analysis: {str(e)}"
+        )
+
 @api_app.get("/insights/{cache_key}", response_model=Dict[str, Any])
 async def get_insights(cache_key: str):
     """Retrieve previously generated insights by cache key"""
@@ -0,0 +1,403 @@
+import io
+import os
+import re
+import json
+import time
+import secrets
+import asyncio
+import contextlib
+import tempfile
+import threading
+from collections import deque
+from typing import IO, Optional, List, Dict, Any, AsyncIterator, Callable, TypeVar
+from fastapi import UploadFile, Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+from csv_analyzer.core.config import Config
+from csv_analyzer.cache.cache_manager import content_hasher
+
+# Size of each read from the incoming upload
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+T = TypeVar("T")
+
+async def spool_upload(file: UploadFile, named: bool = False, hasher=None) -> IO[bytes]:
+    """Copy an upload into a spooled temporary file without buffering the whole body
+    
+    With `named`, the upload always goes to a file on disk whose `name`
+    other processes can open. Each chunk is also fed to `hasher`, a
+    hashlib object, so the content hash is ready when the upload is.
+    """
+    if named:
+        spool = tempfile.NamedTemporaryFile()
+    else:
+        # Small uploads stay in memory, larger ones roll over to disk
+        spool = tempfile.SpooledTemporaryFile(max_size=Config.SPOOL_MAX_MEMORY_MB * 1024 * 1024)
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            spool.write(chunk)
+            if hasher is not None:
+                hasher.update(chunk)
+    except Exception:
+        spool.close()
+        raise
+    
+    spool.seek(0)
+    return spool
+
+def hash_file(handle: IO[bytes], hasher) -> str:
+    """Hash a file from the start in UPLOAD_CHUNK_BYTES reads and rewind it"""
+    handle.seek(0)
+    while True:
+        block = handle.read(UPLOAD_CHUNK_BYTES)
+        if not block:
+            break
+        hasher.update(block)
+    handle.seek(0)
+    return hasher.hexdigest()
+
+class PipeReader(io.RawIOBase):
+    """Read end of a byte pipe, fed by the event loop and read by a parser thread
+    
+    Reads block until bytes arrive or the pipe is finished. At most
+    `max_buffered` bytes wait in the pipe; `feed` blocks above that, which
+    pauses the upload while the parser catches up. Reads from a closed
+    pipe raise ValueError, so the parser stops rather than finishing
+    with part of the data.
+    """
+    
+    def __init__(self, max_buffered: int):
+        self._chunks = deque()
+        self._buffered = 0
+        self._max_buffered = max_buffered
+        self._finished = False
+        self._condition = threading.Condition()
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        with self._condition:
+            while not self._chunks and not self._finished:
+                self._condition.wait()
+            if self.closed:
+                raise ValueError("Pipe was closed before the end of the data")
+            if not self._chunks:
+                return 0
+            chunk = self._chunks[0]
+            size = min(len(buffer), len(chunk))
+            buffer[:size] = chunk[:size]
+            if size < len(chunk):
+                self._chunks[0] = chunk[size:]
+            else:
+                self._chunks.popleft()
+            self._buffered -= size
+            self._condition.notify_all()
+            return size
+    
+    def has_room(self) -> bool:
+        """Whether `feed` returns without waiting for the parser"""
+        return self._buffered < self._max_buffered or self.closed
+    
+    def feed(self, chunk: bytes) -> None:
+        """Queue bytes for the reader, dropping them once the reader closed the pipe"""
+        with self._condition:
+            while self._buffered >= self._max_buffered and not self.closed:
+                self._condition.wait()
+            if not self.closed:
+                self._chunks.append(memoryview(chunk))
+                self._buffered += len(chunk)
+                self._condition.notify_all()
+    
+    def finish(self) -> None:
+        """Mark the end of the data, the reader sees EOF once the pipe is drained"""
+        with self._condition:
+            self._finished = True
+            self._condition.notify_all()
+    
+    def close(self) -> None:
+        with self._condition:
+            self._chunks.clear()
+            self._buffered = 0
+            self._finished = True
+            super().close()
+            self._condition.notify_all()
+
+class MultipartFileReader:
+    """Pick the bytes of one file field out of a multipart/form-data body as it arrives"""
+    
+    def __init__(self, content_type: str, field: str = "file"):
+        media_type, params = parse_options_header(content_type)
+        if media_type != b"multipart/form-data" or b"boundary" not in params:
+            raise ValueError("Expected a multipart/form-data upload")
+        self.field = field
+        self.filename: Optional[str] = None
+        self.complete = False
+        self._data: List[bytes] = []
+        self._header = [b"", b""]
+        self._disposition = b""
+        self._in_file = False
+        self._parser = MultipartParser(params[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": lambda data, start, end: self._append_header(0, data[start:end]),
+            "on_header_value": lambda data, start, end: self._append_header(1, data[start:end]),
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+    
+    def _on_part_begin(self) -> None:
+        self._disposition = b""
+    
+    def _append_header(self, index: int, data: bytes) -> None:
+        self._header[index] += data
+    
+    def _on_header_end(self) -> None:
+        if self._header[0].lower() == b"content-disposition":
+            self._disposition = self._header[1]
+        self._header = [b"", b""]
+    
+    def _on_headers_finished(self) -> None:
+        _, params = parse_options_header(self._disposition)
+        name = params.get(b"name", b"").decode("latin-1")
+        if name == self.field and b"filename" in params and self.filename is None:
+            self.filename = params[b"filename"].decode("utf-8", "replace")
+            self._in_file = True
+    
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self._data.append(bytes(data[start:end]))
+    
+    def _on_part_end(self) -> None:
+        if self._in_file:
+            self._in_file = False
+            self.complete = True
+    
+    def feed(self, body: bytes) -> List[bytes]:
+        """Parse more of the body and return the file bytes it held"""
+        self._parser.write(body)
+        data, self._data = self._data, []
+        return data
+
+class PipelinedUpload:
+    """The file of a multipart upload, spooled or parsed while the body is received
+    
+    Chunks of the file are fed to `hasher` as they arrive, so the content
+    hash is ready when the body is.
+    """
+    
+    def __init__(self, request: Request, hasher=None, field: str = "file"):
+        self._body = request.stream().__aiter__()
+        self._reader = MultipartFileReader(request.headers.get("content-type", ""), field)
+        self._pending: List[bytes] = []
+        self._hasher = hasher
+    
+    async def _receive(self) -> Optional[List[bytes]]:
+        """File bytes of the next body chunk, None at the end of the body"""
+        try:
+            return self._reader.feed(await self._body.__anext__())
+        except StopAsyncIteration:
+            return None
+    
+    async def filename(self) -> str:
+        """Receive the body up to the headers of the file part and return its file name"""
+        while self._reader.filename is None:
+            data = await self._receive()
+            if data is None:
+                raise ValueError("Missing file upload")
+            self._pending += data
+        return self._reader.filename
+    
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """Yield the bytes of the file as they arrive, reading the rest of the body"""
+        await self.filename()
+        while True:
+            data, self._pending = self._pending, []
+            for chunk in data:
+                if self._hasher is not None:
+                    self._hasher.update(chunk)
+                yield chunk
+            if self._reader.complete:
+                break
+            data = await self._receive()
+            if data is None:
+                raise ValueError("Upload ended before the end of the file")
+            self._pending = data
+    
+    async def into_spool(self, named: bool = False) -> IO[bytes]:
+        """Receive the file into a spooled temporary file, on disk with `named`"""
+        spool = tempfile.NamedTemporaryFile() if named else tempfile.SpooledTemporaryFile(
+            max_size=Config.SPOOL_MAX_MEMORY_MB * 1024 * 1024)
+        try:
+            async for chunk in self.chunks():
+                spool.write(chunk)
+        except BaseException:
+            spool.close()
+            raise
+        spool.seek(0)
+        return spool
+    
+    async def into_parser(self, parse: Callable[[IO[bytes]], T],
+                          skip: Optional[Callable[[], bool]] = None) -> Optional[T]:
+        """Run `parse` on the file in a worker thread while the rest of it is received
+        
+        The parser reads from a pipe holding at most Config.PIPELINE_BUFFER_MB,
+        so parsing overlaps the upload and its result is ready soon after
+        the last byte. The whole body is received, and hashed, even when
+        the parser stops early. `skip` is called once the body is received
+        and hashed; when it returns True, e.g. because the content is
+        cached, the parser is stopped and None is returned.
+        """
+        pipe = PipeReader(Config.PIPELINE_BUFFER_MB * 1024 * 1024)
+        
+        def run() -> T:
+            with io.BufferedReader(pipe, UPLOAD_CHUNK_BYTES) as stream:
+                return parse(stream)
+        
+        result = asyncio.get_running_loop().run_in_executor(None, run)
+        try:
+            async for chunk in self.chunks():
+                if pipe.has_room():
+                    pipe.feed(chunk)
+                else:
+                    await asyncio.to_thread(pipe.feed, chunk)
+        except BaseException:
+            # Stop the parser before giving up on the upload
+            pipe.close()
+            with contextlib.suppress(Exception):
+                await result
+            raise
+        finally:
+            pipe.finish()
+        if skip is not None and skip():
+            # Drop the bytes the parser has not read yet
+            pipe.close()
+            with contextlib.suppress(Exception):
+                await result
+            return None
+        return await result
+
+class ResumableUpload:
+    """An upload sent in chunks to a file on disk, resumable from the last byte received
+    
+    The data goes to `<id>.part` in Config.UPLOAD_DIR, next to a `<id>.json`
+    file with its name and announced size, so an upload survives dropped
+    connections and server restarts. The bytes on disk are the offset to
+    resume from. Chunks are hashed as they arrive; after a restart the
+    hash is rebuilt from the file.
+    """
+    
+    def __init__(self, upload_id: str, filename: str, size: Optional[int] = None,
+                 directory: Optional[str] = None):
+        self.upload_id = upload_id
+        self.filename = filename
+        self.size = size
+        self.directory = directory or Config.UPLOAD_DIR
+        self.path = os.path.join(self.directory, f"{upload_id}.part")
+        self.lock = asyncio.Lock()
+        self._hasher = None
+    
+    @property
+    def offset(self) -> int:
+        """Bytes received so far"""
+        return os.path.getsize(self.path)
+    
+    def info(self) -> Dict[str, Any]:
+        return {"upload_id": self.upload_id, "filename": self.filename, "size": self.size, "offset": self.offset}
+    
+    def _hasher_at_offset(self):
+        """Hash of the bytes on disk, rebuilt when it was lost with the process"""
+        if self._hasher is None:
+            self._hasher = content_hasher()
+            with open(self.path, "rb") as handle:
+                while True:
+                    block = handle.read(UPLOAD_CHUNK_BYTES)
+                    if not block:
+                        break
+                    self._hasher.update(block)
+        return self._hasher
+    
+    async def write(self, chunks: AsyncIterator[bytes]) -> int:
+        """Append a stream of bytes at the current offset and return the new offset
+        
+        Bytes written before a dropped connection are kept, and the hash
+        follows them, so the client resumes from the returned offset or
+        from `offset` after a failure.
+        """
+        hasher = self._hasher_at_offset()
+        with open(self.path, "ab") as handle:
+            try:
+                async for chunk in chunks:
+                    if self.size is not None and handle.tell() + len(chunk) > self.size:
+                        raise ValueError(f"Upload is larger than the announced {self.size} bytes")
+                    handle.write(chunk)
+                    hasher.update(chunk)
+            except BaseException:
+                # Keep the hash in step with what reached the disk
+                handle.flush()
+                if handle.tell() != self.offset:
+                    self._hasher = None
+                raise
+        os.utime(self.path)
+        return self.offset
+    
+    def content_hash(self) -> str:
+        return self._hasher_at_offset().hexdigest()
+    
+    def open(self) -> IO[bytes]:
+        """Open the received file for reading"""
+        return open(self.path, "rb")
+    
+    def remove(self) -> None:
+        for path in (self.path, os.path.join(self.directory, f"{self.upload_id}.json")):
+            if os.path.exists(path):
+                os.remove(path)
+
+class UploadStore:
+    """Resumable uploads in progress, kept in Config.UPLOAD_DIR"""
+    
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or Config.UPLOAD_DIR
+        self._uploads: Dict[str, ResumableUpload] = {}
+    
+    def create(self, filename: str, size: Optional[int] = None) -> ResumableUpload:
+        """Start an upload with an empty file"""
+        self.expire()
+        os.makedirs(self.directory, exist_ok=True)
+        upload = ResumableUpload(secrets.token_hex(16), filename, size, self.directory)
+        with open(os.path.join(self.directory, f"{upload.upload_id}.json"), "w") as handle:
+            json.dump({"filename": filename, "size": size}, handle)
+        open(upload.path, "wb").close()
+        self._uploads[upload.upload_id] = upload
+        return upload
+    
+    def get(self, upload_id: str) -> ResumableUpload:
+        """Return an upload in progress, raising KeyError for unknown ids"""
+        if upload_id in self._uploads:
+            return self._uploads[upload_id]
+        meta = os.path.join(self.directory, f"{upload_id}.json")
+        if not re.fullmatch(r"[0-9a-f]{32}", upload_id) or not os.path.exists(meta):
+            raise KeyError(upload_id)
+        # Started before a restart
+        with open(meta) as handle:
+            upload = ResumableUpload(upload_id, directory=self.directory, **json.load(handle))
+        return self._uploads.setdefault(upload_id, upload)
+    
+    def remove(self, upload: ResumableUpload) -> None:
+        upload.remove()
+        self._uploads.pop(upload.upload_id, None)
+    
+    def expire(self) -> None:
+        """Delete uploads that received nothing for UPLOAD_EXPIRY_HOURS"""
+        if not os.path.isdir(self.directory):
+            return
+        cutoff = time.time() - Config.UPLOAD_EXPIRY_HOURS * 3600
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".part") and os.path.getmtime(path) < cutoff:
+                upload_id = name[:-len(".part")]
+                self._uploads.pop(upload_id, None)
+                ResumableUpload(upload_id, "", directory=self.directory).remove()
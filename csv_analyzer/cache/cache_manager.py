@@ -1,18 +1,42 @@
 import sqlite3
 import os
-from typing import Optional, List, Tuple
+import hashlib
+from typing import Optional, List, Tuple, Dict, Any
 from csv_analyzer.core.config import Config
+from csv_analyzer.core.fingerprint import DatasetFingerprint
+from csv_analyzer.cache.connections import ConnectionPool
+
+def content_hasher():
+    """Hash object for the raw bytes of an upload, fed as they arrive"""
+    return hashlib.blake2b(digest_size=16)
+
+def content_cache_key(content_hash: str, options: Optional[Dict[str, Any]] = None) -> str:
+    """Cache key of an upload from the hash of its bytes
+    
+    `options` that change what is analyzed (format, sheet, projection,
+    filter, ...) are part of the key, as are the provider, model and prompt
+    version that generate the insights, so two different files never share
+    a key and changing the model does not serve stale insights.
+    """
+    options = {k: v for k, v in (options or {}).items() if v is not None}
+    parts = [content_hash, Config.LLM_PROVIDER, Config.llm_model(), str(Config.PROMPT_VERSION), repr(sorted(options.items()))]
+    return hashlib.blake2b("\n".join(parts).encode(), digest_size=16).hexdigest()
+
+def cache_scope(options: Optional[Dict[str, Any]] = None) -> str:
+    """Everything in a cache key but the content: only entries of the same scope are near-duplicates"""
+    return content_cache_key("", options)
 
 class CacheManager:
     """Manages caching of insights in SQLite database"""
     
     def __init__(self, db_file: str = Config.DATABASE_FILE):
         self.db_file = db_file
+        self.pool = ConnectionPool(db_file)
         self.init_db()
     
     def init_db(self):
         """Initialize the SQLite database with the required table"""
-        conn = sqlite3.connect(self.db_file)
+        conn = self.pool.connection()
         cursor = conn.cursor()
         
         # Create table for storing insights
@@ -24,23 +48,40 @@ class CacheManager:
             )
         ''')
         
+        # Serialized profile state, so appended rows can be merged into a cached analysis
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS profile_state (
+                cache_key TEXT PRIMARY KEY,
+                state BLOB NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Fingerprints of cached files, to serve near-duplicate uploads
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                cache_key TEXT PRIMARY KEY,
+                scope TEXT NOT NULL,
+                schema TEXT NOT NULL,
+                fingerprint BLOB NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS fingerprints_schema ON fingerprints (scope, schema, created_at)
+        ''')
+        
         conn.commit()
-        conn.close()
     
     def save_insights(self, cache_key: str, insights: str) -> bool:
         """Save insights to SQLite database"""
         try:
-            conn = sqlite3.connect(self.db_file)
-            cursor = conn.cursor()
-            
             # Insert or replace the insights
-            cursor.execute('''
-                INSERT OR REPLACE INTO insights_cache (cache_key, insights)
-                VALUES (?, ?)
-            ''', (cache_key, insights))
-            
-            conn.commit()
-            conn.close()
+            with self.pool.transaction() as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO insights_cache (cache_key, insights)
+                    VALUES (?, ?)
+                ''', (cache_key, insights))
             return True
         except Exception as e:
             print(f"Error saving to database: {e}")
@@ -49,15 +90,13 @@ class CacheManager:
     def load_insights(self, cache_key: str) -> Optional[str]:
         """Load insights from SQLite database"""
         try:
-            conn = sqlite3.connect(self.db_file)
-            cursor = conn.cursor()
+            cursor = self.pool.connection().cursor()
             
             cursor.execute('''
                 SELECT insights FROM insights_cache WHERE cache_key = ?
             ''', (cache_key,))
             
             result = cursor.fetchone()
-            conn.close()
             
             if result:
                 return result[0]
@@ -69,17 +108,100 @@ class CacheManager:
     def get_all_insights(self) -> List[Tuple[str, str]]:
         """Get all insights from SQLite database"""
         try:
-            conn = sqlite3.connect(self.db_file)
-            cursor = conn.cursor()
+            cursor = self.pool.connection().cursor()
             
             cursor.execute('''
                 SELECT cache_key, insights FROM insights_cache
             ''')
             
             results = cursor.fetchall()
-            conn.close()
             
             return results
         except Exception as e:
             print(f"Error loading all insights from database: {e}")
-            return []
\ No newline at end of file
+            return []
+    
+    def save_profile_state(self, cache_key: str, state: bytes) -> bool:
+        """Save the serialized profile state of a cached analysis"""
+        try:
+            with self.pool.transaction() as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO profile_state (cache_key, state)
+                    VALUES (?, ?)
+                ''', (cache_key, sqlite3.Binary(state)))
+            return True
+        except Exception as e:
+            print(f"Error saving profile state to database: {e}")
+            return False
+    
+    def load_profile_state(self, cache_key: str) -> Optional[bytes]:
+        """Load the serialized profile state of a cached analysis"""
+        try:
+            cursor = self.pool.connection().cursor()
+            
+            cursor.execute('''
+                SELECT state FROM profile_state WHERE cache_key = ?
+            ''', (cache_key,))
+            
+            result = cursor.fetchone()
+            
+            if result:
+                return bytes(result[0])
+            return None
+        except Exception as e:
+            print(f"Error loading profile state from database: {e}")
+            return None
+    
+    def save_fingerprint(self, cache_key: str, scope: str, fingerprint: DatasetFingerprint) -> bool:
+        """Save the fingerprint of a cached analysis for the similarity lookup"""
+        try:
+            with self.pool.transaction() as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO fingerprints (cache_key, scope, schema, fingerprint)
+                    VALUES (?, ?, ?, ?)
+                ''', (cache_key, scope, fingerprint.schema, sqlite3.Binary(fingerprint.to_bytes())))
+            return True
+        except Exception as e:
+            print(f"Error saving fingerprint to database: {e}")
+            return False
+    
+    def find_similar(self, scope: str, fingerprint: DatasetFingerprint,
+                     max_distance: Optional[float] = None) -> Optional[Tuple[str, str, float]]:
+        """Find the cached analysis of the file closest to a fingerprint
+        
+        Only the SIMILARITY_MAX_CANDIDATES most recent entries with the same
+        scope and schema are compared. Returns (cache_key, insights, distance)
+        of the closest one within `max_distance` (SIMILARITY_MAX_DISTANCE by
+        default), or None.
+        """
+        max_distance = max_distance if max_distance is not None else Config.SIMILARITY_MAX_DISTANCE
+        try:
+            cursor = self.pool.connection().cursor()
+            
+            cursor.execute('''
+                SELECT f.cache_key, f.fingerprint, i.insights FROM fingerprints f
+                JOIN insights_cache i ON i.cache_key = f.cache_key
+                WHERE f.scope = ? AND f.schema = ?
+                ORDER BY f.created_at DESC LIMIT ?
+            ''', (scope, fingerprint.schema, Config.SIMILARITY_MAX_CANDIDATES))
+            
+            results = cursor.fetchall()
+        except Exception as e:
+            print(f"Error loading fingerprints from database: {e}")
+            return None
+        
+        best = None
+        for cache_key, state, insights in results:
+            try:
+                candidate = DatasetFingerprint.from_bytes(bytes(state))
+            except ValueError:
+                # Stored by a version with another state format
+                continue
+            distance = fingerprint.distance(candidate)
+            if distance <= max_distance and (best is None or distance < best[2]):
+                best = (cache_key, insights, distance)
+        return best
+
+    def close(self):
+        """Close the database connections of every thread"""
+        self.pool.close()
\ No newline at end of file
@@ -0,0 +1,68 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+from csv_analyzer.core.config import Config
+
+class ConnectionPool:
+    """Thread-local SQLite connections to one database file
+    
+    Each thread opens its connection once and keeps it, so statements stay
+    prepared in the connection's statement cache instead of being parsed
+    on every call. Connections use WAL journaling, where readers do not
+    block the writer or each other, and wait up to SQLITE_BUSY_TIMEOUT_MS
+    for the write lock instead of failing with "database is locked".
+    The connections of threads that have exited are closed when another
+    thread opens one.
+    """
+    
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        self._local = threading.local()
+        self._connections: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._lock = threading.Lock()
+    
+    def _open(self) -> sqlite3.Connection:
+        # Connections are only used by the thread that opened them, but may be closed by any thread
+        conn = sqlite3.connect(self.db_file, timeout=Config.SQLITE_BUSY_TIMEOUT_MS / 1000,
+                               check_same_thread=False, cached_statements=256)
+        if Config.SQLITE_WAL:
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Safe with WAL: a power loss can only drop the last transactions, never corrupt the file
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(Config.SQLITE_BUSY_TIMEOUT_MS)}")
+        conn.execute(f"PRAGMA cache_size=-{Config.SQLITE_CACHE_MB * 1024}")
+        conn.execute(f"PRAGMA mmap_size={Config.SQLITE_MMAP_MB * 1024 * 1024}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        with self._lock:
+            # Threads that have exited no longer use their connections
+            stale = [self._connections.pop(thread) for thread in list(self._connections) if not thread.is_alive()]
+            self._connections[threading.current_thread()] = conn
+        for old in stale:
+            old.close()
+        return conn
+    
+    def connection(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        # A forked child must not share its parent's connection
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._open()
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+    
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in one transaction, committed on success and rolled back on error"""
+        conn = self.connection()
+        with conn:
+            yield conn
+    
+    def close(self) -> None:
+        """Close the connections of every thread"""
+        with self._lock:
+            connections, self._connections = self._connections, {}
+        for conn in connections.values():
+            conn.close()
+        self._local = threading.local()
@@ -11,6 +11,9 @@ class AnalysisState(TypedDict):
     data_sample: str
     columns: str
     stats_summary: str
+    correlations: str
+    anomalies: str
+    temporal: str
     insights: Annotated[str, operator.add]
 
 class DataAnalyzer:
@@ -31,7 +34,10 @@ class DataAnalyzer:
                     result = chain.invoke({
                         "columns": state["columns"],
                         "stats_summary": state["stats_summary"],
-                        "data_sample": state["data_sample"]
+                        "data_sample": state["data_sample"],
+                        "correlations": state.get("correlations") or "Not computed.",
+                        "anomalies": state.get("anomalies") or "Not computed.",
+                        "temporal": state.get("temporal") or "Not computed."
                     })
                     
                     # Handle different response types from different LLMs
@@ -59,7 +65,10 @@ class DataAnalyzer:
         inputs = {
             "columns": data_info["columns"],
             "stats_summary": data_info["stats_summary"],
-            "data_sample": data_info["data_sample"]
+            "data_sample": data_info["data_sample"],
+            "correlations": data_info.get("correlations", ""),
+            "anomalies": data_info.get("anomalies", ""),
+            "temporal": data_info.get("temporal", "")
         }
         result = self.workflow.invoke(inputs)
         return result["insights"]
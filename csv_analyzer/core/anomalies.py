@@ -0,0 +1,183 @@
+import numpy as np
+import pandas as pd
+from typing import Optional, Dict, Any
+from csv_analyzer.core.config import Config
+from csv_analyzer.core.sketches import KLLSketch, weighted_quantiles
+
+# Scales a MAD to the standard deviation of normal data (Iglewicz and Hoaglin)
+MAD_SCALE = 0.6745
+
+class AnomalyDetector:
+    """Mergeable outlier statistics for numeric columns
+    
+    Keeps the `tail` smallest and largest values and a KLL sketch of every
+    column. Z-scores use the exact mean and std of the profile, IQR fences
+    and the median and MAD of modified z-scores come from the sketch, and
+    values beyond each bound are counted in the tails, which is exact
+    unless a whole tail lies beyond it. Only then is the count estimated
+    from the ranks of the bounds in the sketch. The tails do not depend on
+    how the rows were chunked, and the sketches hold all values of columns
+    with fewer than `k` of them.
+    """
+    
+    def __init__(self, tail: Optional[int] = None, k: Optional[int] = None, seed: Optional[int] = None):
+        self.tail = tail if tail is not None else Config.ANOMALY_TAIL_SIZE
+        self.k = k if k is not None else Config.ANOMALY_SKETCH_K
+        self.seed = seed if seed is not None else Config.SAMPLE_SEED
+        self._low: Dict[str, np.ndarray] = {}
+        self._high: Dict[str, np.ndarray] = {}
+        self._sketches: Dict[str, KLLSketch] = {}
+        self._rng = np.random.default_rng(self.seed)
+    
+    def update(self, numeric: pd.DataFrame) -> None:
+        """Fold the numeric columns of a chunk into the tails and the sketches"""
+        if numeric.shape[0] == 0 or numeric.shape[1] == 0:
+            return
+        numeric = numeric.rename(columns=str)
+        for column in numeric.columns:
+            values = numeric[column].to_numpy(dtype="float64", na_value=np.nan)
+            values = values[~np.isnan(values)]
+            if column not in self._sketches:
+                self._sketches[column] = KLLSketch(self.k, seed=self.seed)
+            # Spread over the chunk, not its first rows, so sorted files are sketched evenly
+            self._sketches[column].update_thinned(values)
+            if len(self._low.get(column, [])) == self.tail:
+                # Only values beyond the current tails can enter them
+                values = values[(values < self._low[column][-1]) | (values > self._high[column][0])]
+            if len(values) > 2 * self.tail:
+                self._add_tails(column, *self._chunk_tails(values))
+            else:
+                self._add_tails(column, values, values)
+    
+    def _chunk_tails(self, values: np.ndarray) -> tuple:
+        """The `tail` smallest and largest of many values
+        
+        Cutoffs taken from a random sample leave a few times `tail` values
+        beyond them, so only those are partially sorted. When a cutoff
+        leaves too few, all values are.
+        """
+        # The 32nd smallest of the sample has about 4 tails of values below it
+        picks = int(np.ceil(32 * len(values) / (4 * self.tail)))
+        if 64 <= picks < len(values) // 8:
+            sample = np.sort(values[self._rng.integers(len(values), size=picks)])
+            low, high = values[values <= sample[31]], values[values >= sample[-32]]
+            if len(low) >= self.tail and len(high) >= self.tail:
+                return np.partition(low, self.tail - 1)[:self.tail], np.partition(high, len(high) - self.tail)[-self.tail:]
+        values = np.partition(values, [self.tail - 1, len(values) - self.tail])
+        return values[:self.tail], values[-self.tail:]
+    
+    def _add_tails(self, column: str, low: np.ndarray, high: np.ndarray) -> None:
+        if column in self._low:
+            low, high = np.concatenate([self._low[column], low]), np.concatenate([self._high[column], high])
+        # Partial sorts keep the update linear in the chunk size
+        if len(low) > self.tail:
+            low = np.partition(low, self.tail - 1)[:self.tail]
+        if len(high) > self.tail:
+            high = np.partition(high, len(high) - self.tail)[-self.tail:]
+        self._low[column], self._high[column] = np.sort(low), np.sort(high)
+    
+    def merge(self, other: "AnomalyDetector") -> "AnomalyDetector":
+        """Combine a detector built on other rows into this one"""
+        for column in other._low:
+            self._add_tails(column, other._low[column], other._high[column])
+        for column, sketch in other._sketches.items():
+            self._sketches[column] = self._sketches[column].merge(sketch) if column in self._sketches else sketch
+        return self
+    
+    def drop(self, columns) -> None:
+        """Stop tracking columns, e.g. ones that turned out not to be numeric"""
+        for column in columns:
+            self._low.pop(column, None)
+            self._high.pop(column, None)
+            self._sketches.pop(column, None)
+    
+    def state(self) -> Dict[str, Any]:
+        """Tails and sketches of every column, for core.state.pack_state"""
+        return {
+            "tail": self.tail, "k": self.k, "seed": self.seed, "low": self._low, "high": self._high,
+            "sketches": {column: sketch.state() for column, sketch in self._sketches.items()}, "rng": self._rng,
+        }
+    
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "AnomalyDetector":
+        detector = cls(int(state["tail"]), int(state["k"]), int(state["seed"]))
+        detector._low, detector._high = dict(state["low"]), dict(state["high"])
+        detector._sketches = {column: KLLSketch.from_state(sketch) for column, sketch in state["sketches"].items()}
+        detector._rng = state["rng"]
+        return detector
+    
+    def _count(self, column: str, low: float, high: float, count: int) -> tuple:
+        """Count values outside [low, high], returning (count, exact)"""
+        below = int(np.searchsorted(self._low[column], low, side="left"))
+        above = len(self._high[column]) - int(np.searchsorted(self._high[column], high, side="right"))
+        # A tail holds every value beyond the bound unless all of it lies beyond
+        exact = count <= self.tail or (below < self.tail and above < self.tail)
+        if exact:
+            return below + above, True
+        sketch = self._sketches[column]
+        share = sketch.rank(low, side="left") + 1 - sketch.rank(high, side="right")
+        return max(int(round(share * count)), below + above), False
+    
+    def result(self, profile: pd.DataFrame) -> pd.DataFrame:
+        """Return outlier counts per numeric column, given the column profile"""
+        rows = []
+        for column in self._low:
+            if column not in profile.index or len(self._low[column]) == 0 or column not in self._sketches:
+                continue
+            count, mean, std = int(profile.loc[column, "count"]), profile.loc[column, "mean"], profile.loc[column, "std"]
+            values, weights = self._sketches[column].items()
+            q1, median, q3 = weighted_quantiles(values, weights, [0.25, 0.5, 0.75])
+            deviations = np.abs(values - median)
+            order = np.argsort(deviations, kind="stable")
+            mad = weighted_quantiles(deviations[order], weights[order], [0.5])[0]
+            row = {"count": count, "exact": True}
+            # A zero spread would flag every value off the mode, so that method is skipped
+            bounds = {
+                "z": (mean - Config.ANOMALY_Z_THRESHOLD * std, mean + Config.ANOMALY_Z_THRESHOLD * std) if std > 0 else None,
+                "iqr": (q1 - Config.ANOMALY_IQR_MULTIPLIER * (q3 - q1), q3 + Config.ANOMALY_IQR_MULTIPLIER * (q3 - q1)) if q3 > q1 else None,
+                "mad": (median - Config.ANOMALY_MAD_THRESHOLD * mad / MAD_SCALE,
+                        median + Config.ANOMALY_MAD_THRESHOLD * mad / MAD_SCALE) if mad > 0 else None,
+            }
+            for method, bound in bounds.items():
+                if bound is None:
+                    row[method] = np.nan
+                    continue
+                row[method], exact = self._count(column, bound[0], bound[1], count)
+                row["exact"] = row["exact"] and exact
+            if bounds["iqr"] is not None:
+                row["lower_fence"], row["upper_fence"] = bounds["iqr"]
+                low, high = self._low[column], self._high[column]
+                row["extremes"] = np.concatenate([low[low < bounds["iqr"][0]][:3], high[high > bounds["iqr"][1]][-3:]]).tolist()
+            rows.append(pd.Series(row, name=column))
+        fields = ["count", "z", "iqr", "mad", "exact", "lower_fence", "upper_fence", "extremes"]
+        return pd.DataFrame(rows, columns=fields)
+
+def format_anomalies(anomalies: Optional[pd.DataFrame], max_columns: Optional[int] = None) -> str:
+    """Summarize the columns with the largest share of outliers, one per line"""
+    if anomalies is None:
+        return "Not computed."
+    max_columns = max_columns if max_columns is not None else Config.ANOMALY_MAX_COLUMNS
+    anomalies = anomalies[anomalies[["z", "iqr", "mad"]].fillna(0).max(axis=1) > 0]
+    if anomalies.empty:
+        return "No outliers found in numeric columns."
+    share = anomalies[["z", "iqr", "mad"]].max(axis=1) / anomalies["count"]
+    anomalies = anomalies.loc[share.sort_values(ascending=False, kind="stable").index]
+    
+    lines = []
+    for column, row in anomalies.head(max_columns).iterrows():
+        prefix = "" if row["exact"] else "~"
+        parts = []
+        if not pd.isna(row["iqr"]):
+            parts.append(f"{prefix}{int(row['iqr'])} outside IQR fences [{row['lower_fence']:.4g}, {row['upper_fence']:.4g}] "
+                         f"({row['iqr'] / row['count']:.1%})")
+        if not pd.isna(row["z"]):
+            parts.append(f"{prefix}{int(row['z'])} with |z| > {Config.ANOMALY_Z_THRESHOLD:g}")
+        if not pd.isna(row["mad"]):
+            parts.append(f"{prefix}{int(row['mad'])} with |modified z| > {Config.ANOMALY_MAD_THRESHOLD:g}")
+        line = f"{column}: " + ", ".join(parts)
+        if isinstance(row["extremes"], list) and row["extremes"]:
+            line += "; extremes: " + ", ".join(f"{value:.4g}" for value in row["extremes"])
+        lines.append(line)
+    if len(anomalies) > max_columns:
+        lines.append(f"... and {len(anomalies) - max_columns} more columns with outliers")
+    return "\n".join(lines)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 from typing import Optional
 
@@ -13,6 +14,7 @@ class Config:
     
     # Gemini Configuration
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
     
     # Ollama Configuration
     OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "qwen3:0.6b")
@@ -24,11 +26,71 @@ class Config:
     
     # Database Configuration
     DATABASE_FILE = os.getenv("DATABASE_FILE", "insights_cache.db")
+    SQLITE_WAL = os.getenv("SQLITE_WAL", "true").lower() == "true"  # WAL journaling, readers do not block the writer
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))  # Wait this long for a lock before failing
+    SQLITE_CACHE_MB = int(os.getenv("SQLITE_CACHE_MB", "16"))  # Page cache per connection
+    SQLITE_MMAP_MB = int(os.getenv("SQLITE_MMAP_MB", "64"))  # Database bytes read through a memory map, 0 disables
+    
+    # Data Loading Configuration
+    STREAMING_MODE = os.getenv("STREAMING_MODE", "false").lower() == "true"  # Profile CSV files chunk by chunk
+    CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "100000"))  # Rows per chunk in streaming mode
+    CSV_ENGINE = os.getenv("CSV_ENGINE", "c")  # "c" (pandas) or "pyarrow" (multithreaded)
+    COMPACT_MODE = os.getenv("COMPACT_MODE", "false").lower() == "true"  # Downcast dtypes of loaded DataFrames
+    COMPACT_CATEGORY_RATIO = float(os.getenv("COMPACT_CATEGORY_RATIO", "0.5"))  # Max unique/rows ratio for categoricals
+    SAMPLE_METHOD = os.getenv("SAMPLE_METHOD", "reservoir")  # "reservoir", "stratified" or "head"
+    SAMPLE_SIZE = int(os.getenv("SAMPLE_SIZE", "5"))  # Rows shown to the LLM
+    SAMPLE_SEED = int(os.getenv("SAMPLE_SEED", "42"))  # Seed so samples are reproducible
+    SAMPLE_STRATIFY_COLUMN = os.getenv("SAMPLE_STRATIFY_COLUMN")  # Defaults to the lowest-cardinality text column
+    SAMPLE_MAX_STRATA = int(os.getenv("SAMPLE_MAX_STRATA", "50"))  # Above this, stratified sampling falls back to reservoir
+    PROFILE_TOP_VALUES = int(os.getenv("PROFILE_TOP_VALUES", "3"))  # Most frequent values listed per text column
+    PROFILE_WORKERS = int(os.getenv("PROFILE_WORKERS", "1"))  # Processes profiling column batches, 1 profiles in-process
+    PROFILE_PARALLEL_MIN_COLUMNS = int(os.getenv("PROFILE_PARALLEL_MIN_COLUMNS", "16"))  # Chunks with fewer text columns stay in-process
+    PARTITION_WORKERS = int(os.getenv("PARTITION_WORKERS", "1"))  # Processes profiling byte ranges of one CSV file, 1 reads serially
+    PARTITION_MIN_MB = int(os.getenv("PARTITION_MIN_MB", "64"))  # Smaller CSV files are read serially
+    CARDINALITY_ERROR = float(os.getenv("CARDINALITY_ERROR", "0.01"))  # Relative standard error of distinct counts
+    TOP_VALUES_ERROR = float(os.getenv("TOP_VALUES_ERROR", "0.001"))  # Max undercount of top values, as a fraction of rows
+    INCLUDE_QUANTILES = os.getenv("INCLUDE_QUANTILES", "false").lower() == "true"  # Add p50/p95/p99 to the stats summary
+    QUANTILE_SKETCH_K = int(os.getenv("QUANTILE_SKETCH_K", "200"))  # KLL sketch size; rank error is about 1.65 / k
+    CORRELATION_TOP_K = int(os.getenv("CORRELATION_TOP_K", "5"))  # Strongest column pairs sent to the LLM, 0 disables
+    CORRELATION_MIN_ABS = float(os.getenv("CORRELATION_MIN_ABS", "0.3"))  # Weaker pairs are not reported
+    CORRELATION_MAX_ROWS = int(os.getenv("CORRELATION_MAX_ROWS", "20000"))  # Rows sampled for correlations
+    ANOMALY_DETECTION = os.getenv("ANOMALY_DETECTION", "true").lower() == "true"  # Count outliers of numeric columns
+    ANOMALY_Z_THRESHOLD = float(os.getenv("ANOMALY_Z_THRESHOLD", "3"))  # Values with a larger |z-score| are outliers
+    ANOMALY_IQR_MULTIPLIER = float(os.getenv("ANOMALY_IQR_MULTIPLIER", "1.5"))  # Tukey fences at Q1/Q3 -/+ this many IQRs
+    ANOMALY_MAD_THRESHOLD = float(os.getenv("ANOMALY_MAD_THRESHOLD", "3.5"))  # Values with a larger |modified z-score| are outliers
+    ANOMALY_TAIL_SIZE = int(os.getenv("ANOMALY_TAIL_SIZE", "1000"))  # Extreme values kept per column, counts are exact below this
+    ANOMALY_SKETCH_K = int(os.getenv("ANOMALY_SKETCH_K", "400"))  # KLL sketch size per column for quartiles, median and MAD
+    ANOMALY_MAX_COLUMNS = int(os.getenv("ANOMALY_MAX_COLUMNS", "10"))  # Columns listed in the outlier summary
+    TEMPORAL_ROLLUP = os.getenv("TEMPORAL_ROLLUP", "true").lower() == "true"  # Summarize numeric columns over time
+    TEMPORAL_DETECT_ROWS = int(os.getenv("TEMPORAL_DETECT_ROWS", "1000"))  # Rows used to detect datetime columns
+    TEMPORAL_MAX_PERIODS = int(os.getenv("TEMPORAL_MAX_PERIODS", "12"))  # Periods in the rollup table sent to the LLM
+    TEMPORAL_MAX_METRICS = int(os.getenv("TEMPORAL_MAX_METRICS", "5"))  # Numeric columns rolled up over time
+    PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "4000"))  # Max estimated tokens of the dataset sections, 0 disables
+    PROMPT_CHARS_PER_TOKEN = int(os.getenv("PROMPT_CHARS_PER_TOKEN", "4"))  # Characters per token when estimating prompt size
+    SPOOL_MAX_MEMORY_MB = int(os.getenv("SPOOL_MAX_MEMORY_MB", "8"))  # Uploads above this size are spooled to disk
+    UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "csv_analyzer_uploads"))  # Where resumable uploads are spooled
+    UPLOAD_EXPIRY_HOURS = float(os.getenv("UPLOAD_EXPIRY_HOURS", "24"))  # Unfinished resumable uploads idle this long are deleted
+    PIPELINE_UPLOADS = os.getenv("PIPELINE_UPLOADS", "true").lower() == "true"  # Parse CSV and NDJSON uploads while they arrive
+    PIPELINE_BUFFER_MB = int(os.getenv("PIPELINE_BUFFER_MB", "16"))  # Received bytes waiting for the parser before the upload is paused
+    PERSIST_PROFILE_STATE = os.getenv("PERSIST_PROFILE_STATE", "false").lower() == "true"  # Store profiles so appended rows can be merged in
+    REANALYSIS_THRESHOLD = float(os.getenv("REANALYSIS_THRESHOLD", "0.1"))  # Appends that change the stats less reuse the insights
+    SIMILARITY_CACHE = os.getenv("SIMILARITY_CACHE", "false").lower() == "true"  # Serve insights of near-duplicate uploads, flagged as approximate
+    SIMILARITY_MAX_DISTANCE = float(os.getenv("SIMILARITY_MAX_DISTANCE", "0.2"))  # Max of 1 - row Jaccard similarity and stats drift of a near-duplicate
+    SIMILARITY_MINHASH_K = int(os.getenv("SIMILARITY_MINHASH_K", "256"))  # Row hashes kept per file; Jaccard error is at most 0.5 / sqrt(k)
+    SIMILARITY_MAX_CANDIDATES = int(os.getenv("SIMILARITY_MAX_CANDIDATES", "200"))  # Most recent same-schema entries compared per upload
+    
+    # Bump when the prompt or the dataset sections sent with it change, so cached insights are regenerated
+    PROMPT_VERSION = 1
     
     # Application Configuration
     APP_TITLE = "📊 CSV Data Insights Generator"
     APP_DESCRIPTION = "Upload your data file to get AI-powered insights"
     
+    @classmethod
+    def llm_model(cls) -> str:
+        """Name of the model that generates insights"""
+        return cls.GEMINI_MODEL if cls.LLM_PROVIDER == "gemini" else cls.OLLAMA_MODEL
+    
     @classmethod
     def validate(cls) -> tuple[bool, Optional[str]]:
         """Validate configuration settings"""
@@ -37,5 +99,20 @@ class Config:
             
         if cls.LLM_PROVIDER == "gemini" and not cls.GOOGLE_API_KEY:
             return False, "GOOGLE_API_KEY is required when using Gemini provider"
+        
+        if cls.CSV_ENGINE not in ["c", "pyarrow"]:
+            return False, f"Invalid CSV_ENGINE: {cls.CSV_ENGINE}. Must be 'c' or 'pyarrow'"
+            
+        if cls.SAMPLE_METHOD not in ["reservoir", "stratified", "head"]:
+            return False, f"Invalid SAMPLE_METHOD: {cls.SAMPLE_METHOD}. Must be 'reservoir', 'stratified' or 'head'"
+        
+        if cls.SAMPLE_SIZE <= 0:
+            return False, f"Invalid SAMPLE_SIZE: {cls.SAMPLE_SIZE}. Must be a positive integer"
+        
+        if not 0 < cls.CARDINALITY_ERROR < 1 or not 0 < cls.TOP_VALUES_ERROR < 1:
+            return False, "Invalid CARDINALITY_ERROR or TOP_VALUES_ERROR. Must be between 0 and 1"
+            
+        if cls.CHUNK_SIZE <= 0:
+            return False, f"Invalid CHUNK_SIZE: {cls.CHUNK_SIZE}. Must be a positive integer"
             
         return True, None
\ No newline at end of file
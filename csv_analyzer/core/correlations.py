@@ -0,0 +1,187 @@
+import warnings
+import numpy as np
+import pandas as pd
+from typing import Optional, List, Dict, Any
+from csv_analyzer.core.config import Config
+
+class CorrelationAccumulator:
+    """Mergeable Gram-matrix accumulator for the strongest correlations
+    
+    Each chunk is shifted and scaled by the mean and std of the first rows
+    a column appears in, cast to float32 and folded in with X^T X products
+    over blocks of rows, so the cost is a few BLAS calls per chunk rather
+    than a pandas corr() over every pair. Rows are Bernoulli-sampled at a rate of
+    max_rows / rows seen, and weighted by the inverse rate, which keeps the
+    work per file close to `max_rows` rows while staying unbiased. Missing
+    values count as the column's shift, i.e. they pull correlations to 0.
+    """
+    
+    # Rows per float32 block, which bounds the temporary copies of wide chunks
+    BLOCK_ROWS = 4096
+    
+    def __init__(self, max_rows: Optional[int] = None, seed: int = 0):
+        self.max_rows = max_rows if max_rows is not None else Config.CORRELATION_MAX_ROWS
+        self.columns: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self.rows_seen = 0
+        self.weight = 0.0
+        self._shift = np.empty(0)
+        self._scale = np.empty(0)
+        self._sums = np.empty(0)
+        self._gram = np.empty((0, 0))
+        self._rng = np.random.default_rng(seed)
+    
+    def _add_columns(self, columns: List[str], shift: np.ndarray, scale: np.ndarray) -> None:
+        """Start tracking new columns; earlier rows count as missing for them"""
+        if not columns:
+            return
+        size = len(self.columns)
+        self.columns = self.columns + columns
+        self._positions = {column: i for i, column in enumerate(self.columns)}
+        self._shift = np.concatenate([self._shift, shift])
+        self._scale = np.concatenate([self._scale, scale])
+        self._sums = np.concatenate([self._sums, np.zeros(len(columns))])
+        gram = np.zeros((len(self.columns), len(self.columns)))
+        gram[:size, :size] = self._gram
+        self._gram = gram
+    
+    def update(self, numeric: pd.DataFrame) -> None:
+        """Fold the numeric columns of a chunk into the accumulator"""
+        if numeric.shape[0] == 0 or numeric.shape[1] == 0:
+            return
+        names = [str(c) for c in numeric.columns]
+        values = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+        new = [i for i, name in enumerate(names) if name not in self._positions]
+        if new:
+            # Shift and scale only condition the float32 products, so the first rows suffice
+            head = values[:self.BLOCK_ROWS, new]
+            with warnings.catch_warnings():
+                # All-missing columns have no mean yet
+                warnings.simplefilter("ignore", RuntimeWarning)
+                shift = np.nan_to_num(np.nanmean(head, axis=0))
+                scale = np.nanstd(head, axis=0)
+            self._add_columns([names[i] for i in new], shift, np.where(np.isfinite(scale) & (scale > 0), scale, 1.0))
+        
+        self.rows_seen += len(values)
+        rate = min(1.0, self.max_rows / self.rows_seen)
+        if rate < 1.0:
+            values = values[self._rng.random(len(values)) < rate]
+        if len(values) == 0:
+            return
+        
+        # Rows of this chunk are missing for columns it does not have, which
+        # count as the column's shift and so add nothing to sums or products
+        positions = np.array([self._positions[name] for name in names])
+        sums = np.zeros(len(positions))
+        gram = np.zeros((len(positions), len(positions)))
+        for start in range(0, len(values), self.BLOCK_ROWS):
+            block = (values[start:start + self.BLOCK_ROWS] - self._shift[positions]) / self._scale[positions]
+            block = block.astype(np.float32)
+            block[np.isnan(block)] = 0.0
+            sums += block.sum(axis=0, dtype=np.float64)
+            # A.T @ A is dispatched to a symmetric rank-k BLAS update
+            gram += block.T @ block
+        
+        weight = 1.0 / rate
+        self.weight += weight * len(values)
+        if np.array_equal(positions, np.arange(len(self.columns))):
+            self._sums += weight * sums
+            self._gram += weight * gram
+        else:
+            self._sums[positions] += weight * sums
+            self._gram[np.ix_(positions, positions)] += weight * gram
+    
+    def merge(self, other: "CorrelationAccumulator") -> "CorrelationAccumulator":
+        """Combine an accumulator built on other rows, re-expressing its moments in our shift and scale"""
+        self._add_columns(
+            [c for c in other.columns if c not in self.columns],
+            np.array([other._shift[other.columns.index(c)] for c in other.columns if c not in self.columns]),
+            np.array([other._scale[other.columns.index(c)] for c in other.columns if c not in self.columns]),
+        )
+        if other.weight == 0:
+            self.rows_seen += other.rows_seen
+            return self
+        positions = np.array([self._positions[c] for c in other.columns])
+        # x_ours = alpha * x_theirs + beta
+        alpha = other._scale / self._scale[positions]
+        beta = (other._shift - self._shift[positions]) / self._scale[positions]
+        sums = alpha * other._sums + other.weight * beta
+        gram = (np.outer(alpha, alpha) * other._gram + np.outer(alpha * other._sums, beta)
+                + np.outer(beta, alpha * other._sums) + other.weight * np.outer(beta, beta))
+        # Rows of the other accumulator are missing for columns it never saw
+        self._sums[positions] += sums
+        self._gram[np.ix_(positions, positions)] += gram
+        self.weight += other.weight
+        self.rows_seen += other.rows_seen
+        return self
+    
+    def state(self) -> Dict[str, Any]:
+        """Shifted and scaled moments of the sampled rows, for core.state.pack_state"""
+        return {
+            "max_rows": self.max_rows, "columns": self.columns, "rows_seen": self.rows_seen, "weight": self.weight,
+            "shift": self._shift, "scale": self._scale, "sums": self._sums, "gram": self._gram, "rng": self._rng,
+        }
+    
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "CorrelationAccumulator":
+        accumulator = cls(int(state["max_rows"]))
+        accumulator.columns = list(state["columns"])
+        accumulator._positions = {column: i for i, column in enumerate(accumulator.columns)}
+        accumulator.rows_seen, accumulator.weight = int(state["rows_seen"]), float(state["weight"])
+        accumulator._shift, accumulator._scale = state["shift"], state["scale"]
+        accumulator._sums, accumulator._gram, accumulator._rng = state["sums"], state["gram"], state["rng"]
+        return accumulator
+    
+    def drop(self, columns) -> None:
+        """Stop tracking columns, e.g. ones that turned out not to be numeric"""
+        keep = [i for i, c in enumerate(self.columns) if c not in set(columns)]
+        if len(keep) == len(self.columns):
+            return
+        self.columns = [self.columns[i] for i in keep]
+        self._positions = {column: i for i, column in enumerate(self.columns)}
+        self._shift, self._scale, self._sums = self._shift[keep], self._scale[keep], self._sums[keep]
+        self._gram = self._gram[np.ix_(keep, keep)]
+    
+    def correlation_matrix(self) -> np.ndarray:
+        """Return the Pearson correlation matrix of the tracked columns"""
+        if self.weight == 0:
+            return np.full((len(self.columns), len(self.columns)), np.nan)
+        means = self._sums / self.weight
+        covariance = self._gram / self.weight - np.outer(means, means)
+        std = np.sqrt(np.clip(np.diag(covariance), 0, None))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # Constant columns have no defined correlation
+            std = np.where(std > 1e-12, std, np.nan)
+            return np.clip(covariance / np.outer(std, std), -1.0, 1.0)
+    
+    def top_pairs(self, k: Optional[int] = None, min_abs: Optional[float] = None,
+                  block_size: int = 512) -> List[Dict[str, Any]]:
+        """Return up to k column pairs with |r| >= min_abs, strongest first"""
+        k = k if k is not None else Config.CORRELATION_TOP_K
+        min_abs = min_abs if min_abs is not None else Config.CORRELATION_MIN_ABS
+        size = len(self.columns)
+        if k <= 0 or size < 2:
+            return []
+        corr = self.correlation_matrix()
+        candidates = []
+        # Scan the upper triangle in row blocks so only k candidates per block are kept
+        for start in range(0, size - 1, block_size):
+            rows = np.abs(corr[start:start + block_size])
+            rows[np.arange(rows.shape[0])[:, None] + start >= np.arange(size)[None, :]] = np.nan
+            flat = np.nan_to_num(rows, nan=-1.0).ravel()
+            top = np.argpartition(flat, -k)[-k:] if len(flat) > k else np.arange(len(flat))
+            for index in top[flat[top] >= min_abs]:
+                i, j = divmod(int(index), size)
+                candidates.append((abs(corr[start + i, j]), start + i, j))
+        # Rounding keeps the order stable against float32 noise between chunkings
+        candidates.sort(key=lambda c: (-round(c[0], 4), c[1], c[2]))
+        return [
+            {"columns": (self.columns[i], self.columns[j]), "r": float(corr[i, j])}
+            for _, i, j in candidates[:k]
+        ]
+
+def format_correlations(pairs: List[Dict[str, Any]]) -> str:
+    """Render correlated pairs one per line for the prompt"""
+    if not pairs:
+        return f"No numeric column pairs with |r| >= {Config.CORRELATION_MIN_ABS}."
+    return "\n".join(f"{a} ~ {b}: r = {pair['r']:+.2f}" for pair in pairs for a, b in [pair["columns"]])
@@ -1,38 +1,702 @@
+import os
+import bz2
+import json
+import gzip
+import lzma
+import shutil
+import tempfile
+import warnings
 import pandas as pd
-import hashlib
+import numpy as np
 from io import StringIO, BytesIO
-from typing import Union, Dict, Any
+from typing import Union, Dict, Any, IO, Iterator, List, Optional, Tuple
+from csv_analyzer.core.config import Config
+from csv_analyzer.core.sampling import RowSampler, sample_dataframe
+from csv_analyzer.core.profiler import ColumnProfiler
+from csv_analyzer.core.sketches import MinHash
+from csv_analyzer.core.state import pack_state, unpack_state
+from csv_analyzer.core.temporal import looks_like_datetime
+from csv_analyzer.core.prompt_builder import build_dataset_info
+from csv_analyzer.core.pushdown import Condition, needed_columns, select_rows, arrow_expression, row_group_may_match
 
-def load_data(file_data: Union[str, bytes], file_extension: str) -> pd.DataFrame:
-    """Load data from various file formats"""
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pyarrow is optional
+    pyarrow = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional
+    zstandard = None
+
+# Formats read through pyarrow, which only load the columns they need
+COLUMNAR_FORMATS = ["parquet", "feather", "arrow"]
+
+# Spreadsheet formats, read sheet by sheet
+EXCEL_FORMATS = ["xlsx", "xls"]
+
+# Newline-delimited JSON, one record per line
+NDJSON_FORMATS = ["jsonl", "ndjson"]
+
+# Compression suffixes and the magic bytes that identify each codec
+COMPRESSION_SUFFIXES = {"gz": "gzip", "gzip": "gzip", "zst": "zstd", "zstd": "zstd", "bz2": "bz2", "xz": "xz"}
+COMPRESSION_MAGIC = {
+    b"\x1f\x8b": "gzip",
+    b"\x28\xb5\x2f\xfd": "zstd",
+    b"BZh": "bz2",
+    b"\xfd7zXZ\x00": "xz",
+}
+
+# Formats whose readers need to seek, so compressed input is inflated to a spool first
+RANDOM_ACCESS_FORMATS = EXCEL_FORMATS + COLUMNAR_FORMATS
+
+# Formats that can be profiled incrementally instead of loaded whole
+STREAMING_FORMATS = ["csv"] + EXCEL_FORMATS + COLUMNAR_FORMATS + NDJSON_FORMATS
+
+def split_file_extension(filename: str) -> Tuple[str, Optional[str]]:
+    """Return the data format and compression codec for names like data.csv.gz"""
+    parts = filename.lower().split('.')
+    compression = None
+    if len(parts) > 2 and parts[-1] in COMPRESSION_SUFFIXES:
+        compression = COMPRESSION_SUFFIXES[parts.pop()]
+    file_extension = parts[-1] if len(parts) > 1 else ''
+    return file_extension, compression
+
+def detect_compression(source: IO[bytes]) -> Optional[str]:
+    """Detect the compression codec of a binary handle from its magic bytes
+    
+    The handle must be seekable or, like io.BufferedReader, able to peek.
+    """
+    if not source.seekable() and hasattr(source, "peek"):
+        header = source.peek(6)[:6]
+    else:
+        position = source.tell()
+        header = source.read(6)
+        source.seek(position)
+    for magic, compression in COMPRESSION_MAGIC.items():
+        if header.startswith(magic):
+            return compression
+    return None
+
+def open_decompressed(source: IO[bytes], file_extension: str, compression: Optional[str] = None) -> IO[bytes]:
+    """Wrap a binary handle so that reads return decompressed bytes
+    
+    The codec is taken from `compression` or detected from the magic bytes.
+    Data is inflated as the parser reads it, except for formats that need
+    random access, which are inflated into a spooled temporary file.
+    """
+    if compression is None:
+        compression = detect_compression(source)
+    if compression is None:
+        return source
+    
+    if compression == "gzip":
+        stream = gzip.GzipFile(fileobj=source, mode="rb")
+    elif compression == "bz2":
+        stream = bz2.BZ2File(source, mode="rb")
+    elif compression == "xz":
+        stream = lzma.LZMAFile(source, mode="rb")
+    elif compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstandard is required to read .zst files")
+        stream = zstandard.ZstdDecompressor().stream_reader(source, read_across_frames=True)
+    else:
+        raise ValueError(f"Unsupported compression: {compression}")
+    
+    if file_extension not in RANDOM_ACCESS_FORMATS:
+        return stream
+    
+    spool = tempfile.SpooledTemporaryFile(max_size=Config.SPOOL_MAX_MEMORY_MB * 1024 * 1024)
+    shutil.copyfileobj(stream, spool, 1024 * 1024)
+    spool.seek(0)
+    return spool
+
+def resolve_csv_engine(engine: Optional[str] = None) -> str:
+    """Return the CSV parse engine to use, falling back to the pandas C parser"""
+    engine = engine or Config.CSV_ENGINE
+    if engine == "pyarrow" and pyarrow is None:
+        warnings.warn("pyarrow is not installed, falling back to the pandas C parser", RuntimeWarning)
+        return "c"
+    return engine
+
+def get_excel_sheet_names(source: Union[bytes, IO], file_extension: str = "xlsx") -> List[str]:
+    """List the sheet names of an Excel workbook without loading its cells"""
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+    position = source.tell()
+    try:
+        if file_extension == "xlsx":
+            from openpyxl import load_workbook
+            workbook = load_workbook(source, read_only=True)
+            try:
+                return workbook.sheetnames
+            finally:
+                workbook.close()
+        return pd.ExcelFile(source).sheet_names
+    finally:
+        source.seek(position)
+
+def resolve_sheet(source: Union[bytes, IO], sheet: Optional[str], file_extension: str = "xlsx") -> Union[str, int]:
+    """Resolve a sheet name or index given as text to a value read_excel accepts"""
+    if sheet is None or sheet == "":
+        return 0
+    if isinstance(sheet, int) or not sheet.isdigit():
+        return sheet
+    # A numeric string is a sheet index unless a sheet has that exact name
+    if sheet in get_excel_sheet_names(source, file_extension):
+        return sheet
+    return int(sheet)
+
+def load_data(file_data: Union[str, bytes, IO], file_extension: str, engine: Optional[str] = None,
+              sheet: Optional[str] = None, max_rows: Optional[int] = None, flatten: bool = False,
+              compact: Optional[bool] = None, columns: Optional[List[str]] = None,
+              filters: Optional[List[Condition]] = None) -> pd.DataFrame:
+    """Load data from various file formats
+    
+    `file_data` can be text, raw bytes or a binary file handle. Passing a handle
+    lets pandas parse straight from the bytes without decoding a copy first.
+    CSV files are parsed with `engine` (defaults to Config.CSV_ENGINE).
+    For columnar formats a string is treated as a local path and memory-mapped.
+    Excel files are read from `sheet` (name or index, default first) and
+    `max_rows` limits the rows read from CSV, Excel and NDJSON files.
+    `flatten` expands nested NDJSON objects into dotted columns.
+    With `compact` (defaults to Config.COMPACT_MODE) dtypes are shrunk by
+    compact_dataframe and its memory report is stored in `df.attrs`.
+    Only `columns` are kept and only rows meeting `filters` (see
+    pushdown.parse_filter). CSV, Excel and columnar readers skip the other
+    columns while parsing, CSV files are filtered chunk by chunk and
+    Parquet row groups whose statistics rule the filter out are not read.
+    """
+    filters = filters or []
+    needed = needed_columns(columns, filters)
     loaders = {
-        "csv": lambda data: pd.read_csv(StringIO(data) if isinstance(data, str) else data),
-        "xlsx": lambda data: pd.read_excel(BytesIO(data) if isinstance(data, bytes) else data),
-        "xls": lambda data: pd.read_excel(BytesIO(data) if isinstance(data, bytes) else data),
-        "json": lambda data: pd.read_json(StringIO(data) if isinstance(data, str) else data),
+        "csv": lambda data: _read_csv(data, engine, max_rows, needed, filters),
+        "xlsx": lambda data: pd.read_excel(BytesIO(data) if isinstance(data, bytes) else data,
+                                           sheet_name=resolve_sheet(data, sheet, "xlsx"), nrows=max_rows, usecols=needed),
+        "xls": lambda data: pd.read_excel(BytesIO(data) if isinstance(data, bytes) else data,
+                                          sheet_name=resolve_sheet(data, sheet, "xls"), nrows=max_rows, usecols=needed),
+        "json": lambda data: pd.read_json(StringIO(data) if isinstance(data, str) else BytesIO(data) if isinstance(data, bytes) else data),
+        "parquet": lambda data: read_columnar(data, "parquet", needed, filters).to_pandas(),
+        "feather": lambda data: read_columnar(data, "feather", needed, filters).to_pandas(),
+        "arrow": lambda data: read_columnar(data, "arrow", needed, filters).to_pandas(),
+        "jsonl": lambda data: _concat_chunks(select_rows(iter_ndjson_chunks(data, max_rows=max_rows, flatten=flatten), needed, filters)),
+        "ndjson": lambda data: _concat_chunks(select_rows(iter_ndjson_chunks(data, max_rows=max_rows, flatten=flatten), needed, filters)),
     }
     
     if file_extension not in loaders:
         raise ValueError(f"Unsupported file format: {file_extension}")
     
-    return loaders[file_extension](file_data)
+    df = loaders[file_extension](file_data)
+    if columns is not None or filters:
+        # Formats without pushdown are filtered here, the others only lose the filter columns
+        df = next(select_rows(iter([df]), columns, filters))
+    if compact if compact is not None else Config.COMPACT_MODE:
+        df, memory_report = compact_dataframe(df)
+        df.attrs["memory_report"] = memory_report
+    return df
 
-def get_dataset_info(df: pd.DataFrame) -> Dict[str, Any]:
-    """Extract key information from a dataset"""
-    columns_info = ", ".join(df.columns.tolist())
-    # Limit stats to essential metrics to reduce token usage
-    stats_summary = df.describe().loc[['count', 'mean', 'std']].to_string()  # Only key stats
-    # Limit data sample to reduce token usage
-    data_sample = df.head(5).to_string(index=False)  # Reduced from 10 to 5 rows
+def _read_csv(data: Union[str, bytes, IO], engine: Optional[str], max_rows: Optional[int],
+              usecols: Optional[List[str]], filters: List[Condition]) -> pd.DataFrame:
+    """Parse a CSV source, reading only `usecols` and keeping only rows that meet `filters`"""
+    data = StringIO(data) if isinstance(data, str) else BytesIO(data) if isinstance(data, bytes) else data
+    if filters:
+        # Filtering chunk by chunk means rejected rows are never held all at once
+        return _concat_chunks(select_rows(iter_csv_chunks(data, max_rows=max_rows, usecols=usecols), usecols, filters))
+    return pd.read_csv(data, engine=resolve_csv_engine(engine), nrows=max_rows, usecols=usecols)
+
+def compact_dataframe(df: pd.DataFrame, category_ratio: Optional[float] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """Shrink a DataFrame's memory footprint by choosing smaller dtypes
+    
+    Integers are downcast to the smallest type that holds them, floats to
+    float32 only when that loses no precision, date strings are parsed,
+    low-cardinality text becomes categorical and other text Arrow-backed
+    strings. Returns the new DataFrame and a report of the memory saved.
+    """
+    category_ratio = category_ratio if category_ratio is not None else Config.COMPACT_CATEGORY_RATIO
+    memory_before = int(df.memory_usage(deep=True).sum())
+    compacted = {}
+    conversions = {}
     
-    return {
-        "columns": columns_info,
-        "stats_summary": stats_summary,
-        "data_sample": data_sample
+    for column in df.columns:
+        series = df[column]
+        converted = series
+        if pd.api.types.is_bool_dtype(series):
+            pass
+        elif pd.api.types.is_integer_dtype(series):
+            downcast = "unsigned" if len(series) and series.min() >= 0 else "integer"
+            converted = pd.to_numeric(series, downcast=downcast)
+        elif pd.api.types.is_float_dtype(series):
+            as_float32 = series.astype("float32")
+            if np.array_equal(as_float32.to_numpy(dtype="float64"), series.to_numpy(dtype="float64"), equal_nan=True):
+                converted = as_float32
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            non_null = series.dropna()
+            if non_null.map(type).eq(str).all() and len(non_null):
+                if looks_like_datetime(non_null.head(1000), min_ratio=1.0):
+                    with warnings.catch_warnings():
+                        warnings.simplefilter("ignore")
+                        parsed = pd.to_datetime(series, errors="coerce", format="mixed")
+                    if parsed.notna().sum() == len(non_null):
+                        converted = parsed
+                if converted is series:
+                    if non_null.nunique() <= category_ratio * len(series):
+                        converted = series.astype("category")
+                    elif pyarrow is not None and pd.api.types.is_object_dtype(series):
+                        converted = series.astype("string[pyarrow]")
+        
+        if converted.dtype != series.dtype:
+            conversions[str(column)] = f"{series.dtype} -> {converted.dtype}"
+        compacted[column] = converted
+    
+    result = pd.DataFrame(compacted, index=df.index)
+    result.attrs = dict(df.attrs)
+    memory_after = int(result.memory_usage(deep=True).sum())
+    return result, {
+        "memory_before": memory_before,
+        "memory_after": memory_after,
+        "reduction": round(memory_before / memory_after, 2) if memory_after else None,
+        "conversions": conversions
     }
 
-def generate_cache_key(df: pd.DataFrame) -> str:
-    """Generate a cache key for a dataset"""
-    # Use a smaller sample for cache key to reduce computation
-    sample = df.head(3).to_string(index=False)  # Reduced from 10 to 3 rows
-    return hashlib.md5(sample.encode()).hexdigest()
\ No newline at end of file
+def get_dataset_info(df: pd.DataFrame, profiler: Optional[ColumnProfiler] = None,
+                     quantiles: Optional[bool] = None) -> Dict[str, Any]:
+    """Extract key information from a dataset, reusing `profiler` when already computed
+    
+    `quantiles` (defaults to Config.INCLUDE_QUANTILES) adds sketched
+    p50/p95/p99 of numeric columns to the stats summary.
+    """
+    # One pass over every column instead of describe(), which skips text columns
+    if profiler is None:
+        profiler = ColumnProfiler(quantiles=quantiles).update(df)
+    profile = profiler.result()
+    # Limit data sample to reduce token usage; rows are drawn from the whole file
+    sample = sample_dataframe(df)
+    return build_dataset_info(df.columns.tolist(), profile, sample, profiler.correlations(),
+                              profiler.anomalies(profile), profiler.temporal(profile))
+
+class StreamingProfile:
+    """Builds dataset information incrementally from chunks of a file
+    
+    Profiles of consecutive parts of a file combine with merge(), given
+    that each part was profiled with its own `seed`. to_bytes() serializes
+    the whole state so rows appended to a file later can be merged in.
+    """
+    
+    def __init__(self, sampler: Optional[RowSampler] = None, quantiles: Optional[bool] = None,
+                 seed: Optional[int] = None, workers: Optional[int] = None):
+        self.columns: List[str] = []
+        self.row_count = 0
+        # The sampler feeds data_sample
+        self.sampler = sampler or RowSampler(seed=seed)
+        self.sample: Optional[pd.DataFrame] = None
+        self.profiler = ColumnProfiler(quantiles=quantiles, workers=workers, seed=seed)
+        # Number of merged parts, the next part is profiled with SAMPLE_SEED + parts
+        self.parts = 1
+        # Stats the stored insights were generated from
+        self.analyzed_stats: Optional[pd.DataFrame] = None
+        # Row hashes for finding near-duplicate files in the cache
+        self.minhash = MinHash() if Config.SIMILARITY_CACHE else None
+    
+    def update(self, chunk: pd.DataFrame, collect_sample: bool = True) -> None:
+        """Fold a chunk of rows into the profile"""
+        for column in chunk.columns:
+            if column not in self.columns:
+                self.columns.append(column)
+        self.row_count += len(chunk)
+        
+        # Keep only the sampled rows so the chunk can be released
+        if collect_sample:
+            self.sampler.update(chunk)
+        if self.minhash is not None:
+            self.minhash.update(chunk)
+        
+        self.profiler.update(chunk)
+    
+    def merge(self, other: "StreamingProfile") -> "StreamingProfile":
+        """Combine the profile of the rows that follow ours in the file"""
+        for column in other.columns:
+            if column not in self.columns:
+                self.columns.append(column)
+        self.row_count += other.row_count
+        if self.sample is not None or other.sample is not None:
+            # Rows of columnar files are decoded after sampling, so the merged
+            # sample is drawn from the two decoded samples
+            self.sample = sample_dataframe(pd.concat([self.sample_frame(), other.sample_frame()], ignore_index=True))
+        self.sampler.merge(other.sampler)
+        self.profiler.merge(other.profiler)
+        if getattr(self, "minhash", None) is not None and getattr(other, "minhash", None) is not None:
+            self.minhash.merge(other.minhash)
+        else:
+            self.minhash = None
+        self.parts += other.parts
+        return self
+    
+    def to_bytes(self) -> bytes:
+        """Serialize the mergeable state of the profile, e.g. to store it next to the cached insights
+        
+        The state is versioned and written without pickle (see core.state),
+        so loading a stored profile cannot run code.
+        """
+        return pack_state("streaming profile", {
+            "columns": self.columns, "row_count": self.row_count, "sampler": self.sampler.state(),
+            "sample": self.sample, "profiler": self.profiler.state(), "parts": self.parts,
+            "analyzed_stats": self.analyzed_stats,
+            "minhash": self.minhash.state() if self.minhash is not None else None,
+        })
+    
+    @staticmethod
+    def from_bytes(data: bytes) -> "StreamingProfile":
+        """Restore a profile serialized with to_bytes(), raising ValueError for other data or versions"""
+        state = unpack_state("streaming profile", data)
+        profile = StreamingProfile()
+        profile.columns, profile.row_count, profile.parts = list(state["columns"]), int(state["row_count"]), int(state["parts"])
+        profile.sampler, profile.sample = RowSampler.from_state(state["sampler"]), state["sample"]
+        profile.profiler = ColumnProfiler.from_state(state["profiler"])
+        profile.analyzed_stats = state["analyzed_stats"]
+        profile.minhash = MinHash.from_state(state["minhash"]) if state["minhash"] is not None else None
+        return profile
+    
+    def _as_loaded(self, rows: Optional[pd.DataFrame]) -> pd.DataFrame:
+        """Give rows the columns and dtypes a full load would have produced"""
+        if rows is None:
+            return pd.DataFrame(columns=self.columns)
+        # Columns first seen after the rows were kept are missing from them
+        rows = rows.reindex(columns=self.columns)
+        # Columns that turned non-numeric later in the file are text in a full load
+        for column in rows.columns:
+            if str(column) in self.profiler.non_numeric and pd.api.types.is_numeric_dtype(rows[column]):
+                rows[column] = rows[column].astype(object).where(rows[column].isna(), rows[column].astype(str))
+        return rows
+    
+    def sample_frame(self) -> pd.DataFrame:
+        """Return the sampled rows with the dtypes a full load would have produced"""
+        if self.sample is not None:
+            return self._as_loaded(self.sample)
+        if self.sampler.rows_seen == 0:
+            return self._as_loaded(None)
+        return self._as_loaded(self.sampler.result())
+    
+    def stats_frame(self) -> pd.DataFrame:
+        """Return the per-column profile of every row seen so far"""
+        return self.profiler.result()
+    
+    def dataset_info(self) -> Dict[str, Any]:
+        """Return the same information as get_dataset_info"""
+        profile = self.stats_frame()
+        return build_dataset_info(self.columns, profile, self.sample_frame(), self.profiler.correlations(),
+                                  self.profiler.anomalies(profile), self.profiler.temporal(profile))
+
+def iter_csv_chunks(source: Union[str, bytes, IO], chunksize: Optional[int] = None,
+                    max_rows: Optional[int] = None, usecols: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """Read a CSV source in chunks of at most `chunksize` rows, parsing only `usecols`
+    
+    Chunked reads always use the pandas C parser because the pyarrow engine
+    cannot read in chunks.
+    """
+    if isinstance(source, str):
+        source = StringIO(source)
+    elif isinstance(source, bytes):
+        source = BytesIO(source)
+    
+    with pd.read_csv(source, chunksize=chunksize or Config.CHUNK_SIZE, nrows=max_rows, usecols=usecols) as reader:
+        for chunk in reader:
+            yield chunk
+
+def _rows_to_frame(rows: List[tuple], header: List[str]) -> pd.DataFrame:
+    """Build a chunk from worksheet rows, typing empty columns like read_csv does"""
+    chunk = pd.DataFrame.from_records(rows, columns=header)
+    chunk = chunk.infer_objects()
+    for column in chunk.columns[chunk.isna().all()]:
+        chunk[column] = chunk[column].astype("float64")
+    return chunk
+
+def iter_excel_chunks(source: Union[bytes, IO], file_extension: str, sheet: Optional[str] = None,
+                      chunksize: Optional[int] = None, max_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """Read one sheet of an Excel workbook in chunks without loading the whole workbook
+    
+    .xlsx files are read with openpyxl in read-only mode, which streams rows
+    from the sheet XML. Reading stops after `max_rows` rows.
+    """
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+    sheet_name = resolve_sheet(source, sheet, file_extension)
+    
+    if file_extension != "xlsx":
+        # Legacy .xls workbooks cannot be streamed, read only the rows needed
+        yield pd.read_excel(source, sheet_name=sheet_name, nrows=max_rows)
+        return
+    
+    from openpyxl import load_workbook
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        if isinstance(sheet_name, int):
+            if sheet_name >= len(workbook.sheetnames):
+                raise ValueError(f"Worksheet index {sheet_name} is invalid, {len(workbook.sheetnames)} worksheets found")
+            worksheet = workbook.worksheets[sheet_name]
+        elif sheet_name in workbook.sheetnames:
+            worksheet = workbook[sheet_name]
+        else:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        
+        rows = worksheet.iter_rows(values_only=True)
+        header_row = next(rows, None)
+        if header_row is None:
+            return
+        header = [str(value) if value is not None else f"Unnamed: {i}" for i, value in enumerate(header_row)]
+        
+        chunksize = chunksize or Config.CHUNK_SIZE
+        remaining = max_rows if max_rows is not None else float("inf")
+        batch: List[tuple] = []
+        for row in rows:
+            if remaining <= 0:
+                break
+            batch.append(row[:len(header)])
+            remaining -= 1
+            if len(batch) >= chunksize:
+                yield _rows_to_frame(batch, header)
+                batch = []
+        if batch:
+            yield _rows_to_frame(batch, header)
+    finally:
+        workbook.close()
+
+def _records_to_frame(records: List[Dict[str, Any]], flatten: bool) -> pd.DataFrame:
+    """Build a chunk from parsed JSON records, typing empty columns like read_csv does"""
+    # json_normalize only walks the records of this chunk, never the whole file
+    chunk = pd.json_normalize(records, sep=".") if flatten else pd.DataFrame.from_records(records)
+    chunk = chunk.infer_objects()
+    for column in chunk.columns[chunk.isna().all()]:
+        chunk[column] = chunk[column].astype("float64")
+    return chunk
+
+def iter_ndjson_chunks(source: Union[str, bytes, IO], chunksize: Optional[int] = None,
+                       max_rows: Optional[int] = None, flatten: bool = False) -> Iterator[pd.DataFrame]:
+    """Parse newline-delimited JSON line by line in chunks of at most `chunksize` records
+    
+    With `flatten`, nested objects become dotted columns (e.g. `user.id`).
+    """
+    if isinstance(source, str):
+        source = StringIO(source)
+    elif isinstance(source, bytes):
+        source = BytesIO(source)
+    
+    chunksize = chunksize or Config.CHUNK_SIZE
+    remaining = max_rows if max_rows is not None else float("inf")
+    records: List[Dict[str, Any]] = []
+    for line_number, line in enumerate(source, start=1):
+        if remaining <= 0:
+            break
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+        if not isinstance(record, dict):
+            record = {"value": record}
+        records.append(record)
+        remaining -= 1
+        if len(records) >= chunksize:
+            yield _records_to_frame(records, flatten)
+            records = []
+    if records:
+        yield _records_to_frame(records, flatten)
+
+def _concat_chunks(chunks: Iterator[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate chunks into one DataFrame, returning an empty one if there are none"""
+    chunks = list(chunks)
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+def _open_columnar(source: Union[str, bytes, IO], file_extension: str):
+    """Open a Parquet or Arrow IPC (Feather v2) source, memory-mapping local files"""
+    if pyarrow is None:
+        raise ValueError(f"pyarrow is required to read {file_extension} files")
+    
+    if isinstance(source, (str, os.PathLike)):
+        source = pyarrow.memory_map(os.fspath(source), "r")
+    elif isinstance(source, bytes):
+        source = pyarrow.BufferReader(source)
+    
+    if file_extension == "parquet":
+        return pyarrow.parquet.ParquetFile(source)
+    try:
+        return pyarrow.ipc.open_file(source)
+    except pyarrow.ArrowInvalid:
+        # Not an IPC file, try the IPC streaming format instead
+        source.seek(0)
+        return pyarrow.ipc.open_stream(source)
+
+def _iter_columnar_batches(reader, columns: Optional[List[str]] = None, batch_size: Optional[int] = None,
+                           filters: Optional[List[Condition]] = None) -> Iterator[Any]:
+    """Yield record batches holding only `columns` and the rows meeting `filters` from an open columnar reader"""
+    if isinstance(reader, pyarrow.parquet.ParquetFile):
+        # Parquet skips the column chunks that are not requested, and row groups
+        # whose statistics rule out the filter
+        row_groups = None
+        if filters:
+            row_groups = [i for i in range(reader.num_row_groups)
+                          if row_group_may_match(_row_group_statistics(reader, i), filters)]
+        batches = reader.iter_batches(batch_size=batch_size or Config.CHUNK_SIZE, columns=columns, row_groups=row_groups)
+    elif isinstance(reader, pyarrow.ipc.RecordBatchFileReader):
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    else:
+        batches = iter(reader)
+    is_parquet = isinstance(reader, pyarrow.parquet.ParquetFile)
+    for batch in batches:
+        if filters:
+            batch = _filter_batch(batch, filters)
+        # IPC batches are zero-copy views, so selecting columns costs nothing
+        yield batch.select(columns) if columns is not None and not is_parquet else batch
+
+def _row_group_statistics(reader, index: int) -> Dict[str, tuple]:
+    """Min and max of the columns of a Parquet row group that record them"""
+    row_group = reader.metadata.row_group(index)
+    statistics = {}
+    for position in range(row_group.num_columns):
+        column = row_group.column(position)
+        if column.statistics is not None and column.statistics.has_min_max:
+            statistics[column.path_in_schema] = (column.statistics.min, column.statistics.max)
+    return statistics
+
+def _filter_batch(batch, filters: List[Condition]):
+    """Keep the rows of a record batch that meet `filters`"""
+    expression = arrow_expression(filters, batch.schema)
+    if expression is not None:
+        try:
+            return batch.filter(expression)
+        except (pyarrow.ArrowNotImplementedError, pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+            # No Arrow kernel compares these types, e.g. timestamps with text
+            pass
+    frame = next(select_rows(iter([batch.to_pandas()]), None, filters))
+    return pyarrow.RecordBatch.from_pandas(frame, schema=batch.schema, preserve_index=False)
+
+def read_columnar(source: Union[str, bytes, IO], file_extension: str, columns: Optional[List[str]] = None,
+                  filters: Optional[List[Condition]] = None):
+    """Read a Parquet, Feather or Arrow IPC source into a pyarrow Table"""
+    reader = _open_columnar(source, file_extension)
+    is_parquet = isinstance(reader, pyarrow.parquet.ParquetFile)
+    if is_parquet and not filters:
+        return reader.read(columns=columns)
+    batches = list(_iter_columnar_batches(reader, columns, filters=filters))
+    schema = reader.schema_arrow if is_parquet else reader.schema
+    if columns is not None:
+        schema = pyarrow.schema([schema.field(c) for c in columns])
+    return pyarrow.Table.from_batches(batches, schema=schema)
+
+def profile_columnar(source: Union[str, bytes, IO], file_extension: str, chunksize: Optional[int] = None,
+                     max_rows: Optional[int] = None, quantiles: Optional[bool] = None,
+                     seed: Optional[int] = None, columns: Optional[List[str]] = None,
+                     filters: Optional[List[Condition]] = None) -> StreamingProfile:
+    """Profile a columnar file batch by batch, decoding the sampled rows a second time
+    
+    With `filters`, row positions no longer match the file, so the sampled
+    rows are kept from the batches instead.
+    """
+    reader = _open_columnar(source, file_extension)
+    is_parquet = isinstance(reader, pyarrow.parquet.ParquetFile)
+    schema = reader.schema_arrow if is_parquet else reader.schema
+    
+    profile = StreamingProfile(quantiles=quantiles, seed=seed)
+    profile.columns = list(columns) if columns is not None else list(schema.names)
+    # The sampler only needs the stratum column to pick row positions
+    stratify_by = profile.sampler.stratify_by
+    sampled_columns = [stratify_by] if profile.sampler.method == "stratified" and stratify_by in profile.columns else []
+    
+    for batch in _iter_columnar_batches(reader, needed_columns(columns, filters or []), chunksize, filters):
+        if max_rows is not None:
+            if profile.row_count >= max_rows:
+                break
+            batch = batch.slice(0, max_rows - profile.row_count)
+        frame = batch.to_pandas()
+        if columns is not None:
+            frame = frame[columns]
+        profile.update(frame, collect_sample=bool(filters))
+        if not filters:
+            profile.sampler.update(frame[sampled_columns])
+    
+    if not filters:
+        profile.sample = _take_columnar_rows(source, file_extension, profile.sampler.positions(), columns)
+    return profile
+
+def _take_columnar_rows(source: Union[str, bytes, IO], file_extension: str, positions: List[int],
+                        columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+    """Read only `columns` of the rows at the given positions of a columnar file"""
+    if hasattr(source, "seek"):
+        source.seek(0)
+    reader = _open_columnar(source, file_extension)
+    wanted = np.asarray(sorted(positions), dtype="int64")
+    pieces = []
+    offset = 0
+    if isinstance(reader, pyarrow.parquet.ParquetFile):
+        # Only the row groups holding a sampled row are decoded
+        for index in range(reader.num_row_groups):
+            rows = reader.metadata.row_group(index).num_rows
+            local = wanted[(wanted >= offset) & (wanted < offset + rows)] - offset
+            if len(local):
+                pieces.append(reader.read_row_group(index, columns=columns).take(pyarrow.array(local)))
+            offset += rows
+    else:
+        for batch in _iter_columnar_batches(reader, columns):
+            local = wanted[(wanted >= offset) & (wanted < offset + batch.num_rows)] - offset
+            if len(local):
+                pieces.append(pyarrow.Table.from_batches([batch.take(pyarrow.array(local))]))
+            offset += batch.num_rows
+            if len(wanted) == 0 or offset > wanted[-1]:
+                break
+    if not pieces:
+        return None
+    return pyarrow.concat_tables(pieces).to_pandas()
+
+def should_stream(file_extension: str, max_rows: Optional[int] = None) -> bool:
+    """Whether a file should be profiled chunk by chunk instead of loaded whole"""
+    if file_extension not in STREAMING_FORMATS:
+        return False
+    # Excel, columnar and NDJSON files are always profiled incrementally, CSV files
+    # when streaming mode is on or only part of the file is wanted
+    return file_extension != "csv" or Config.STREAMING_MODE or max_rows is not None
+
+def should_pipeline(file_extension: str) -> bool:
+    """Whether an upload can be parsed from a one-way stream while it is being received"""
+    # Excel and columnar files are read from the end, NDJSON and CSV front to back
+    return Config.PIPELINE_UPLOADS and (file_extension == "csv" or file_extension in NDJSON_FORMATS)
+
+def profile_stream(source: Union[str, bytes, IO], file_extension: str, chunksize: Optional[int] = None,
+                   sheet: Optional[str] = None, max_rows: Optional[int] = None,
+                   flatten: bool = False, quantiles: Optional[bool] = None,
+                   seed: Optional[int] = None, columns: Optional[List[str]] = None,
+                   filters: Optional[List[Condition]] = None) -> StreamingProfile:
+    """Profile a file chunk by chunk so peak memory does not grow with file size
+    
+    `max_rows` caps how many rows are profiled, which bounds the time and
+    memory spent on huge files. `sheet` selects the Excel worksheet,
+    `flatten` expands nested NDJSON objects and `quantiles` keeps
+    percentile sketches of numeric columns. `seed` overrides SAMPLE_SEED,
+    e.g. for rows that will be merged into an existing profile. Only
+    `columns` are profiled, and only the rows of each chunk that meet
+    `filters`.
+    """
+    if file_extension in COLUMNAR_FORMATS:
+        return profile_columnar(source, file_extension, chunksize, max_rows, quantiles, seed, columns, filters)
+    if file_extension == "csv":
+        chunks = iter_csv_chunks(source, chunksize, max_rows, usecols=needed_columns(columns, filters or []))
+    elif file_extension in EXCEL_FORMATS:
+        chunks = iter_excel_chunks(source, file_extension, sheet, chunksize, max_rows)
+    elif file_extension in NDJSON_FORMATS:
+        chunks = iter_ndjson_chunks(source, chunksize, max_rows, flatten)
+    else:
+        raise ValueError(f"Streaming mode is not supported for file format: {file_extension}")
+    if columns is not None or filters:
+        chunks = select_rows(chunks, columns, filters)
+    
+    profile = StreamingProfile(quantiles=quantiles, seed=seed)
+    for chunk in chunks:
+        profile.update(chunk)
+    return profile
+
+def get_dataset_info_streaming(source: Union[str, bytes, IO], file_extension: str, chunksize: Optional[int] = None,
+                               sheet: Optional[str] = None, max_rows: Optional[int] = None,
+                               flatten: bool = False, quantiles: Optional[bool] = None) -> Dict[str, Any]:
+    """Extract the same information as get_dataset_info without loading the whole file"""
+    return profile_stream(source, file_extension, chunksize, sheet, max_rows, flatten, quantiles).dataset_info()
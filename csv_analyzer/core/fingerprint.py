@@ -0,0 +1,48 @@
+import hashlib
+import pandas as pd
+from typing import Optional
+from csv_analyzer.core.sketches import MinHash
+from csv_analyzer.core.profiler import profile_drift
+from csv_analyzer.core.state import pack_state, unpack_state
+
+class DatasetFingerprint:
+    """Schema, row MinHash and column stats of a profiled file, for finding near-duplicate uploads
+    
+    Two files are compared only when their columns and dtypes match. Their
+    distance is the larger of 1 - the Jaccard similarity of their rows and
+    the drift of their column stats (see profile_drift), so a report
+    re-exported with a few rows changed is close to the original, while the
+    same rows with shifted values, or other rows with the same shape, are not.
+    """
+    
+    def __init__(self, schema: str, minhash: MinHash, stats: pd.DataFrame):
+        self.schema = schema
+        self.minhash = minhash
+        self.stats = stats
+    
+    @classmethod
+    def from_profile(cls, profile) -> Optional["DatasetFingerprint"]:
+        """Fingerprint of a StreamingProfile, None when it kept no row MinHash"""
+        if getattr(profile, "minhash", None) is None:
+            return None
+        stats = profile.stats_frame()
+        columns = "\n".join(f"{column}:{dtype}" for column, dtype in stats["dtype"].items())
+        return cls(hashlib.blake2b(columns.encode(), digest_size=16).hexdigest(), profile.minhash, stats)
+    
+    def distance(self, other: "DatasetFingerprint") -> float:
+        """0 for identical files, inf when the schemas differ"""
+        if self.schema != other.schema:
+            return float("inf")
+        return max(1 - self.minhash.jaccard(other.minhash), profile_drift(other.stats, self.stats))
+    
+    def to_bytes(self) -> bytes:
+        """Serialize the fingerprint without pickle (see core.state)"""
+        return pack_state("dataset fingerprint", {
+            "schema": self.schema, "minhash": self.minhash.state(), "stats": self.stats
+        })
+    
+    @staticmethod
+    def from_bytes(data: bytes) -> "DatasetFingerprint":
+        """Restore a fingerprint serialized with to_bytes(), raising ValueError for other data or versions"""
+        state = unpack_state("dataset fingerprint", data)
+        return DatasetFingerprint(state["schema"], MinHash.from_state(state["minhash"]), state["stats"])
@@ -0,0 +1,131 @@
+import gc
+import atexit
+import pickle
+import threading
+import multiprocessing
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple, Iterator
+from csv_analyzer.core.config import Config
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:  # pyarrow is optional
+    pyarrow = None
+
+# One pool per worker count, so callers asking for different counts never stop each other's pool
+_executors: Dict[int, ProcessPoolExecutor] = {}
+_executor_lock = threading.Lock()
+
+def resolve_workers(workers: Optional[int] = None) -> int:
+    """Number of worker processes to use, 0 or 1 meaning in-process"""
+    return max(1, workers if workers is not None else Config.PROFILE_WORKERS)
+
+def get_executor(workers: int) -> ProcessPoolExecutor:
+    """Return a process pool with `workers` processes, reused across calls
+    
+    Pools are kept per worker count until the process exits, since other
+    callers may still be submitting to them.
+    """
+    with _executor_lock:
+        executor = _executors.get(workers)
+        if executor is None:
+            # Forking a threaded server can copy held locks into the workers
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+            _executors[workers] = executor
+        return executor
+
+@atexit.register
+def shutdown_executor() -> None:
+    """Stop the worker processes"""
+    with _executor_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=True)
+
+class SharedFrame:
+    """A DataFrame written once to shared memory as an Arrow IPC stream
+    
+    Workers map the block by name and read the columns from it without the
+    frame being pickled through the pool's pipe. Frames Arrow cannot
+    represent, such as columns of nested objects, are pickled into the
+    block instead. The creator must call close() once workers are done.
+    """
+    
+    def __init__(self, frame: pd.DataFrame):
+        table = _to_arrow(frame)
+        self.format = "arrow" if table is not None else "pickle"
+        if table is not None:
+            # Measure the stream first so it is written straight into the block
+            counter = pyarrow.MockOutputStream()
+            _write_stream(counter, table)
+            self.size = max(counter.size(), 1)
+        else:
+            payload = pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL)
+            self.size = max(len(payload), 1)
+        self._block = shared_memory.SharedMemory(create=True, size=self.size)
+        try:
+            if table is not None:
+                _write_stream(pyarrow.FixedSizeBufferWriter(pyarrow.py_buffer(self._block.buf)), table)
+            else:
+                self._block.buf[:len(payload)] = payload
+        except BaseException:
+            self.close()
+            raise
+        self.name = self._block.name
+    
+    def handle(self) -> Tuple[str, int, str]:
+        """What a worker needs to read the frame"""
+        return self.name, self.size, self.format
+    
+    def close(self) -> None:
+        try:
+            self._block.close()
+        except BufferError:
+            # The writer's view of the block is released with the garbage
+            gc.collect()
+            self._block.close()
+        self._block.unlink()
+
+def _to_arrow(frame: pd.DataFrame):
+    """Convert a frame to an Arrow table, or None when Arrow cannot represent it"""
+    if pyarrow is None:
+        return None
+    try:
+        return pyarrow.Table.from_pandas(frame, preserve_index=False)
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, pyarrow.ArrowNotImplementedError, ValueError):
+        return None
+
+def _write_stream(sink, table) -> None:
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+@contextmanager
+def open_shared_frame(handle: Tuple[str, int, str]) -> Iterator[pd.DataFrame]:
+    """Map a SharedFrame in a worker process for the duration of the block
+    
+    Arrow-backed columns point into the shared block rather than being
+    copied, so the frame must not be used after the block exits.
+    """
+    name, size, frame_format = handle
+    # Attaching registers the block with the creator's resource tracker again, which is harmless
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        if frame_format == "arrow":
+            frame = pyarrow.ipc.open_stream(pyarrow.py_buffer(block.buf[:size])).read_all().to_pandas()
+        else:
+            frame = pickle.loads(block.buf[:size])
+        yield frame
+    finally:
+        frame = None
+        try:
+            block.close()
+        except BufferError:
+            # Something still points into the block, collect it and retry
+            gc.collect()
+            block.close()
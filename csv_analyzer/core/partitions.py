@@ -0,0 +1,169 @@
+import io
+import os
+import pandas as pd
+from typing import Optional, List, Tuple
+from csv_analyzer.core.config import Config
+from csv_analyzer.core.parallel import get_executor, resolve_workers
+from csv_analyzer.core.pushdown import Condition, needed_columns, select_rows
+from csv_analyzer.core.data_processor import StreamingProfile, iter_csv_chunks
+
+# Bytes scanned per read when looking for the end of a line
+_SCAN_BYTES = 64 * 1024
+
+def should_partition(file_extension: str, compression: Optional[str] = None, max_rows: Optional[int] = None) -> bool:
+    """Whether an upload can be profiled in byte ranges on several processes"""
+    # Compressed streams cannot be entered at an offset, and a row cap reads from the start
+    return Config.PARTITION_WORKERS > 1 and file_extension == "csv" and compression is None and max_rows is None
+
+def _count_quotes(handle: io.BufferedReader, start: int, end: int) -> int:
+    """Count the quote characters in bytes [start, end) of a file"""
+    handle.seek(start)
+    count = 0
+    while start < end:
+        block = handle.read(min(_SCAN_BYTES, end - start))
+        if not block:
+            break
+        count += block.count(b'"')
+        start += len(block)
+    return count
+
+def _next_row(handle: io.BufferedReader, offset: int, quoted: bool) -> int:
+    """Return the offset of the first row starting at or after `offset`
+    
+    `quoted` tells whether a quoted field is open at `offset`; line breaks
+    inside quoted fields are skipped, since rows cannot start there.
+    """
+    handle.seek(offset)
+    while True:
+        block = handle.read(_SCAN_BYTES)
+        if not block:
+            return handle.tell()
+        position = 0
+        while True:
+            newline = block.find(b"\n", position)
+            if newline < 0:
+                quoted ^= block.count(b'"', position) % 2 == 1
+                break
+            quoted ^= block.count(b'"', position, newline) % 2 == 1
+            if not quoted:
+                return handle.tell() - len(block) + newline + 1
+            position = newline + 1
+
+def split_byte_ranges(path: str, partitions: int) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """Split a CSV file into about `partitions` byte ranges that start and end on row boundaries
+    
+    Returns the header line and the (start, end) ranges of the data rows.
+    A line break is a row boundary when an even number of quotes precedes
+    it, so ranges do not start inside quoted fields spanning several lines.
+    Quotes inside unquoted fields can throw the count off, which
+    profile_partitioned() catches as a parser error.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as handle:
+        header = handle.readline()
+        start = len(header)
+        bounds = [start]
+        for i in range(1, partitions):
+            target = max(start + (size - start) * i // partitions - 1, bounds[-1])
+            # Ranges start on row boundaries, so no quoted field is open at the last one
+            quoted = _count_quotes(handle, bounds[-1], target) % 2 == 1
+            bound = _next_row(handle, target, quoted)
+            if bound > bounds[-1]:
+                bounds.append(bound)
+        if size > bounds[-1]:
+            bounds.append(size)
+    return header, list(zip(bounds[:-1], bounds[1:]))
+
+class _ByteRange(io.RawIOBase):
+    """Read-only stream of a prefix followed by bytes [start, end) of a file"""
+    
+    def __init__(self, path: str, start: int, end: int, prefix: bytes = b""):
+        self._file = open(path, "rb")
+        self._file.seek(start)
+        self._remaining = end - start
+        self._prefix = prefix
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        if self._prefix:
+            size = min(len(buffer), len(self._prefix))
+            buffer[:size] = self._prefix[:size]
+            self._prefix = self._prefix[size:]
+            return size
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        read = self._file.readinto(memoryview(buffer)[:size])
+        self._remaining -= read
+        return read
+    
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+def _read_chunks(source, chunksize: Optional[int], columns: Optional[List[str]], filters: List[Condition]):
+    """Parse the wanted columns of a CSV source and drop the rows the filter rejects"""
+    chunks = iter_csv_chunks(source, chunksize, usecols=needed_columns(columns, filters))
+    return select_rows(chunks, columns, filters) if columns is not None or filters else chunks
+
+def _profile_serial(path: str, chunksize: Optional[int], quantiles: Optional[bool],
+                    columns: Optional[List[str]], filters: List[Condition]) -> StreamingProfile:
+    """Profile a whole CSV file in one process"""
+    profile = StreamingProfile(quantiles=quantiles)
+    with open(path, "rb") as source:
+        for chunk in _read_chunks(source, chunksize, columns, filters):
+            profile.update(chunk)
+    return profile
+
+def _profile_byte_range(path: str, start: int, end: int, header: bytes, seed: int, chunksize: Optional[int],
+                        quantiles: Optional[bool], columns: Optional[List[str]], filters: List[Condition]) -> StreamingProfile:
+    """Profile one byte range of a CSV file in a worker process"""
+    # Pools cannot be nested in the workers, so columns are profiled in-process
+    profile = StreamingProfile(quantiles=quantiles, seed=seed, workers=1)
+    with io.BufferedReader(_ByteRange(path, start, end, header)) as source:
+        for chunk in _read_chunks(source, chunksize, columns, filters):
+            profile.update(chunk)
+    return profile
+
+def profile_partitioned(path: str, workers: Optional[int] = None, partitions: Optional[int] = None,
+                        chunksize: Optional[int] = None, quantiles: Optional[bool] = None,
+                        min_bytes: Optional[int] = None, columns: Optional[List[str]] = None,
+                        filters: Optional[List[Condition]] = None) -> StreamingProfile:
+    """Profile a CSV file in byte ranges on a process pool and merge the profiles in file order
+    
+    Each range is read by its own worker with the header line in front of
+    it, so parsing, hashing and sketching all run in parallel. Counts,
+    moments, sketches and samples are merged afterwards; range i samples
+    with seed SAMPLE_SEED + i so the first range draws exactly what a
+    serial read would. Files smaller than `min_bytes` (PARTITION_MIN_MB by
+    default) are read serially. Column dtypes are inferred per chunk, as in
+    streaming mode. Only `columns` are parsed, and rows not meeting `filters`
+    are dropped in the workers. When a range fails to parse, e.g. because
+    stray quotes hid a quoted line break from split_byte_ranges(), the
+    file is read serially instead.
+    """
+    filters = filters or []
+    workers = resolve_workers(workers if workers is not None else Config.PARTITION_WORKERS)
+    min_bytes = min_bytes if min_bytes is not None else Config.PARTITION_MIN_MB * 1024 * 1024
+    header, ranges = split_byte_ranges(path, partitions or workers)
+    if workers <= 1 or len(ranges) <= 1 or os.path.getsize(path) < min_bytes:
+        return _profile_serial(path, chunksize, quantiles, columns, filters)
+    
+    # Pools are kept per worker count, so profiles with PROFILE_WORKERS cannot stop this one mid-read
+    executor = get_executor(workers)
+    futures = [
+        # The first range starts right after the header, which it needs too
+        executor.submit(_profile_byte_range, path, start, end, header, Config.SAMPLE_SEED + i, chunksize, quantiles,
+                        columns, filters)
+        for i, (start, end) in enumerate(ranges)
+    ]
+    try:
+        profiles = [future.result() for future in futures]
+    except pd.errors.ParserError:
+        return _profile_serial(path, chunksize, quantiles, columns, filters)
+    profile = profiles[0]
+    for other in profiles[1:]:
+        profile.merge(other)
+    return profile
@@ -0,0 +1,435 @@
+import numpy as np
+import pandas as pd
+from typing import Optional, List, Dict, Any
+from csv_analyzer.core.config import Config
+from csv_analyzer.core.sketches import HyperLogLog, MisraGries, KLLSketch
+from csv_analyzer.core.correlations import CorrelationAccumulator
+from csv_analyzer.core.anomalies import AnomalyDetector
+from csv_analyzer.core.temporal import TemporalRollup
+from csv_analyzer.core.parallel import SharedFrame, get_executor, open_shared_frame, resolve_workers
+
+# Fields of a profile, one row per column
+PROFILE_FIELDS = ["dtype", "count", "nulls", "unique", "exact", "top_values", "mean", "std", "min", "max"]
+
+# Percentiles added to numeric columns when quantiles are requested
+PROFILE_QUANTILES = {"p50": 0.5, "p95": 0.95, "p99": 0.99}
+
+class ColumnProfiler:
+    """Per-column statistics built in one pass and mergeable across chunks
+    
+    Numeric columns are reduced to count, mean, sum of squared deviations,
+    min and max, which are combined across columns with Chan's parallel
+    update, so chunks can be profiled separately and merged. Cardinality
+    and top values of other columns come from HyperLogLog and Misra-Gries
+    sketches, so their state stays bounded however many rows are profiled;
+    both are exact while a column has fewer distinct values than the
+    top-values sketch has counters. Datetime columns also keep min/max.
+    With `quantiles`, numeric columns also keep a KLL sketch for their
+    percentiles, with `correlations` the strongest correlated pairs of
+    numeric columns are tracked, with `anomalies` their outliers, and with
+    `temporal` their rollup over the first datetime column. With more than
+    one of `workers`, the text columns of wide chunks are profiled in
+    batches on a process pool. `seed` seeds the row sampling of the
+    correlations and the anomaly sketches, and must differ between
+    profilers of different parts of a file that are merged later.
+    """
+    
+    def __init__(self, top_values: Optional[int] = None, quantiles: Optional[bool] = None,
+                 correlations: Optional[bool] = None, anomalies: Optional[bool] = None,
+                 temporal: Optional[bool] = None, workers: Optional[int] = None, seed: Optional[int] = None):
+        self.top_values = top_values if top_values is not None else Config.PROFILE_TOP_VALUES
+        self.quantiles = quantiles if quantiles is not None else Config.INCLUDE_QUANTILES
+        self.workers = resolve_workers(workers)
+        if correlations is None:
+            correlations = Config.CORRELATION_TOP_K > 0
+        self._correlations = CorrelationAccumulator(seed=seed if seed is not None else 0) if correlations else None
+        if anomalies is None:
+            anomalies = Config.ANOMALY_DETECTION
+        self._anomalies = AnomalyDetector(seed=seed) if anomalies else None
+        if temporal is None:
+            temporal = Config.TEMPORAL_ROLLUP
+        self._temporal = TemporalRollup() if temporal else None
+        self.columns: List[str] = []
+        self.row_count = 0
+        self._dtypes: Dict[str, str] = {}
+        self._non_null = pd.Series(dtype="float64")
+        self._counts = pd.Series(dtype="float64")
+        self._means = pd.Series(dtype="float64")
+        self._m2 = pd.Series(dtype="float64")
+        self._min = pd.Series(dtype="float64")
+        self._max = pd.Series(dtype="float64")
+        self._distinct: Dict[str, HyperLogLog] = {}
+        self._heavy: Dict[str, MisraGries] = {}
+        self._sketches: Dict[str, KLLSketch] = {}
+        self._bounds: Dict[str, tuple] = {}
+        self.non_numeric: set = set()
+    
+    def update(self, chunk: pd.DataFrame) -> "ColumnProfiler":
+        """Fold a chunk of rows into the profile"""
+        self.merge(self._profile_chunk(chunk))
+        # Fed directly so their row sampling follows the rows seen so far
+        if self._correlations is not None or self._anomalies is not None or self._temporal is not None:
+            numeric = chunk.select_dtypes(include="number")
+            numeric = numeric[[c for c in numeric.columns if str(c) not in self.non_numeric]]
+            for accumulator in (self._correlations, self._anomalies):
+                if accumulator is not None:
+                    accumulator.update(numeric)
+            if self._temporal is not None:
+                self._temporal.update(chunk, [str(c) for c in numeric.columns])
+        return self
+    
+    def _partial(self) -> "ColumnProfiler":
+        """An empty profiler for one chunk, without the whole-file accumulators"""
+        return ColumnProfiler(self.top_values, self.quantiles, correlations=False, anomalies=False,
+                              temporal=False, workers=1)
+    
+    def _profile_chunk(self, chunk: pd.DataFrame) -> "ColumnProfiler":
+        """Profile a chunk from scratch, with batches of its text columns on the process pool"""
+        number = set(chunk.select_dtypes(include="number").columns)
+        text = [i for i, column in enumerate(chunk.columns) if column not in number]
+        if self.workers <= 1 or len(text) < max(Config.PROFILE_PARALLEL_MIN_COLUMNS, 2):
+            partial = self._partial()
+            partial._profile(chunk)
+            return partial
+        
+        # Hashing dominates the cost of text columns, while numeric columns take
+        # less time to reduce than to copy to a worker, so only text is shipped.
+        # More batches than workers even out columns of different cardinality.
+        frames, futures = [], []
+        try:
+            executor = get_executor(self.workers)
+            for batch in np.array_split(text, min(len(text), self.workers * 4)):
+                frames.append(SharedFrame(chunk.iloc[:, batch]))
+                futures.append(executor.submit(_profile_shared, frames[-1].handle(), self._partial()))
+            # Numeric columns are profiled here while the workers run
+            joined = self._partial()
+            joined._profile(chunk.iloc[:, [i for i in range(chunk.shape[1]) if i not in set(text)]])
+            for future in futures:
+                joined._join(future.result())
+        finally:
+            for frame in frames:
+                frame.close()
+        
+        joined.columns = [str(c) for c in chunk.columns]
+        # Dtypes are those of the chunk, not of its copy in shared memory
+        joined._dtypes = {str(c): str(chunk[c].dtype) for c in chunk.columns}
+        return joined
+    
+    def _join(self, other: "ColumnProfiler") -> None:
+        """Add the profile of other columns of the same rows"""
+        self.columns += other.columns
+        self._dtypes.update(other._dtypes)
+        for name in ["_non_null", "_counts", "_means", "_m2", "_min", "_max"]:
+            parts = [part for part in (getattr(self, name), getattr(other, name)) if len(part)]
+            if parts:
+                setattr(self, name, pd.concat(parts))
+        for name in ["_distinct", "_heavy", "_sketches", "_bounds"]:
+            getattr(self, name).update(getattr(other, name))
+        self.non_numeric |= other.non_numeric
+    
+    def _profile(self, chunk: pd.DataFrame) -> None:
+        """Profile a single frame from scratch"""
+        self.columns = [str(c) for c in chunk.columns]
+        self.row_count = len(chunk)
+        self._dtypes = {str(c): str(chunk[c].dtype) for c in chunk.columns}
+        self._non_null = chunk.count().astype("float64")
+        self._non_null.index = self.columns
+        
+        numeric = chunk.select_dtypes(include="number")
+        if numeric.shape[1]:
+            stats = np.full((5, numeric.shape[1]), np.nan)
+            for i, column in enumerate(numeric.columns):
+                values = numeric[column].to_numpy(dtype="float64", na_value=np.nan)
+                missing = np.isnan(values)
+                if missing.any():
+                    values = values[~missing]
+                if len(values) == 0:
+                    stats[0, i] = 0.0
+                    continue
+                # Contiguous 1-D reductions are much faster than describe()'s percentiles
+                mean = values.sum() / len(values)
+                deviations = values - mean
+                stats[:, i] = [len(values), mean, np.dot(deviations, deviations), values.min(), values.max()]
+                if self.quantiles:
+                    self._sketches[str(column)] = KLLSketch()
+                    self._sketches[str(column)].update(values)
+            index = [str(c) for c in numeric.columns]
+            self._counts, self._means, self._m2, self._min, self._max = (pd.Series(row, index=index) for row in stats)
+        
+        for column in chunk.columns.difference(numeric.columns):
+            series = chunk[column]
+            self.non_numeric.add(str(column))
+            if pd.api.types.is_datetime64_any_dtype(series):
+                if series.notna().any():
+                    self._bounds[str(column)] = (series.min(), series.max())
+            series = series.dropna()
+            if series.dtype == object and not all(map(pd.api.types.is_hashable, series)):
+                # Unhashable values such as nested NDJSON objects are counted by their text
+                series = series.astype(str)
+            self._distinct[str(column)], self._heavy[str(column)] = _sketch_values(series)
+    
+    def merge(self, other: "ColumnProfiler") -> "ColumnProfiler":
+        """Combine the profile of another chunk into this one, taking over its sketches"""
+        for column in other.columns:
+            if column not in self.columns:
+                self.columns.append(column)
+            self._dtypes[column] = _merge_dtype(self._dtypes.get(column), other._dtypes[column])
+        self.row_count += other.row_count
+        self._non_null = self._non_null.add(other._non_null, fill_value=0.0)
+        
+        # A column is numeric only if it parsed as numeric in every chunk, which
+        # matches the dtype a full load gives it. Values read before a column
+        # turned to text are not counted in its cardinality and top values.
+        self.non_numeric |= other.non_numeric
+        for name in ["_counts", "_means", "_m2", "_min", "_max"]:
+            setattr(self, name, getattr(self, name).drop(list(self.non_numeric), errors="ignore"))
+        numeric = other._counts.index.difference(list(self.non_numeric))
+        
+        chunk_counts = other._counts.reindex(numeric)
+        counts = self._counts.reindex(numeric, fill_value=0.0)
+        means = self._means.reindex(numeric, fill_value=0.0)
+        m2 = self._m2.reindex(numeric, fill_value=0.0)
+        
+        # Chan et al. parallel update of mean and sum of squared deviations
+        total = counts + chunk_counts
+        safe_total = total.replace(0.0, np.nan)
+        delta = (other._means.reindex(numeric) - means).fillna(0.0)
+        new_means = (means + delta * chunk_counts / safe_total).fillna(means)
+        new_m2 = (m2 + other._m2.reindex(numeric).fillna(0.0) + delta ** 2 * counts * chunk_counts / safe_total).fillna(m2)
+        
+        self._counts = total.combine_first(self._counts)
+        self._means = new_means.combine_first(self._means)
+        self._m2 = new_m2.combine_first(self._m2)
+        self._min = pd.Series(np.fmin(self._min.reindex(numeric), other._min.reindex(numeric)), index=numeric).combine_first(self._min)
+        self._max = pd.Series(np.fmax(self._max.reindex(numeric), other._max.reindex(numeric)), index=numeric).combine_first(self._max)
+        
+        for column, sketch in other._distinct.items():
+            self._distinct[column] = self._distinct[column].merge(sketch) if column in self._distinct else sketch
+        for column in self.non_numeric.intersection(self._sketches):
+            del self._sketches[column]
+        if self._correlations is not None:
+            if other._correlations is not None:
+                self._correlations.merge(other._correlations)
+            self._correlations.drop(self.non_numeric)
+        if self._anomalies is not None:
+            if other._anomalies is not None:
+                self._anomalies.merge(other._anomalies)
+            self._anomalies.drop(self.non_numeric)
+        if self._temporal is not None:
+            if other._temporal is not None:
+                self._temporal.merge(other._temporal)
+            self._temporal.drop(self.non_numeric)
+        for column, sketch in other._sketches.items():
+            if column not in self.non_numeric:
+                self._sketches[column] = self._sketches[column].merge(sketch) if column in self._sketches else sketch
+        for column, sketch in other._heavy.items():
+            self._heavy[column] = self._heavy[column].merge(sketch) if column in self._heavy else sketch
+        for column, (low, high) in other._bounds.items():
+            if column in self._bounds:
+                low, high = min(low, self._bounds[column][0]), max(high, self._bounds[column][1])
+            self._bounds[column] = (low, high)
+        return self
+    
+    def state(self) -> Dict[str, Any]:
+        """Moments, sketches and accumulators, for core.state.pack_state"""
+        return {
+            "top_values": self.top_values, "quantiles": self.quantiles, "columns": self.columns,
+            "row_count": self.row_count, "dtypes": self._dtypes, "non_null": self._non_null,
+            "counts": self._counts, "means": self._means, "m2": self._m2, "min": self._min, "max": self._max,
+            "distinct": {column: sketch.state() for column, sketch in self._distinct.items()},
+            "heavy": {column: sketch.state() for column, sketch in self._heavy.items()},
+            "sketches": {column: sketch.state() for column, sketch in self._sketches.items()},
+            "bounds": self._bounds, "non_numeric": sorted(self.non_numeric),
+            "correlations": self._correlations.state() if self._correlations is not None else None,
+            "anomalies": self._anomalies.state() if self._anomalies is not None else None,
+            "temporal": self._temporal.state() if self._temporal is not None else None,
+        }
+    
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], workers: Optional[int] = None) -> "ColumnProfiler":
+        profiler = cls(int(state["top_values"]), bool(state["quantiles"]), correlations=False, anomalies=False,
+                       temporal=False, workers=workers)
+        profiler.columns, profiler.row_count, profiler._dtypes = list(state["columns"]), int(state["row_count"]), state["dtypes"]
+        for name in ["non_null", "counts", "means", "m2", "min", "max"]:
+            setattr(profiler, f"_{name}", state[name].astype("float64"))
+        profiler._distinct = {column: HyperLogLog.from_state(sketch) for column, sketch in state["distinct"].items()}
+        profiler._heavy = {column: MisraGries.from_state(sketch) for column, sketch in state["heavy"].items()}
+        profiler._sketches = {column: KLLSketch.from_state(sketch) for column, sketch in state["sketches"].items()}
+        profiler._bounds = {column: tuple(bounds) for column, bounds in state["bounds"].items()}
+        profiler.non_numeric = set(state["non_numeric"])
+        if state["correlations"] is not None:
+            profiler._correlations = CorrelationAccumulator.from_state(state["correlations"])
+        if state["anomalies"] is not None:
+            profiler._anomalies = AnomalyDetector.from_state(state["anomalies"])
+        if state["temporal"] is not None:
+            profiler._temporal = TemporalRollup.from_state(state["temporal"])
+        return profiler
+    
+    def correlations(self, k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return the k most strongly correlated numeric column pairs"""
+        if self._correlations is None:
+            return []
+        return self._correlations.top_pairs(k)
+    
+    def anomalies(self, profile: Optional[pd.DataFrame] = None) -> Optional[pd.DataFrame]:
+        """Return outlier counts of numeric columns, or None when they are not tracked"""
+        if self._anomalies is None:
+            return None
+        return self._anomalies.result(profile if profile is not None else self.result())
+    
+    def temporal(self, profile: Optional[pd.DataFrame] = None) -> Optional[Dict[str, Any]]:
+        """Return the time-series summary, or None without a datetime column or rollup"""
+        if self._temporal is None:
+            return None
+        return self._temporal.result(profile=profile if profile is not None else self.result())
+    
+    def quantile_sketch(self, column: str) -> Optional[KLLSketch]:
+        """Return the quantile sketch of a numeric column, if quantiles are kept"""
+        return self._sketches.get(column)
+    
+    def result(self) -> pd.DataFrame:
+        """Return the profile as a DataFrame with one row per column"""
+        rows = []
+        for column in self.columns:
+            non_null = int(self._non_null.get(column, 0))
+            row = {"dtype": self._dtypes[column], "count": non_null, "nulls": self.row_count - non_null}
+            if column in self._distinct:
+                # The estimate can exceed the values it was built from
+                row["unique"] = min(self._distinct[column].count(), non_null)
+                row["exact"] = False
+            if column in self._heavy:
+                heavy = self._heavy[column]
+                if heavy.exact:
+                    row["unique"] = len(heavy.counters)
+                    row["exact"] = True
+                row["top_values"] = _format_top(heavy, self.top_values)
+            if column in self.non_numeric:
+                if column in self._bounds:
+                    row["min"], row["max"] = self._bounds[column]
+            elif column in self._counts.index:
+                count = self._counts[column]
+                row["mean"] = self._means[column] if count > 0 else np.nan
+                row["std"] = np.sqrt(self._m2[column] / (count - 1)) if count > 1 else np.nan
+                row["min"] = self._min[column]
+                row["max"] = self._max[column]
+                if column in self._sketches:
+                    row.update(zip(PROFILE_QUANTILES, self._sketches[column].quantiles(list(PROFILE_QUANTILES.values()))))
+            rows.append(row)
+        fields = PROFILE_FIELDS + (list(PROFILE_QUANTILES) if self.quantiles else [])
+        profile = pd.DataFrame(rows, index=self.columns, columns=fields)
+        profile["unique"] = profile["unique"].astype("Int64")
+        return profile
+
+def _profile_shared(handle, partial: ColumnProfiler) -> ColumnProfiler:
+    """Profile a batch of columns in a worker process"""
+    with open_shared_frame(handle) as chunk:
+        partial._profile(chunk)
+        del chunk
+    return partial
+
+def _merge_dtype(left: Optional[str], right: str) -> str:
+    """The dtype a full load gives a column seen with different dtypes in chunks"""
+    if left is None or left == right:
+        return right
+    left_numeric, right_numeric = _is_numeric_dtype(left), _is_numeric_dtype(right)
+    if left_numeric and right_numeric:
+        return str(np.result_type(left, right))
+    # Numbers in a text column are parsed as text
+    if left_numeric != right_numeric:
+        return right if left_numeric else left
+    return "object"
+
+def _is_numeric_dtype(dtype: str) -> bool:
+    try:
+        return np.dtype(dtype).kind in "iuf"
+    except TypeError:
+        return False
+
+def _sketch_values(values: pd.Series) -> tuple:
+    """Cardinality and top-values sketches of the non-null values of a column
+    
+    Values are counted exactly in slices of CHUNK_SIZE rows, so memory is
+    bounded by the slice rather than by the distinct values of the column.
+    Columns whose first rows already hold more distinct values than the
+    top-values sketch has counters, such as ids or timestamps, skip the
+    counting: their hashes go straight into the HyperLogLog sketch and the
+    top values are estimated from an evenly spaced sample of CHUNK_SIZE rows.
+    """
+    distinct, heavy = HyperLogLog(), MisraGries()
+    step = max(Config.CHUNK_SIZE, 1)
+    if values.iloc[:4 * heavy.capacity].nunique() <= heavy.capacity:
+        # Slice counts are summed before they reach the sketch, which is slower to combine
+        pending, size = [], 0
+        for start in range(0, len(values), step):
+            counts = values.iloc[start:start + step].value_counts(sort=False)
+            counts = counts[counts > 0]
+            distinct.update(counts.index.to_numpy())
+            pending.append(counts)
+            size += len(counts)
+            if size > heavy.capacity or start + step >= len(values):
+                heavy.update_counts(pending[0] if len(pending) == 1 else pd.concat(pending).groupby(level=0, sort=False).sum())
+                pending, size = [], 0
+        return distinct, heavy
+    
+    for start in range(0, len(values), step):
+        distinct.update(values.iloc[start:start + step].to_numpy())
+    sample = values.iloc[::-(-len(values) // step)]
+    counts = sample.value_counts(sort=False)
+    heavy.update_counts((counts[counts > 0] * (len(values) / len(sample))).round().astype("int64"))
+    heavy.exact = False
+    return distinct, heavy
+
+def _format_top(heavy: MisraGries, n: int) -> str:
+    """Format the most frequent values as 'value (count)', marking estimated counts with ~"""
+    prefix = "" if heavy.exact else "~"
+    return ", ".join(f"{value} ({prefix}{int(count)})" for value, count in heavy.top(n).items())
+
+def profile_dataframe(df: pd.DataFrame, top_values: Optional[int] = None,
+                      quantiles: Optional[bool] = None) -> pd.DataFrame:
+    """Profile every column of an in-memory DataFrame"""
+    return ColumnProfiler(top_values, quantiles).update(df).result()
+
+def profile_drift(before: Optional[pd.DataFrame], after: pd.DataFrame) -> float:
+    """Measure how far a profile moved, e.g. after rows were appended
+    
+    Returns the largest change over the columns: the shift of a column's
+    null share, and for numeric columns the shift of its mean in standard
+    deviations and the relative change of its standard deviation. Columns
+    of consecutive integers, such as row ids, grow with the rows and are
+    only compared on nulls. Added, removed or retyped columns, or no
+    previous profile, give infinity.
+    """
+    if before is None or not before.index.sort_values().equals(after.index.sort_values()):
+        return np.inf
+    after = after.loc[before.index]
+    if (before["dtype"] != after["dtype"]).any():
+        return np.inf
+    
+    def null_share(profile: pd.DataFrame) -> pd.Series:
+        rows = (profile["count"] + profile["nulls"]).astype("float64")
+        return profile["nulls"] / rows.where(rows > 0)
+    
+    mean_before, mean_after = pd.to_numeric(before["mean"], errors="coerce"), pd.to_numeric(after["mean"], errors="coerce")
+    std_before, std_after = pd.to_numeric(before["std"], errors="coerce"), pd.to_numeric(after["std"], errors="coerce")
+    # As many values as integers in their range, centered on it
+    low, high = pd.to_numeric(after["min"], errors="coerce"), pd.to_numeric(after["max"], errors="coerce")
+    width = high - low + 1
+    sequences = ((after["count"] == width) & ((mean_after - (low + high) / 2).abs() < 1e-6 * width)).to_numpy(dtype=bool)
+    scale = std_before.where((std_before > 0) & ~sequences)
+    shift = (mean_after - mean_before).abs() / scale
+    # Constant columns have no scale, any change of them counts fully
+    shift[(std_before == 0) & (mean_after != mean_before) & ~sequences] = np.inf
+    changes = pd.concat([(null_share(after) - null_share(before)).abs(), shift, (std_after / scale - 1).abs()], axis=1)
+    drift = changes.max().max()
+    return 0.0 if pd.isna(drift) else float(drift)
+
+def format_profile(profile: pd.DataFrame) -> str:
+    """Render a profile as a compact table for the prompt"""
+    table = profile.dropna(axis=1, how="all")
+    if "unique" in table.columns:
+        # Estimated distinct counts are marked with ~
+        unique = table["unique"].astype(object).where(table["unique"].notna(), "")
+        estimated = table["unique"].notna() & (table["exact"] == False)
+        unique[estimated] = "~" + unique[estimated].astype(str)
+        table = table.assign(unique=unique)
+    return table.drop(columns=["exact"], errors="ignore").to_string(na_rep="")
@@ -0,0 +1,167 @@
+import pandas as pd
+from typing import Optional, List, Dict, Any, Iterable
+from csv_analyzer.core.config import Config
+from csv_analyzer.core.profiler import format_profile
+from csv_analyzer.core.correlations import format_correlations
+from csv_analyzer.core.anomalies import format_anomalies
+from csv_analyzer.core.temporal import format_temporal
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the tokens of a prompt section from its length"""
+    return -(-len(text) // Config.PROMPT_CHARS_PER_TOKEN)
+
+def rank_columns(profile: pd.DataFrame, mentioned: Iterable[str] = ()) -> List[str]:
+    """Order the columns of a profile from most to least informative
+    
+    Columns named in the correlations, outliers or time series come first,
+    then varying numeric columns and text columns with repeated values,
+    weighted by how much of the column is filled. All-distinct text
+    columns, such as ids, follow, and constant or empty columns come last.
+    """
+    mentioned = set(mentioned)
+    rows = (profile["count"] + profile["nulls"]).astype("float64")
+    fill = (profile["count"] / rows.where(rows > 0)).fillna(0.0)
+    unique = pd.to_numeric(profile["unique"], errors="coerce")
+    std = pd.to_numeric(profile["std"], errors="coerce")
+    numeric = pd.to_numeric(profile["mean"], errors="coerce").notna()
+    
+    score = pd.Series(0.5, index=profile.index)
+    score[numeric & (std > 0)] = 1.0
+    score[~numeric & (unique > 1) & (unique < profile["count"])] = 1.0
+    score[~numeric & (unique == profile["count"])] = 0.2
+    score[(unique <= 1) | (numeric & (std == 0)) | (profile["count"] == 0)] = 0.0
+    score = score * fill + profile.index.isin(list(mentioned))
+    return score.sort_values(ascending=False, kind="stable").index.tolist()
+
+def summarize_columns(profile: pd.DataFrame) -> str:
+    """Describe columns left out of the prompt in one line"""
+    dtypes = ", ".join(f"{count} {dtype}" for dtype, count in profile["dtype"].value_counts().items())
+    line = f"... {len(profile)} more columns not shown ({dtypes})"
+    unique = pd.to_numeric(profile["unique"], errors="coerce")
+    constant = int(((unique == 1) | (pd.to_numeric(profile["std"], errors="coerce") == 0)).sum())
+    empty = int((profile["count"] == 0).sum())
+    details = []
+    if constant:
+        details.append(f"{constant} constant")
+    if empty:
+        details.append(f"{empty} empty")
+    return line + (": " + ", ".join(details) if details else "")
+
+def column_widths(table: str, names: List[str]) -> List[int]:
+    """Characters each column takes on every line of a right-justified to_string() table
+    
+    The header line is searched for the end of each name, so the width of
+    a column includes the space before it. Columns kept in a subset of the
+    table are at most this wide.
+    """
+    header = table.split("\n", 1)[0]
+    widths, end = [], 0
+    for name in names:
+        start = header.find(name, end)
+        if start < 0:
+            # Not found in order, e.g. a name with a line break: no column is wider than the table
+            widths.append(len(header))
+            continue
+        widths.append(start + len(name) - end)
+        end = start + len(name)
+    return widths
+
+def build_dataset_info(columns: List[str], profile: pd.DataFrame, sample: pd.DataFrame,
+                       correlations: List[Dict[str, Any]], anomalies: Optional[pd.DataFrame],
+                       temporal: Optional[Dict[str, Any]], budget: Optional[int] = None) -> Dict[str, str]:
+    """Render the prompt sections of a dataset within a token budget
+    
+    Sections are rendered in full when they fit in `budget` tokens
+    (PROMPT_TOKEN_BUDGET by default, 0 for no limit). Otherwise sample
+    rows are dropped first, then the stats table and the sample keep only
+    the most informative columns, with one line summarizing the others,
+    and sample rows are added back while they fit. The correlations,
+    outliers and time series are bounded by their own settings and kept.
+    
+    The fitting works on the sizes of each column's stats line and sample
+    column, which bound their sizes in any subset. The sample is rendered
+    only for the columns that could still fit, and the sections once more
+    for the chosen columns.
+    """
+    budget = budget if budget is not None else Config.PROMPT_TOKEN_BUDGET
+    info = {
+        "columns": ", ".join(str(c) for c in columns),
+        "stats_summary": format_profile(profile),
+        "data_sample": "",
+        "correlations": format_correlations(correlations),
+        "anomalies": format_anomalies(anomalies),
+        "temporal": format_temporal(temporal),
+    }
+    # A wide sample is only worth rendering in full when the other sections leave room for it
+    if budget <= 0 or sum(estimate_tokens(text) for text in info.values()) < budget:
+        info["data_sample"] = sample.to_string(index=False)
+        if budget <= 0 or sum(estimate_tokens(text) for text in info.values()) <= budget:
+            return info
+    
+    mentioned = [c for pair in correlations for c in pair["columns"]]
+    if anomalies is not None:
+        flagged = anomalies[["z", "iqr", "mad"]].fillna(0).max(axis=1) > 0
+        mentioned += [str(c) for c in anomalies.index[flagged]]
+    if temporal is not None:
+        mentioned.append(temporal["axis"])
+    ranked = rank_columns(profile, mentioned)
+    available = budget - sum(estimate_tokens(info[key]) for key in ["correlations", "anomalies", "temporal"])
+    
+    stats_lines = info["stats_summary"].split("\n")
+    stats_size = dict(zip((str(c) for c in profile.index), (len(line) + 1 for line in stats_lines[1:])))
+    name_size = {str(c): len(str(c)) + 2 for c in columns}
+    # The summary of the left-out columns is never longer than the summary of all of them
+    summary_size = len(summarize_columns(profile)) + 1
+    sample_size: Dict[str, int] = {}
+    
+    def estimate(kept: int, rows: int) -> int:
+        keep = ranked[:kept]
+        stats = len(stats_lines[0]) + sum(stats_size[c] for c in keep)
+        names = sum(name_size.get(c, 0) for c in keep)
+        if kept < len(ranked):
+            stats += summary_size
+            names += len(f", ... and {len(ranked) - kept} more")
+        data = (min(rows, len(sample)) + 1) * (sum(sample_size.get(c, 0) for c in keep) + 1)
+        return sum(-(-size // Config.PROMPT_CHARS_PER_TOKEN) for size in (stats, names, data))
+    
+    def render(kept: int, rows: int) -> Dict[str, str]:
+        keep = set(ranked[:kept])
+        shown = [c for c in profile.index if c in keep]
+        stats = format_profile(profile.loc[shown])
+        names = info["columns"]
+        if kept < len(ranked):
+            stats += "\n" + summarize_columns(profile.loc[ranked[kept:]])
+            names = ", ".join(str(c) for c in columns if str(c) in keep) + f", ... and {len(ranked) - kept} more"
+        data = sample[[c for c in sample.columns if str(c) in keep]].head(rows)
+        return {"columns": names, "stats_summary": stats, "data_sample": data.to_string(index=False)}
+    
+    def fits(kept: int, rows: int) -> bool:
+        return estimate(kept, rows) <= available
+    
+    # Columns past the point where their stats lines and names alone overflow are never kept
+    limit = 1
+    while limit < len(ranked) and fits(limit + 1, 0):
+        limit += 1
+    if info["data_sample"]:
+        rendered, names = info["data_sample"], [str(c) for c in sample.columns]
+    else:
+        candidates = set(ranked[:limit])
+        subset = sample[[c for c in sample.columns if str(c) in candidates]]
+        rendered, names = subset.to_string(index=False), [str(c) for c in subset.columns]
+    sample_size.update(zip(names, column_widths(rendered, names)))
+    
+    # Fewer rows first, then fewer columns, then as many rows as fit again
+    rows = len(sample)
+    while rows > 1 and not fits(len(ranked), rows):
+        rows -= 1
+    low, high = 1, len(ranked)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if fits(middle, rows):
+            low = middle
+        else:
+            high = middle - 1
+    while rows < len(sample) and fits(low, rows + 1):
+        rows += 1
+    info.update(render(low, rows))
+    return info
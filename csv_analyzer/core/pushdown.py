@@ -0,0 +1,182 @@
+import re
+import numpy as np
+import pandas as pd
+from typing import Optional, List, Tuple, Any, Iterator
+
+try:
+    import pyarrow
+    import pyarrow.compute
+except ImportError:  # pyarrow is optional
+    pyarrow = None
+
+# One condition as (column, operator, value), in the format pyarrow.parquet takes as filters
+Condition = Tuple[str, str, Any]
+
+OPERATORS = ["==", "!=", "<", "<=", ">", ">=", "in", "not in"]
+
+_COLUMN = r'"(?P<quoted>[^"]+)"|`(?P<backquoted>[^`]+)`|(?P<bare>[\w.\-]+)'
+_OPERATOR = r"(?P<op>==|!=|<=|>=|<|>|=|\s(?:not\s+in|in)\s)"
+_VALUE = r"""(?P<list>[(\[][^)\]]*[)\]])|'(?P<single>[^']*)'|"(?P<double>[^"]*)"|(?P<word>[^\s,()\[\]]+)"""
+_CONDITION = re.compile(rf"\s*(?:{_COLUMN})\s*{_OPERATOR}\s*(?:{_VALUE})\s*", re.IGNORECASE)
+_AND = re.compile(r"and\b|&&?", re.IGNORECASE)
+_ITEM = re.compile(r"""\s*(?:'(?P<single>[^']*)'|"(?P<double>[^"]*)"|(?P<word>[^\s,]+))\s*(?:,|$)""")
+
+def parse_columns(text: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated column list, None or empty meaning all columns"""
+    if text is None:
+        return None
+    columns = [column.strip() for column in text.split(",") if column.strip()]
+    return columns or None
+
+def _literal(match: re.Match) -> Any:
+    """Turn a matched value into a number, or keep it as text when quoted or not numeric"""
+    if match.group("single") is not None or match.group("double") is not None:
+        return match.group("single") if match.group("single") is not None else match.group("double")
+    word = match.group("word")
+    for cast in (int, float):
+        try:
+            return cast(word)
+        except ValueError:
+            pass
+    return word
+
+def parse_filter(text: Optional[str]) -> List[Condition]:
+    """Parse a filter such as `region == 'north' and amount > 100` into conditions
+    
+    Conditions compare a column with a number or a quoted or bare word using
+    ==, !=, <, <=, >, >=, `in (a, b)` or `not in (a, b)`, and are joined
+    with `and`. Column names with spaces are quoted with " or `.
+    """
+    conditions: List[Condition] = []
+    if not text or not text.strip():
+        return conditions
+    position = 0
+    while True:
+        match = _CONDITION.match(text, position)
+        if match is None:
+            raise ValueError(f"Invalid filter at '{text[position:].strip()}'")
+        column = match.group("quoted") or match.group("backquoted") or match.group("bare")
+        op = " ".join(match.group("op").lower().split())
+        op = "==" if op == "=" else op
+        if op in ("in", "not in"):
+            if match.group("list") is None:
+                raise ValueError(f"'{op}' needs a list of values such as (a, b)")
+            value = [_literal(item) for item in _ITEM.finditer(match.group("list")[1:-1]) if item.group(0).strip()]
+        elif match.group("list") is not None:
+            raise ValueError(f"'{op}' compares with a single value, not a list")
+        else:
+            value = _literal(match)
+        conditions.append((column, op, value))
+        position = match.end()
+        if position >= len(text):
+            return conditions
+        joiner = _AND.match(text, position)
+        if joiner is None:
+            raise ValueError(f"Expected 'and' at '{text[position:].strip()}'")
+        position = joiner.end()
+
+def format_filter(conditions: List[Condition]) -> Optional[str]:
+    """Render conditions canonically, e.g. for cache keys"""
+    if not conditions:
+        return None
+    return " and ".join(f"{column} {op} {value!r}" for column, op, value in conditions)
+
+def needed_columns(columns: Optional[List[str]], conditions: List[Condition]) -> Optional[List[str]]:
+    """Columns to read: the projection plus the columns the filter tests"""
+    if columns is None:
+        return None
+    return columns + [column for column, _, _ in conditions if column not in columns]
+
+def _compare(values: pd.Series, op: str, value: Any) -> np.ndarray:
+    """Evaluate one condition on a column, missing values never match"""
+    if op in ("in", "not in"):
+        matched = values.isin(value)
+        if not any(isinstance(item, str) for item in value) and not pd.api.types.is_numeric_dtype(values):
+            matched |= pd.to_numeric(values, errors="coerce").isin(value)
+        matched = matched if op == "in" else ~matched
+    else:
+        if isinstance(value, str) == pd.api.types.is_numeric_dtype(values):
+            # Compare in the value's type, e.g. a number with a column that was read as text
+            values = values.astype(str).where(values.notna()) if isinstance(value, str) else pd.to_numeric(values, errors="coerce")
+        matched = {
+            "==": values.__eq__, "!=": values.__ne__, "<": values.__lt__,
+            "<=": values.__le__, ">": values.__gt__, ">=": values.__ge__,
+        }[op](value)
+    return (matched & values.notna()).to_numpy(dtype=bool)
+
+def apply_filter(frame: pd.DataFrame, conditions: List[Condition]) -> pd.DataFrame:
+    """Keep the rows of a chunk that meet every condition"""
+    if not conditions:
+        return frame
+    missing = [column for column, _, _ in conditions if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Filter columns not found: {', '.join(missing)}")
+    mask = np.ones(len(frame), dtype=bool)
+    for column, op, value in conditions:
+        mask &= _compare(frame[column], op, value)
+    return frame[mask] if not mask.all() else frame
+
+def select_rows(chunks: Iterator[pd.DataFrame], columns: Optional[List[str]] = None,
+                conditions: Optional[List[Condition]] = None) -> Iterator[pd.DataFrame]:
+    """Filter and project chunks as they are parsed, so only wanted rows are kept"""
+    for chunk in chunks:
+        chunk = apply_filter(chunk, conditions or [])
+        if columns is not None:
+            missing = [column for column in columns if column not in chunk.columns]
+            if missing:
+                raise ValueError(f"Columns not found: {', '.join(missing)}")
+            chunk = chunk[columns]
+        yield chunk
+
+def arrow_expression(conditions: List[Condition], schema=None):
+    """Build the pyarrow compute expression of conditions, for filtering record batches
+    
+    Missing values never match, as in `apply_filter`. Returns None when a
+    condition compares a column of `schema` with values of another kind,
+    which only `apply_filter` coerces.
+    """
+    expression = None
+    for column, op, value in conditions:
+        if schema is not None and column in schema.names:
+            kind = schema.field(column).type
+            numeric = pyarrow.types.is_integer(kind) or pyarrow.types.is_floating(kind) \
+                or pyarrow.types.is_decimal(kind) or pyarrow.types.is_boolean(kind)
+            text = any(isinstance(item, str) for item in value) if op in ("in", "not in") else isinstance(value, str)
+            if text == numeric:
+                return None
+        field = pyarrow.compute.field(column)
+        if op == "in":
+            term = field.isin(value)
+        elif op == "not in":
+            term = ~field.isin(value) & field.is_valid()
+        else:
+            term = {
+                "==": field.__eq__, "!=": field.__ne__, "<": field.__lt__,
+                "<=": field.__le__, ">": field.__gt__, ">=": field.__ge__,
+            }[op](value)
+        expression = term if expression is None else expression & term
+    return expression
+
+def row_group_may_match(statistics: dict, conditions: List[Condition]) -> bool:
+    """Whether a Parquet row group with these column min/max statistics can hold matching rows"""
+    for column, op, value in conditions:
+        if column not in statistics:
+            continue
+        low, high = statistics[column]
+        try:
+            possible = {
+                "==": lambda: low <= value <= high,
+                "!=": lambda: not (low == high == value),
+                "<": lambda: low < value,
+                "<=": lambda: low <= value,
+                ">": lambda: high > value,
+                ">=": lambda: high >= value,
+                "in": lambda: any(low <= item <= high for item in value),
+                "not in": lambda: True,
+            }[op]()
+        except TypeError:
+            # Statistics of another type than the value say nothing
+            possible = True
+        if not possible:
+            return False
+    return True
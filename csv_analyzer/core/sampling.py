@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+from typing import Optional, List, Dict, Any
+from csv_analyzer.core.config import Config
+
+# Helper columns kept next to the sampled rows
+_KEY = "__sample_key__"
+_POSITION = "__sample_position__"
+_STRATUM = "__sample_stratum__"
+
+class RowSampler:
+    """Seeded single-pass row sampler for chunked data
+    
+    Every row gets a random key and the rows with the smallest keys are kept
+    (bottom-k sampling), which gives a uniform sample of the whole stream
+    while holding at most `size` rows. In stratified mode the bottom-k rows
+    of every stratum are kept and the final sample is allocated across
+    strata in proportion to their size, with each stratum represented.
+    Method "head" keeps the first rows, as get_dataset_info used to.
+    """
+    
+    def __init__(self, size: Optional[int] = None, seed: Optional[int] = None,
+                 method: Optional[str] = None, stratify_by: Optional[str] = None):
+        self.size = size if size is not None else Config.SAMPLE_SIZE
+        self.seed = seed if seed is not None else Config.SAMPLE_SEED
+        self.method = method or Config.SAMPLE_METHOD
+        self.stratify_by = stratify_by if stratify_by is not None else Config.SAMPLE_STRATIFY_COLUMN
+        self.rows_seen = 0
+        self._rng = np.random.default_rng(self.seed)
+        self._rows: Optional[pd.DataFrame] = None
+        self._strata_counts: Dict[str, int] = {}
+    
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Offer the rows of a chunk to the sample"""
+        n = len(chunk)
+        if n == 0:
+            return
+        start = self.rows_seen
+        self.rows_seen += n
+        
+        if self.method == "head":
+            kept = 0 if self._rows is None else len(self._rows)
+            if kept < self.size:
+                rows = chunk.iloc[:self.size - kept]
+                self._append(rows, np.zeros(len(rows)), start + np.arange(len(rows)))
+            return
+        
+        if self.method == "stratified" and self.stratify_by is None:
+            self.stratify_by = self._pick_stratify_column(chunk)
+        if self.method == "stratified" and self.stratify_by not in chunk.columns:
+            self.method = "reservoir"
+        
+        keys = self._rng.random(n)
+        if self.method == "stratified":
+            strata = chunk[self.stratify_by].astype(str).to_numpy()
+            for stratum, count in pd.Series(strata).value_counts().items():
+                self._strata_counts[stratum] = self._strata_counts.get(stratum, 0) + int(count)
+            # Bottom-k rows of every stratum within this chunk
+            order = pd.DataFrame({"key": keys, "stratum": strata}).sort_values("key")
+            selected = order.groupby("stratum", sort=False).head(self.size).index.to_numpy()
+        else:
+            if self._rows is not None and len(self._rows) >= self.size:
+                candidates = np.flatnonzero(keys < self._rows[_KEY].max())
+            else:
+                candidates = np.arange(n)
+            if len(candidates) > self.size:
+                # Keys are distinct, so a partial sort selects the same rows
+                candidates = candidates[np.argpartition(keys[candidates], self.size - 1)[:self.size]]
+            selected = candidates
+        
+        selected = np.sort(selected)
+        rows = chunk.iloc[selected]
+        if self.method == "stratified":
+            rows = rows.assign(**{_STRATUM: strata[selected]})
+        self._append(rows, keys[selected], start + selected)
+        self._compact()
+    
+    def merge(self, other: "RowSampler") -> "RowSampler":
+        """Combine a sampler fed with the rows that follow ours
+        
+        Samplers with the same seed draw the same keys, so partitions should
+        be sampled with different seeds.
+        """
+        if other._rows is not None:
+            rows = other._rows.assign(**{_POSITION: other._rows[_POSITION] + self.rows_seen})
+            self._rows = rows if self._rows is None else pd.concat([self._rows, rows], ignore_index=True)
+        for stratum, count in other._strata_counts.items():
+            self._strata_counts[stratum] = self._strata_counts.get(stratum, 0) + count
+        self.rows_seen += other.rows_seen
+        if self._rows is not None:
+            if self.method == "head":
+                self._rows = self._rows.head(self.size)
+            else:
+                self._compact()
+        return self
+    
+    def state(self) -> Dict[str, Any]:
+        """The kept rows and the sampling state, for core.state.pack_state"""
+        return {
+            "size": self.size, "seed": self.seed, "method": self.method, "stratify_by": self.stratify_by,
+            "rows_seen": self.rows_seen, "rng": self._rng, "rows": self._rows, "strata_counts": self._strata_counts,
+        }
+    
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "RowSampler":
+        sampler = cls(int(state["size"]), int(state["seed"]), state["method"], state["stratify_by"])
+        sampler.rows_seen, sampler._rng, sampler._rows = int(state["rows_seen"]), state["rng"], state["rows"]
+        sampler._strata_counts = {stratum: int(count) for stratum, count in state["strata_counts"].items()}
+        return sampler
+    
+    def _append(self, rows: pd.DataFrame, keys: np.ndarray, positions: np.ndarray) -> None:
+        rows = rows.assign(**{_KEY: keys, _POSITION: positions})
+        self._rows = rows if self._rows is None else pd.concat([self._rows, rows], ignore_index=True)
+    
+    def _compact(self) -> None:
+        """Drop rows that can no longer make it into the sample"""
+        if self.method == "stratified" and len(self._strata_counts) > Config.SAMPLE_MAX_STRATA:
+            # Too many strata to keep a reservoir for each, fall back to a uniform
+            # sample; the global bottom-k rows are among the per-stratum ones
+            self.method = "reservoir"
+            self._rows = self._rows.drop(columns=[_STRATUM])
+        
+        if self.method == "stratified":
+            self._rows = self._rows.sort_values(_KEY).groupby(_STRATUM, sort=False).head(self.size)
+        else:
+            self._rows = self._rows.nsmallest(self.size, _KEY)
+    
+    @staticmethod
+    def _pick_stratify_column(chunk: pd.DataFrame) -> Optional[str]:
+        """Pick the text column with the fewest distinct values as the stratum"""
+        best, best_unique = None, None
+        for column in chunk.columns:
+            if pd.api.types.is_numeric_dtype(chunk[column]):
+                continue
+            unique = chunk[column].nunique()
+            if 1 < unique <= Config.SAMPLE_MAX_STRATA and (best_unique is None or unique < best_unique):
+                best, best_unique = column, unique
+        return best
+    
+    def _allocate(self) -> Dict[str, int]:
+        """Split the sample size across strata in proportion to size, at least one row each"""
+        counts = pd.Series(self._strata_counts).sort_values(ascending=False, kind="stable")
+        if len(counts) >= self.size:
+            return {stratum: 1 for stratum in counts.index[:self.size]}
+        
+        # Largest remainder method, with every stratum guaranteed one row
+        shares = self.size * counts / counts.sum()
+        quota = np.floor(shares).astype(int).clip(lower=1)
+        leftover = self.size - int(quota.sum())
+        if leftover > 0:
+            for stratum in (shares - np.floor(shares)).sort_values(ascending=False, kind="stable").index[:leftover]:
+                quota[stratum] += 1
+        while leftover < 0:
+            # Rows given to small strata are taken from the largest ones
+            quota[quota.idxmax()] -= 1
+            leftover += 1
+        return quota.to_dict()
+    
+    def positions(self) -> List[int]:
+        """Return the row positions in the stream that make up the sample"""
+        return self._select()[_POSITION].astype(int).tolist()
+    
+    def _select(self) -> pd.DataFrame:
+        if self._rows is None:
+            return pd.DataFrame(columns=[_KEY, _POSITION])
+        rows = self._rows
+        if self.method == "stratified":
+            quota = self._allocate()
+            rows = rows.sort_values(_KEY)
+            rank = rows.groupby(_STRATUM, sort=False).cumcount()
+            rows = rows[rank < rows[_STRATUM].map(quota).fillna(0)]
+        return rows.sort_values(_POSITION)
+    
+    def result(self) -> pd.DataFrame:
+        """Return the sampled rows in their original order"""
+        rows = self._select()
+        return rows.drop(columns=[c for c in (_KEY, _POSITION, _STRATUM) if c in rows.columns]).reset_index(drop=True)
+
+def sample_dataframe(df: pd.DataFrame, size: Optional[int] = None, seed: Optional[int] = None,
+                     method: Optional[str] = None, stratify_by: Optional[str] = None) -> pd.DataFrame:
+    """Draw a seeded sample from an in-memory DataFrame"""
+    sampler = RowSampler(size, seed, method, stratify_by)
+    sampler.update(df)
+    return sampler.result()
@@ -0,0 +1,327 @@
+import math
+import numpy as np
+import pandas as pd
+from typing import Optional, Dict, Any
+from csv_analyzer.core.config import Config
+
+def hash_values(values) -> np.ndarray:
+    """Hash values to uint64 with a fixed key, so equal values hash alike across chunks"""
+    values = np.asarray(values)
+    if values.dtype == object:
+        # categorize=True factorizes first, which is slow for high-cardinality text
+        return pd.util.hash_array(values, categorize=False)
+    return pd.util.hash_array(values)
+
+class HyperLogLog:
+    """Distinct count estimate in a fixed 2^p bytes of memory
+    
+    `error` is the target relative standard error, 1.04 / sqrt(2^p).
+    Registers merge by elementwise max, so per-chunk sketches combine
+    into the sketch of the whole file.
+    """
+    
+    # Ranks are read from the low 64 - p hash bits as a float64, which is
+    # exact only while they fit in its 53-bit mantissa
+    MIN_PRECISION = 11
+    MAX_PRECISION = 18
+    
+    def __init__(self, error: Optional[float] = None):
+        error = error if error is not None else Config.CARDINALITY_ERROR
+        precision = math.ceil(math.log2((1.04 / error) ** 2))
+        self.precision = min(max(precision, self.MIN_PRECISION), self.MAX_PRECISION)
+        self.registers = np.zeros(1 << self.precision, dtype=np.uint8)
+    
+    def update_hashes(self, hashes: np.ndarray) -> None:
+        """Add 64-bit hashes of values to the sketch"""
+        if len(hashes) == 0:
+            return
+        width = 64 - self.precision
+        index = (hashes >> np.uint64(width)).astype(np.intp)
+        rest = hashes & np.uint64((1 << width) - 1)
+        # Position of the first set bit in the remaining bits, counted from the top
+        exponent = np.frexp(rest.astype(np.float64))[1]
+        rank = np.where(rest == 0, width + 1, width - exponent + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+    
+    def update(self, values) -> None:
+        """Add values to the sketch"""
+        self.update_hashes(hash_values(values))
+    
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Combine another sketch with the same precision into this one"""
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+    
+    def count(self) -> int:
+        """Estimate the number of distinct values added"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate while many registers are empty
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def state(self) -> Dict[str, Any]:
+        """Mergeable state, for core.state.pack_state"""
+        return {"precision": self.precision, "registers": self.registers}
+    
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "HyperLogLog":
+        sketch = cls.__new__(cls)
+        sketch.precision, sketch.registers = int(state["precision"]), state["registers"].astype(np.uint8)
+        return sketch
+
+class MisraGries:
+    """Heavy hitters with at most ceil(1 / error) counters
+    
+    Counts are lower bounds that undercount by at most `error` times the
+    number of values added. While fewer distinct values than counters
+    have been seen the counts, and their number, are exact.
+    """
+    
+    def __init__(self, error: Optional[float] = None):
+        error = error if error is not None else Config.TOP_VALUES_ERROR
+        self.capacity = math.ceil(1 / error)
+        self.counters = pd.Series(dtype="int64")
+        self.total = 0
+        self.exact = True
+    
+    def update_counts(self, counts: pd.Series) -> None:
+        """Add the value counts of a chunk"""
+        self.total += int(counts.sum())
+        self._combine(counts)
+    
+    def update(self, values: pd.Series) -> None:
+        """Add values to the sketch"""
+        self.update_counts(values.value_counts(sort=False))
+    
+    def merge(self, other: "MisraGries") -> "MisraGries":
+        """Combine another sketch into this one, keeping the error bound"""
+        self.total += other.total
+        self.exact = self.exact and other.exact
+        self._combine(other.counters)
+        return self
+    
+    def _combine(self, counts: pd.Series) -> None:
+        if len(counts) == 0:
+            return
+        counters = counts if len(self.counters) == 0 else self.counters.add(counts, fill_value=0)
+        counters = counters[counters > 0].astype("int64")
+        if len(counters) > self.capacity:
+            # Subtract the (capacity + 1)-th largest count from every counter
+            # (Agarwal et al., mergeable summaries) and drop the ones left empty
+            threshold = np.partition(counters.to_numpy(), -(self.capacity + 1))[-(self.capacity + 1)]
+            counters = counters - threshold
+            counters = counters[counters > 0]
+            self.exact = False
+        self.counters = counters
+    
+    def error_bound(self) -> int:
+        """Largest possible undercount of any reported count"""
+        return 0 if self.exact else self.total // (self.capacity + 1)
+    
+    def top(self, n: int) -> pd.Series:
+        """Return the n largest counters, ties broken by value"""
+        if len(self.counters) == 0 or n <= 0:
+            return self.counters.iloc[:0]
+        order = np.lexsort((self.counters.index.astype(str), -self.counters.to_numpy()))[:n]
+        return self.counters.iloc[order]
+    
+    def state(self) -> Dict[str, Any]:
+        """Mergeable state, for core.state.pack_state"""
+        return {"capacity": self.capacity, "counters": self.counters, "total": self.total, "exact": self.exact}
+    
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "MisraGries":
+        sketch = cls.__new__(cls)
+        sketch.capacity, sketch.counters = int(state["capacity"]), state["counters"].astype("int64")
+        sketch.total, sketch.exact = int(state["total"]), bool(state["exact"])
+        return sketch
+
+def weighted_quantiles(values: np.ndarray, weights: np.ndarray, qs) -> np.ndarray:
+    """Values at quantiles `qs` of sorted `values` with the given weights"""
+    cumulative = np.cumsum(weights)
+    # Smallest value whose cumulative weight reaches q of the total
+    positions = np.searchsorted(cumulative, np.asarray(qs, dtype=np.float64) * cumulative[-1], side="left")
+    return values[np.minimum(positions, len(values) - 1)]
+
+class KLLSketch:
+    """Mergeable quantile sketch (Karnin, Lang and Liberty) for numeric values
+    
+    Values are kept in levels of compactors; level h holds values of weight
+    2^h. When a level outgrows its capacity it is sorted and every other
+    value, from a random offset, is promoted to the next level. Lower
+    levels get geometrically smaller capacities, so memory is O(k) and the
+    rank error about 1.65 / k for k = 200. While fewer than k values have
+    been added the quantiles are exact.
+    """
+    
+    def __init__(self, k: Optional[int] = None, seed: int = 0):
+        self.k = k if k is not None else Config.QUANTILE_SKETCH_K
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+    
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+    
+    def update(self, values: np.ndarray) -> None:
+        """Add an array of values, ignoring NaN"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+    
+    def update_thinned(self, values: np.ndarray, kept: Optional[int] = None) -> None:
+        """Add a large array of values without NaN, sorting only about `kept` of them
+        
+        One random value of every 2^h consecutive values is added at level
+        h, the deepest level that still keeps `kept` values (8 k by default),
+        which adds a rank error of about 0.5 / sqrt(kept) but costs time
+        linear in the number of values instead of a sort of all of them.
+        """
+        kept = kept if kept is not None else 8 * self.k
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) < 2 * kept:
+            self.update(values)
+            return
+        level = int(np.log2(len(values) / kept))
+        while len(self.levels) <= level:
+            self.levels.append(np.empty(0, dtype=np.float64))
+        self.count += len(values)
+        # The values left over by the blocks of 2^level go in smaller blocks, so no weight is lost
+        start = 0
+        for h in range(level, -1, -1):
+            size = 1 << h
+            blocks = (len(values) - start) // size
+            if blocks == 0:
+                continue
+            picks = start + np.arange(blocks) * size + self._rng.integers(size, size=blocks)
+            self.levels[h] = np.concatenate([self.levels[h], values[picks]])
+            start += blocks * size
+        self._compress()
+    
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """Combine another sketch into this one"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, values in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], values])
+        self.count += other.count
+        self._compress()
+        return self
+    
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            values = self.levels[level]
+            if len(values) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                values = np.sort(values)
+                # An odd value out stays behind so the total weight is preserved
+                if len(values) % 2:
+                    values, kept = values[:-1], values[-1:]
+                else:
+                    kept = values[:0]
+                promoted = values[self._rng.integers(2)::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.levels[level] = kept
+                # A new top level shrinks the capacity of the levels below it
+                level = 0
+                continue
+            level += 1
+    
+    def items(self) -> tuple:
+        """Return the kept values in order and the weight of each"""
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(v), 2.0 ** level) for level, v in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        return values[order], weights[order]
+    
+    def quantiles(self, qs) -> np.ndarray:
+        """Estimate the values at quantiles `qs` (between 0 and 1)"""
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        if self.count == 0:
+            return np.full(len(qs), np.nan)
+        return weighted_quantiles(*self.items(), qs)
+    
+    def rank(self, value: float, side: str = "left") -> float:
+        """Estimate the share of values below `value`, or not above it with side='right'"""
+        if self.count == 0:
+            return np.nan
+        values, weights = self.items()
+        return float(weights[:np.searchsorted(values, value, side=side)].sum() / weights.sum())
+
+    def state(self) -> Dict[str, Any]:
+        """Mergeable state, for core.state.pack_state"""
+        return {"k": self.k, "levels": self.levels, "count": self.count, "rng": self._rng}
+    
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "KLLSketch":
+        sketch = cls(int(state["k"]))
+        sketch.levels = [np.asarray(level, dtype=np.float64) for level in state["levels"]]
+        sketch.count, sketch._rng = int(state["count"]), state["rng"]
+        return sketch
+
+def hash_rows(frame: pd.DataFrame) -> np.ndarray:
+    """Hash whole rows to uint64, numbers by value so chunks typed int or float hash alike"""
+    columns = {
+        name: column.astype("float64")
+        if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column) else column
+        for name, column in frame.items()
+    }
+    return pd.util.hash_pandas_object(pd.DataFrame(columns, index=frame.index), index=False).to_numpy()
+
+class MinHash:
+    """Bottom-k MinHash of a set of 64-bit hashes, such as the rows of a file
+    
+    Keeps the k smallest distinct hashes, so sketches merge by union. The
+    Jaccard similarity of two sets is estimated from the k smallest hashes
+    of their union, with a standard error of about sqrt(J (1 - J) / k).
+    """
+    
+    def __init__(self, k: Optional[int] = None):
+        self.k = k if k is not None else Config.SIMILARITY_MINHASH_K
+        self.hashes = np.empty(0, dtype=np.uint64)
+    
+    def update_hashes(self, hashes: np.ndarray) -> None:
+        """Add 64-bit hashes to the sketch"""
+        if len(self.hashes) >= self.k:
+            hashes = hashes[hashes < self.hashes[-1]]
+        if len(hashes):
+            self.hashes = np.union1d(self.hashes, hashes)[:self.k]
+    
+    def update(self, frame: pd.DataFrame) -> None:
+        """Add the rows of a chunk to the sketch"""
+        if len(frame):
+            self.update_hashes(hash_rows(frame))
+    
+    def merge(self, other: "MinHash") -> "MinHash":
+        """Combine another sketch with the same k into this one"""
+        self.update_hashes(other.hashes)
+        return self
+    
+    def jaccard(self, other: "MinHash") -> float:
+        """Estimate the Jaccard similarity of the two sets"""
+        union = np.union1d(self.hashes, other.hashes)[:min(self.k, other.k)]
+        if len(union) == 0:
+            return 1.0
+        both = np.isin(union, self.hashes) & np.isin(union, other.hashes)
+        return float(both.mean())
+
+    def state(self) -> Dict[str, Any]:
+        """Mergeable state, for core.state.pack_state"""
+        return {"k": self.k, "hashes": self.hashes}
+    
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "MinHash":
+        sketch = cls(int(state["k"]))
+        sketch.hashes = state["hashes"].astype(np.uint64)
+        return sketch
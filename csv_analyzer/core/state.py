@@ -0,0 +1,125 @@
+import io
+import json
+import zipfile
+import numpy as np
+import pandas as pd
+from typing import Any, Dict
+
+# Bump when the state of a sketch or profile changes shape; older states are rejected
+STATE_VERSION = 1
+
+# Array dtypes numpy stores without pickling: bools, numbers, datetimes, timedeltas and fixed-width text
+_PLAIN_KINDS = "biufcmMU"
+
+def pack_state(kind: str, state: Dict[str, Any]) -> bytes:
+    """Serialize the state of a sketch or profile without pickle
+    
+    `state` holds plain values, numpy arrays, Series, DataFrames,
+    Timestamps and random generators. Arrays are stored as members of an
+    npz archive and everything else as a JSON document next to them,
+    tagged with `kind` and STATE_VERSION.
+    """
+    arrays: Dict[str, np.ndarray] = {}
+    document = {"kind": kind, "version": STATE_VERSION, "state": _encode(state, arrays)}
+    arrays["__state__"] = np.frombuffer(json.dumps(document).encode(), dtype=np.uint8)
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+def unpack_state(kind: str, data: bytes) -> Dict[str, Any]:
+    """Restore a state serialized with pack_state(), raising ValueError for other kinds or versions"""
+    try:
+        with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+            arrays = {name: archive[name] for name in archive.files}
+        document = json.loads(arrays.pop("__state__").tobytes())
+    except (ValueError, OSError, KeyError, AttributeError, zipfile.BadZipFile) as e:
+        raise ValueError(f"Stored state is not a {kind}") from e
+    if document.get("kind") != kind:
+        raise ValueError(f"Stored state is not a {kind}")
+    if document.get("version") != STATE_VERSION:
+        raise ValueError(f"Stored {kind} has state version {document.get('version')}, expected {STATE_VERSION}")
+    return _decode(document["state"], arrays)
+
+def _encode(value: Any, arrays: Dict[str, np.ndarray]) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.datetime64):
+        return _encode(pd.Timestamp(value), arrays)
+    if isinstance(value, np.generic):
+        return _encode(value.item(), arrays)
+    if isinstance(value, dict):
+        return {str(key): _encode(item, arrays) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [_encode(item, arrays) for item in value]
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind in _PLAIN_KINDS:
+            name = f"a{len(arrays)}"
+            arrays[name] = value
+            return {"__array__": name}
+        return {"__objects__": [_encode(item, arrays) for item in value.tolist()]}
+    if isinstance(value, pd.DataFrame):
+        return {"__frame__": {
+            "columns": _encode(value.columns, arrays),
+            "index": _encode(value.index, arrays),
+            "data": [_encode(value.iloc[:, i].to_numpy(), arrays) for i in range(value.shape[1])],
+            "dtypes": [str(dtype) for dtype in value.dtypes],
+        }}
+    if isinstance(value, pd.Series):
+        return {"__series__": {
+            "values": _encode(value.to_numpy(), arrays), "index": _encode(value.index, arrays),
+            "dtype": str(value.dtype), "name": _encode(value.name, arrays),
+        }}
+    if isinstance(value, pd.Index):
+        return {"__index__": {"values": _encode(value.to_numpy(), arrays), "dtype": str(value.dtype)}}
+    if value is pd.NaT:
+        return {"__timestamp__": None}
+    if isinstance(value, pd.Timestamp):
+        return {"__timestamp__": value.isoformat()}
+    if value is pd.NA:
+        return None
+    if isinstance(value, np.random.Generator):
+        return {"__rng__": value.bit_generator.state}
+    # Other objects, e.g. Decimal values of a sampled row, are kept as their text
+    return str(value)
+
+def _decode(value: Any, arrays: Dict[str, np.ndarray]) -> Any:
+    if isinstance(value, list):
+        return [_decode(item, arrays) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if "__array__" in value:
+        return arrays[value["__array__"]]
+    if "__objects__" in value:
+        objects = np.empty(len(value["__objects__"]), dtype=object)
+        objects[:] = [_decode(item, arrays) for item in value["__objects__"]]
+        return objects
+    if "__frame__" in value:
+        frame = value["__frame__"]
+        index = _decode(frame["index"], arrays)
+        columns = [_as_dtype(pd.Series(_decode(data, arrays)), dtype) for data, dtype in zip(frame["data"], frame["dtypes"])]
+        result = pd.concat(columns, axis=1) if columns else pd.DataFrame(index=range(len(index)))
+        result.index, result.columns = index, _decode(frame["columns"], arrays)
+        return result
+    if "__series__" in value:
+        series = value["__series__"]
+        return _as_dtype(pd.Series(_decode(series["values"], arrays), index=_decode(series["index"], arrays),
+                                   name=_decode(series["name"], arrays)), series["dtype"])
+    if "__index__" in value:
+        index = value["__index__"]
+        return pd.Index(_as_dtype(pd.Series(_decode(index["values"], arrays)), index["dtype"]))
+    if "__timestamp__" in value:
+        return pd.NaT if value["__timestamp__"] is None else pd.Timestamp(value["__timestamp__"])
+    if "__rng__" in value:
+        rng = np.random.default_rng()
+        rng.bit_generator.state = value["__rng__"]
+        return rng
+    return {key: _decode(item, arrays) for key, item in value.items()}
+
+def _as_dtype(series: pd.Series, dtype: str) -> pd.Series:
+    """Give restored values their dtype back, keeping them as they are when it cannot be rebuilt"""
+    if str(series.dtype) == dtype:
+        return series
+    try:
+        return series.astype(dtype)
+    except (TypeError, ValueError):
+        return series
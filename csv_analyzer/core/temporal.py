@@ -0,0 +1,328 @@
+import warnings
+import numpy as np
+import pandas as pd
+from typing import Optional, List, Dict, Any, Tuple
+from pandas.tseries.api import guess_datetime_format
+from csv_analyzer.core.config import Config
+
+# Coarsest first, the rollup uses the finest rule that fits in TEMPORAL_MAX_PERIODS
+ROLLUP_RULES = [("yearly", "YS", 366), ("quarterly", "QS", 92), ("monthly", "MS", 31), ("weekly", "W-MON", 7), ("daily", "D", 1)]
+
+# Trends are also given relative to the mean only when |mean| is at least this many standard deviations
+RELATIVE_TREND_MIN_MEAN = 0.5
+
+def looks_like_datetime(values: pd.Series, min_ratio: float = 0.95) -> bool:
+    """Check whether text values parse as dates, ignoring plain numbers"""
+    values = values.dropna().astype(str)
+    if values.empty or values.str.fullmatch(r"[+-]?\d+(\.\d+)?").any():
+        return False
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        parsed = pd.to_datetime(values, errors="coerce", format="mixed")
+    return parsed.notna().mean() >= min_ratio
+
+def infer_datetime_format(values: pd.Series) -> str:
+    """Pick a single format for parsing a column, falling back to per-value parsing"""
+    values = values.dropna().astype(str)
+    for candidate in ["ISO8601", guess_datetime_format(values.iloc[0]) if len(values) else None]:
+        if candidate is None:
+            continue
+        try:
+            pd.to_datetime(values, format=candidate, utc=True)
+            return candidate
+        except (ValueError, TypeError):
+            continue
+    return "mixed"
+
+def parse_datetimes(series: pd.Series, datetime_format: Optional[str]) -> pd.Series:
+    """Parse a column to naive UTC timestamps, unparseable values become NaT"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        parsed = series
+    else:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            parsed = pd.to_datetime(series, errors="coerce", format=datetime_format, utc=True)
+    if getattr(parsed.dt, "tz", None) is not None:
+        parsed = parsed.dt.tz_convert("UTC").dt.tz_localize(None)
+    return parsed
+
+def _is_row_id(series: pd.Series) -> bool:
+    """Integer columns that count up row by row, such as ids"""
+    return pd.api.types.is_integer_dtype(series) and series.is_unique and series.is_monotonic_increasing
+
+def _group_days(days: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """The distinct days of an array and the position of each value among them, like np.unique"""
+    numbers = days.view("int64")
+    if len(numbers) == 0:
+        return days[:0], np.zeros(0, dtype=np.intp)
+    low = numbers.min()
+    span = int(numbers.max() - low) + 1
+    if span > 4 * len(numbers) + 1024:
+        # Sparse days over a long range would make the counting table larger than the data
+        return np.unique(days, return_inverse=True)
+    offsets = numbers - low
+    present = np.bincount(offsets, minlength=span) > 0
+    # Counting needs no sort: day offsets index a table of the days present
+    positions = np.cumsum(present) - 1
+    return (np.flatnonzero(present) + low).astype("datetime64[D]"), positions[offsets]
+
+class TemporalRollup:
+    """Daily rollups of numeric columns over the datetime columns of a file
+    
+    Datetime columns are detected once, on the first `detect_rows` rows:
+    columns with a datetime dtype and text columns whose values parse as
+    dates. The first one becomes the time axis. Every chunk is then reduced
+    to rows and per-column sums and counts per day with np.bincount, which
+    merge by addition, so the state grows with the number of days covered
+    rather than the rows. Weekly or coarser aggregates, trend slopes and
+    gaps are derived from the daily rollup at the end.
+    """
+    
+    def __init__(self, detect_rows: Optional[int] = None, max_metrics: Optional[int] = None):
+        self.detect_rows = detect_rows if detect_rows is not None else Config.TEMPORAL_DETECT_ROWS
+        self.max_metrics = max_metrics if max_metrics is not None else Config.TEMPORAL_MAX_METRICS
+        # Datetime column -> parsing format, None until detection has run
+        self.time_columns: Optional[Dict[str, Optional[str]]] = None
+        self.metrics: List[str] = []
+        self._pending: List[pd.DataFrame] = []
+        self._numeric: List[str] = []
+        self._daily: Optional[pd.DataFrame] = None
+        self._bounds: Dict[str, tuple] = {}
+        self._unparsed: Dict[str, int] = {}
+    
+    def update(self, chunk: pd.DataFrame, numeric: List[str]) -> None:
+        """Fold a chunk into the rollup; `numeric` names its numeric columns"""
+        if self.time_columns is not None:
+            self._rollup(chunk)
+            return
+        # Rows are held back until there are enough to detect the datetime columns
+        self._pending.append(chunk)
+        self._numeric = numeric
+        if sum(len(pending) for pending in self._pending) >= self.detect_rows:
+            self._detect()
+    
+    def _detect(self) -> None:
+        pending, self._pending = self._pending, []
+        head = pd.concat(pending, ignore_index=True).head(self.detect_rows) if pending else pd.DataFrame()
+        self.time_columns = {}
+        for column in head.columns:
+            series = head[column]
+            if pd.api.types.is_datetime64_any_dtype(series):
+                self.time_columns[str(column)] = None
+            elif (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)) \
+                    and looks_like_datetime(series.head(20)) and looks_like_datetime(series):
+                # A few values rule out most text columns before the whole sample is parsed
+                self.time_columns[str(column)] = infer_datetime_format(series)
+        # Row identifiers trend with time by construction
+        self.metrics = [
+            str(c) for c in self._numeric
+            if str(c) not in self.time_columns and not (c in head.columns and _is_row_id(head[c]))
+        ][:self.max_metrics]
+        for chunk in pending:
+            self._rollup(chunk)
+    
+    def _rollup(self, chunk: pd.DataFrame) -> None:
+        if not self.time_columns:
+            return
+        axis = None
+        for column, datetime_format in self.time_columns.items():
+            if column not in chunk.columns:
+                continue
+            parsed = parse_datetimes(chunk[column], datetime_format)
+            self._unparsed[column] = self._unparsed.get(column, 0) + int(chunk[column].notna().sum() - parsed.notna().sum())
+            if parsed.notna().any():
+                low, high = parsed.min(), parsed.max()
+                if column in self._bounds:
+                    low, high = min(low, self._bounds[column][0]), max(high, self._bounds[column][1])
+                self._bounds[column] = (low, high)
+            if axis is None and column == next(iter(self.time_columns)):
+                axis = parsed
+        if axis is None:
+            return
+        
+        valid = axis.notna().to_numpy()
+        days = axis.to_numpy()[valid].astype("datetime64[D]")
+        unique_days, inverse = _group_days(days)
+        daily = {"rows": np.bincount(inverse, minlength=len(unique_days)).astype("float64")}
+        for metric in self.metrics:
+            if metric not in chunk.columns:
+                continue
+            values = pd.to_numeric(chunk[metric], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)[valid]
+            present = ~np.isnan(values)
+            if present.all():
+                # Complete columns count a value on every row of the day
+                daily[f"{metric}:sum"] = np.bincount(inverse, weights=values, minlength=len(unique_days))
+                daily[f"{metric}:count"] = daily["rows"]
+                continue
+            daily[f"{metric}:sum"] = np.bincount(inverse, weights=np.where(present, values, 0.0), minlength=len(unique_days))
+            daily[f"{metric}:count"] = np.bincount(inverse, weights=present, minlength=len(unique_days))
+        self._add_daily(pd.DataFrame(daily, index=pd.DatetimeIndex(unique_days)))
+    
+    def _add_daily(self, daily: pd.DataFrame) -> None:
+        self._daily = daily if self._daily is None else self._daily.add(daily, fill_value=0.0)
+    
+    def merge(self, other: "TemporalRollup") -> "TemporalRollup":
+        """Combine a rollup of other rows, e.g. of a later part of the same file"""
+        for rollup in (self, other):
+            if rollup.time_columns is None:
+                # Parts shorter than the detection sample
+                rollup._detect()
+        if not self.time_columns and other.time_columns:
+            self.time_columns, self.metrics = dict(other.time_columns), list(other.metrics)
+        # Days are only comparable along the same time axis
+        same_axis = next(iter(self.time_columns), None) == next(iter(other.time_columns), None)
+        if other._daily is not None and same_axis:
+            self._add_daily(other._daily)
+        for column, (low, high) in other._bounds.items():
+            if column in self._bounds:
+                low, high = min(low, self._bounds[column][0]), max(high, self._bounds[column][1])
+            self._bounds[column] = (low, high)
+        for column, count in other._unparsed.items():
+            self._unparsed[column] = self._unparsed.get(column, 0) + count
+        return self
+    
+    def state(self) -> Dict[str, Any]:
+        """Detected columns and daily sums, for core.state.pack_state
+        
+        Rows held back for detection are part of it, at most `detect_rows`.
+        """
+        return {
+            "detect_rows": self.detect_rows, "max_metrics": self.max_metrics, "time_columns": self.time_columns,
+            "metrics": self.metrics, "pending": self._pending, "numeric": self._numeric, "daily": self._daily,
+            "bounds": self._bounds, "unparsed": self._unparsed,
+        }
+    
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "TemporalRollup":
+        rollup = cls(int(state["detect_rows"]), int(state["max_metrics"]))
+        rollup.time_columns, rollup.metrics = state["time_columns"], list(state["metrics"])
+        rollup._pending, rollup._numeric, rollup._daily = list(state["pending"]), list(state["numeric"]), state["daily"]
+        rollup._bounds = {column: tuple(bounds) for column, bounds in state["bounds"].items()}
+        rollup._unparsed = {column: int(count) for column, count in state["unparsed"].items()}
+        return rollup
+    
+    def drop(self, columns) -> None:
+        """Stop rolling up columns, e.g. ones that turned out not to be numeric"""
+        dropped = [metric for metric in self.metrics if metric in set(columns)]
+        if not dropped:
+            return
+        self.metrics = [metric for metric in self.metrics if metric not in dropped]
+        if self._daily is not None:
+            self._daily = self._daily.drop(columns=[f"{m}:{field}" for m in dropped for field in ("sum", "count")], errors="ignore")
+    
+    def result(self, max_periods: Optional[int] = None,
+               profile: Optional[pd.DataFrame] = None) -> Optional[Dict[str, Any]]:
+        """Summarize the rollup, or return None when no datetime column was found
+        
+        The column standard deviations of `profile`, when given, decide whether
+        a trend is also stated relative to the mean.
+        """
+        max_periods = max_periods if max_periods is not None else Config.TEMPORAL_MAX_PERIODS
+        if self.time_columns is None:
+            # Files shorter than the detection sample
+            self._detect()
+        if not self.time_columns:
+            return None
+        axis = next(iter(self.time_columns))
+        summary: Dict[str, Any] = {
+            "axis": axis,
+            "bounds": dict(self._bounds),
+            "unparsed": {column: count for column, count in self._unparsed.items() if count},
+        }
+        if self._daily is None or self._daily.empty:
+            return summary
+        daily = self._daily.sort_index()
+        metrics = [m for m in self.metrics if f"{m}:sum" in daily.columns]
+        
+        # Cadence is the typical spacing of days with rows, gaps are much longer spacings
+        days = daily.index.to_numpy().astype("datetime64[D]").astype("int64")
+        spacing = np.diff(days)
+        cadence = float(np.median(spacing)) if len(spacing) else 1.0
+        gap_at = np.flatnonzero(spacing > 1.5 * cadence)
+        summary.update({
+            "rows": int(daily["rows"].sum()),
+            "days": len(daily),
+            "span_days": int(days[-1] - days[0]) + 1,
+            "cadence_days": cadence,
+            "gaps": len(gap_at),
+            "missing_days": int((spacing[gap_at] - 1).sum()),
+        })
+        if len(gap_at):
+            longest = gap_at[np.argmax(spacing[gap_at])]
+            summary["longest_gap"] = (daily.index[longest], daily.index[longest + 1], int(spacing[longest]))
+        
+        # Weighted least squares of daily means on the day number
+        trends = {}
+        x = (days - days[0]).astype("float64")
+        for name, total, count in [("rows", daily["rows"], pd.Series(1.0, index=daily.index))] + \
+                [(m, daily[f"{m}:sum"], daily[f"{m}:count"]) for m in metrics]:
+            mask = (count > 0).to_numpy()
+            if mask.sum() < 3:
+                continue
+            y = (total / count.where(count > 0)).to_numpy()[mask]
+            weights = count.to_numpy()[mask]
+            mean_x = np.average(x[mask], weights=weights)
+            mean_y = np.average(y, weights=weights)
+            variance = np.average((x[mask] - mean_x) ** 2, weights=weights)
+            if variance == 0:
+                continue
+            slope = np.average((x[mask] - mean_x) * (y - mean_y), weights=weights) / variance
+            # A change relative to a mean near zero, next to the spread of the values, says nothing
+            spread = np.sqrt(np.average((y - mean_y) ** 2, weights=weights))
+            if profile is not None and name in profile.index:
+                spread = float(pd.to_numeric(profile.loc[name, "std"], errors="coerce"))
+            relative = np.nan
+            if mean_y != 0 and not abs(mean_y) < RELATIVE_TREND_MIN_MEAN * spread:
+                relative = slope * (x[mask][-1] - x[mask][0]) / abs(mean_y)
+            trends[name] = {"per_day": slope, "relative": relative}
+        summary["trends"] = trends
+        
+        # Finest calendar rollup with at most max_periods periods
+        for label, rule, period_days in reversed(ROLLUP_RULES):
+            if summary["span_days"] / period_days <= max_periods:
+                break
+        grouped = daily.resample(rule, label="left", closed="left").sum()
+        table = pd.DataFrame({"rows": grouped["rows"].astype("int64")})
+        for metric in metrics:
+            table[f"mean {metric}"] = grouped[f"{metric}:sum"] / grouped[f"{metric}:count"].where(grouped[f"{metric}:count"] > 0)
+        table.index = table.index.strftime("%Y-%m-%d")
+        table.index.name = "period"
+        summary["rollup"] = (label, table.tail(max_periods))
+        return summary
+
+def format_temporal(summary: Optional[Dict[str, Any]]) -> str:
+    """Render a temporal summary compactly for the prompt"""
+    if summary is None:
+        return "No datetime columns detected."
+    lines = []
+    for column, (low, high) in summary["bounds"].items():
+        line = f"{column}: {low} to {high}"
+        if column in summary["unparsed"]:
+            line += f" ({summary['unparsed'][column]} values not parsed as dates)"
+        lines.append(line)
+    if "rows" not in summary:
+        return "\n".join(lines) or "No datetime values found."
+    
+    lines.append(
+        f"Rows by {summary['axis']}: {summary['rows']} rows on {summary['days']} of {summary['span_days']} days, "
+        f"typically every {summary['cadence_days']:g} day(s)"
+    )
+    if summary["gaps"]:
+        start, end, length = summary["longest_gap"]
+        lines.append(
+            f"Gaps: {summary['gaps']} ({summary['missing_days']} days without rows), "
+            f"longest {length - 1} days between {start:%Y-%m-%d} and {end:%Y-%m-%d}"
+        )
+    else:
+        lines.append("Gaps: none")
+    if summary["trends"]:
+        trends = [
+            f"{name} {trend['per_day']:+.4g} per day"
+            + (f" ({trend['relative']:+.1%} over the range)" if np.isfinite(trend["relative"]) else "")
+            for name, trend in summary["trends"].items()
+        ]
+        lines.append("Trend: " + ", ".join(trends))
+    label, table = summary["rollup"]
+    lines.append(f"{label.capitalize()} rollup:")
+    lines.append(table.to_string(float_format=lambda value: f"{value:.4g}"))
+    return "\n".join(lines)
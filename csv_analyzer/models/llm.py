@@ -8,7 +8,7 @@ def get_llm() -> Union[ChatGoogleGenerativeAI, OllamaLLM]:
     """Initialize and return the appropriate LLM based on configuration"""
     if Config.LLM_PROVIDER == "gemini":
         return ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
+            model=Config.GEMINI_MODEL,
             google_api_key=Config.GOOGLE_API_KEY,
             temperature=0.1
         )
@@ -23,7 +23,7 @@ def get_llm() -> Union[ChatGoogleGenerativeAI, OllamaLLM]:
 
 # Prompt template for data insights
 INSIGHTS_PROMPT = PromptTemplate(
-    input_variables=["data_sample", "columns", "stats_summary"],
+    input_variables=["data_sample", "columns", "stats_summary", "correlations", "anomalies", "temporal"],
     template="""
     Analyze this dataset and provide key insights:
 
@@ -32,6 +32,15 @@ INSIGHTS_PROMPT = PromptTemplate(
     Statistical Summary:
     {stats_summary}
     
+    Strongest Correlations:
+    {correlations}
+    
+    Outliers:
+    {anomalies}
+    
+    Time Series:
+    {temporal}
+    
     Sample Data:
     {data_sample}
 
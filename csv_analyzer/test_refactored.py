@@ -22,7 +22,8 @@ def test_refactored_code():
             print(f"Configuration error: {config_error}")
         
         # Test data processor
-        from csv_analyzer.core.data_processor import load_data, get_dataset_info, generate_cache_key
+        from csv_analyzer.core.data_processor import load_data, get_dataset_info
+        from csv_analyzer.cache.cache_manager import content_hasher, content_cache_key
         
         # Create sample data
         csv_data = """name,age,salary,department
@@ -39,7 +40,9 @@ Bob,35,70000,Sales"""
         print("Dataset info extracted successfully")
         
         # Test generating cache key
-        cache_key = generate_cache_key(df)
+        hasher = content_hasher()
+        hasher.update(csv_data.encode())
+        cache_key = content_cache_key(hasher.hexdigest(), {"format": "csv"})
         print(f"Cache key generated: {cache_key[:8]}...")
         
         # Test cache manager
@@ -14,12 +14,24 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
     from csv_analyzer.core.config import Config
-    from csv_analyzer.core.data_processor import load_data, get_dataset_info, generate_cache_key
+    from csv_analyzer.core.data_processor import (
+        load_data, get_dataset_info, split_file_extension, open_decompressed, get_excel_sheet_names,
+        EXCEL_FORMATS, NDJSON_FORMATS
+    )
+    from csv_analyzer.core.profiler import ColumnProfiler
+    from csv_analyzer.core.pushdown import parse_columns, parse_filter, format_filter
+    from csv_analyzer.cache.cache_manager import content_hasher, content_cache_key
     from csv_analyzer.core.analyzer import DataAnalyzer
 except ImportError:
     # Fallback to relative imports if the above fails
     from ..core.config import Config
-    from ..core.data_processor import load_data, get_dataset_info, generate_cache_key
+    from ..core.data_processor import (
+        load_data, get_dataset_info, split_file_extension, open_decompressed, get_excel_sheet_names,
+        EXCEL_FORMATS, NDJSON_FORMATS
+    )
+    from ..core.profiler import ColumnProfiler
+    from ..core.pushdown import parse_columns, parse_filter, format_filter
+    from ..cache.cache_manager import content_hasher, content_cache_key
     from ..core.analyzer import DataAnalyzer
 
 def main():
@@ -63,41 +75,74 @@ def main():
         # File uploader with multiple format support
         uploaded_file = st.file_uploader(
             "Upload your file", 
-            type=["csv", "xlsx", "xls", "json"]
+            type=["csv", "xlsx", "xls", "json", "jsonl", "ndjson", "parquet", "feather", "arrow", "gz", "zst", "bz2", "xz"]
         )
 
         # Process the uploaded file
         if uploaded_file:
             try:
-                # Determine file extension
-                file_extension = uploaded_file.name.split('.')[-1].lower()
+                # Determine file extension and compression (e.g. data.csv.gz)
+                file_extension, compression = split_file_extension(uploaded_file.name)
                 
-                # Read file content
-                if file_extension in ['csv']:
-                    content = uploaded_file.getvalue().decode('utf-8')
-                    df = load_data(content, file_extension)
-                else:
-                    content = uploaded_file.getvalue()
-                    df = load_data(content, file_extension)
+                source = open_decompressed(uploaded_file, file_extension, compression)
+                
+                # Let the user pick the worksheet and cap the rows of large workbooks
+                sheet, max_rows, flatten = None, None, False
+                if file_extension in EXCEL_FORMATS:
+                    sheet = st.selectbox("Worksheet", get_excel_sheet_names(source, file_extension))
+                    row_limit = st.number_input("Max rows to analyze (0 = all)", min_value=0, value=0, step=1000)
+                    max_rows = int(row_limit) or None
+                elif file_extension in NDJSON_FORMATS:
+                    flatten = st.checkbox("Flatten nested fields", value=False)
+                
+                compact = st.checkbox("Compact memory mode", value=Config.COMPACT_MODE)
+                quantiles = st.checkbox("Include percentiles (p50/p95/p99)", value=Config.INCLUDE_QUANTILES)
+                selected = parse_columns(st.text_input("Columns to analyze (comma-separated, empty = all)"))
+                filters = parse_filter(st.text_input("Row filter, e.g. region == 'north' and amount > 100"))
+                
+                # Parse straight from the uploaded file handle, reading only the wanted columns and rows
+                df = load_data(source, file_extension, sheet=sheet, max_rows=max_rows, flatten=flatten, compact=compact,
+                               columns=selected, filters=filters)
                 
                 # Display basic info
                 st.subheader("Dataset Overview")
                 st.write(f"Rows: {df.shape[0]}, Columns: {df.shape[1]}")
+                memory_report = df.attrs.get("memory_report")
+                if memory_report:
+                    st.write(
+                        f"Memory: {memory_report['memory_before'] / 1e6:.1f} MB -> "
+                        f"{memory_report['memory_after'] / 1e6:.1f} MB ({memory_report['reduction']}x smaller)"
+                    )
                 st.write("Columns:", ", ".join(df.columns.tolist()))
                 
                 # Show data sample
                 st.subheader("Data Sample")
                 st.dataframe(df.head())
                 
-                # Generate statistical summary
-                st.subheader("Statistical Summary")
-                st.write(df.describe())
+                # Profile every column once and reuse it for the prompt
+                st.subheader("Column Profile")
+                profiler = ColumnProfiler(quantiles=quantiles).update(df)
+                st.dataframe(profiler.result())
                 
                 # Get dataset info
-                data_info = get_dataset_info(df)
+                data_info = get_dataset_info(df, profiler)
+                st.subheader("Strongest Correlations")
+                st.text(data_info["correlations"])
+                st.subheader("Outliers")
+                st.text(data_info["anomalies"])
+                st.subheader("Time Series")
+                st.text(data_info["temporal"])
                 
-                # Generate cache key
-                cache_key = generate_cache_key(df)
+                # Generate cache key from the uploaded bytes, as the API does
+                hasher = content_hasher()
+                hasher.update(uploaded_file.getbuffer())
+                cache_key = content_cache_key(
+                    hasher.hexdigest(), {
+                        "sheet": sheet, "max_rows": max_rows, "flatten": flatten or None,
+                        "quantiles": quantiles or None, "columns": tuple(selected) if selected else None,
+                        "filter": format_filter(filters), "compact": compact or None, "format": file_extension
+                    }
+                )
                 
                 # Generate insights with caching
                 with st.spinner(f"Generating insights with {Config.LLM_PROVIDER.upper()}..."):
@@ -3,7 +3,7 @@ import os
 from typing import Optional, List, Tuple
 
 # Database file path
-DATABASE_FILE = "insights_cache.db"
+DATABASE_FILE = os.getenv("DATABASE_FILE", "insights_cache.db")
 
 def init_db():
     """Initialize the SQLite database with the required table"""
@@ -0,0 +1,83 @@
+# Shared setup of the test suite
+import os
+import sys
+import asyncio
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+import pytest
+
+# Add parent directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# The cache database is created in a temporary directory rather than in the
+# checkout; set before any test imports Config, which reads it once
+_database_dir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_FILE"] = os.path.join(_database_dir.name, "insights_cache.db")
+
+def load_api():
+    """Import the API, with a local model when no Gemini key is configured"""
+    from csv_analyzer.core.config import Config
+    provider = Config.LLM_PROVIDER
+    if not Config.validate()[0]:
+        Config.LLM_PROVIDER = "ollama"
+    try:
+        from csv_analyzer.api import main
+    finally:
+        Config.LLM_PROVIDER = provider
+    return main
+
+class StubbedAPI:
+    """The API module with a cache of its own and the LLM call recorded instead of made
+    
+    `calls` holds the dataset info of every LLM call, which returns
+    "insights <number of calls>". `loop_calls` counts the calls made on
+    the event loop, which they would block.
+    """
+    
+    def __init__(self, main, directory: str):
+        from fastapi.testclient import TestClient
+        self.main = main
+        self.directory = directory
+        self.calls: List[Dict[str, str]] = []
+        self.loop_calls = 0
+        self.client = TestClient(main.api_app)
+    
+    def new_cache(self, name: str = "cache.db"):
+        """Give the analyzer an empty cache database"""
+        from csv_analyzer.cache.cache_manager import CacheManager
+        self.main.analyzer.cache_manager = CacheManager(os.path.join(self.directory, name))
+        return self.main.analyzer.cache_manager
+    
+    def analyze(self, data_info: Dict[str, str]) -> str:
+        self.calls.append(data_info)
+        try:
+            asyncio.get_running_loop()
+            self.loop_calls += 1
+        except RuntimeError:
+            pass
+        return f"insights {len(self.calls)}"
+
+@contextmanager
+def stub_api() -> Iterator[StubbedAPI]:
+    """Stub the API's cache, LLM call and resumable uploads, restoring them afterwards"""
+    from csv_analyzer.api.uploads import UploadStore
+    main = load_api()
+    analyzer = main.analyzer
+    saved = analyzer.cache_manager, analyzer.analyze, main.uploads
+    with tempfile.TemporaryDirectory() as directory:
+        stub = StubbedAPI(main, directory)
+        try:
+            stub.new_cache()
+            analyzer.analyze = stub.analyze
+            main.uploads = UploadStore(os.path.join(directory, "uploads"))
+            yield stub
+        finally:
+            analyzer.cache_manager.close()
+            analyzer.cache_manager, analyzer.analyze, main.uploads = saved
+
+@pytest.fixture
+def api() -> Iterator[StubbedAPI]:
+    """The API with an empty cache and a recorded LLM call"""
+    with stub_api() as stub:
+        yield stub
@@ -0,0 +1,71 @@
+# Test outlier detection of numeric columns
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Add parent directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from csv_analyzer.core.anomalies import AnomalyDetector, format_anomalies
+from csv_analyzer.core.profiler import ColumnProfiler
+
+def make_frame(rows: int = 4000) -> pd.DataFrame:
+    """Build normal columns with planted outliers, a constant and a missing-value column"""
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({
+        "amount": rng.normal(100, 10, rows),
+        "latency": rng.exponential(20, rows),
+        "flag": np.ones(rows),
+        "score": np.where(rng.random(rows) < 0.3, np.nan, rng.normal(0, 1, rows)),
+    })
+    df.loc[[5, 50, 500], "amount"] = [1000.0, -400.0, 2500.0]
+    return df
+
+def test_outliers_match_pandas():
+    """Counts from the tails are exact and do not depend on chunking"""
+    df = make_frame()
+    profile = ColumnProfiler().update(df).result()
+    whole = AnomalyDetector(k=len(df))
+    whole.update(df)
+    chunked = AnomalyDetector(k=len(df))
+    for start in range(0, len(df), 300):
+        chunked.update(df.iloc[start:start + 300])
+    result = whole.result(profile)
+    pd.testing.assert_frame_equal(result, chunked.result(profile))
+    
+    for column in ["amount", "latency", "score"]:
+        values = df[column].dropna()
+        z = ((values - values.mean()).abs() > 3 * values.std()).sum()
+        q1, q3 = values.quantile([0.25, 0.75])
+        iqr = ((values < q1 - 1.5 * (q3 - q1)) | (values > q3 + 1.5 * (q3 - q1))).sum()
+        assert result.loc[column, "z"] == z, f"{column} z-score outliers should be exact"
+        assert result.loc[column, "iqr"] == iqr, f"{column} IQR outliers should be exact"
+    assert pd.isna(result.loc["flag", "iqr"]), "Constant columns have no outliers"
+    
+    summary = format_anomalies(result)
+    assert summary.splitlines()[0].startswith("latency:"), "Columns with the most outliers come first"
+    assert "extremes: -400, " in summary and ", 1000, 2500" in summary, "The most extreme values should be listed"
+    assert "flag" not in summary, "Columns without outliers are left out"
+    print("PASS: Outlier counts match pandas")
+
+def test_estimates_beyond_the_tails():
+    """Counts are estimated from the sketch once a tail overflows"""
+    df = make_frame()
+    profile = ColumnProfiler().update(df).result()
+    detector = AnomalyDetector(tail=20, k=200)
+    detector.update(df)
+    result = detector.result(profile)
+    assert not result.loc["latency", "exact"], "More outliers than the tail holds are estimated"
+    assert abs(result.loc["latency", "iqr"] - 190) < 60, "Estimated counts should be close"
+    assert "~" in format_anomalies(result), "Estimated counts should be marked"
+    
+    quiet = pd.DataFrame({"x": np.linspace(0, 1, 500)})
+    assert format_anomalies(ColumnProfiler().update(quiet).anomalies()) == "No outliers found in numeric columns."
+    assert format_anomalies(ColumnProfiler(anomalies=False).update(quiet).anomalies()) == "Not computed."
+    print("PASS: Outlier counts are estimated beyond the tails")
+
+if __name__ == "__main__":
+    test_outliers_match_pandas()
+    test_estimates_beyond_the_tails()
+    print("\nAll anomaly tests passed!")
@@ -0,0 +1,73 @@
+# Test merging appended rows into a stored analysis through the API
+import os
+import sys
+import pickle
+import numpy as np
+import pandas as pd
+
+# Add parent directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from csv_analyzer.core.config import Config
+
+def make_orders(rows: int, seed: int, shift: float = 0.0) -> pd.DataFrame:
+    """Build orders with an amount column that can be shifted by a number of standard deviations"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "amount": rng.normal(100 + 15 * shift, 15, rows).round(2),
+        "region": rng.choice(["north", "south", "east"], rows),
+    })
+
+def test_append_reuses_or_reanalyzes(api):
+    """Similar rows reuse the insights, shifted rows are analyzed again"""
+    persist = Config.PERSIST_PROFILE_STATE
+    try:
+        Config.PERSIST_PROFILE_STATE = True
+        
+        def append(cache_key, frame):
+            # Only the new rows are sent, with the header of the original file
+            response = api.client.post(f"/insights/{cache_key}/append",
+                                       files={"file": ("orders.csv", frame.to_csv(index=False))})
+            assert response.status_code == 200, response.text
+            return response.json()
+        
+        response = api.client.post("/insights/file", files={"file": ("orders.csv", make_orders(3000, 0).to_csv(index=False))})
+        assert response.status_code == 200, response.text
+        original = response.json()
+        assert len(api.calls) == 1
+        
+        similar = append(original["cache_key"], make_orders(500, 1))
+        assert not similar["reanalyzed"] and similar["insights"] == "insights 1", similar
+        assert similar["rows"] == 3500 and similar["drift"] < Config.REANALYSIS_THRESHOLD
+        assert similar["cache_key"] != original["cache_key"] and len(api.calls) == 1
+        
+        shifted = append(similar["cache_key"], make_orders(3500, 2, shift=2))
+        assert shifted["reanalyzed"] and shifted["insights"] == "insights 2", shifted
+        assert shifted["rows"] == 7000 and shifted["drift"] > Config.REANALYSIS_THRESHOLD
+        assert "7000" in api.calls[-1]["stats_summary"], "The LLM should see the merged profile"
+        assert api.loop_calls == 0, "The LLM is called off the event loop"
+        
+        # The same rows appended again are answered from the cache
+        again = append(similar["cache_key"], make_orders(3500, 2, shift=2))
+        assert again["cache_key"] == shifted["cache_key"] and len(api.calls) == 2
+        
+        missing = api.client.post("/insights/unknown/append", files={"file": ("orders.csv", "amount,region\n")})
+        assert missing.status_code == 404
+        # States are never unpickled, another format is a conflict
+        api.main.analyzer.cache_manager.save_profile_state("pickled", pickle.dumps(make_orders(10, 3)))
+        conflict = api.client.post("/insights/pickled/append", files={"file": ("orders.csv", "amount,region\n")})
+        assert conflict.status_code == 409, conflict.text
+        
+        Config.PERSIST_PROFILE_STATE = False
+        response = api.client.post("/insights/file", files={"file": ("other.csv", make_orders(100, 4).to_csv(index=False))})
+        assert api.main.analyzer.cache_manager.load_profile_state(response.json()["cache_key"]) is None, \
+            "Profiles are only stored when enabled"
+    finally:
+        Config.PERSIST_PROFILE_STATE = persist
+    print("PASS: Appends reuse or regenerate the insights")
+
+if __name__ == "__main__":
+    from conftest import stub_api
+    with stub_api() as api:
+        test_append_reuses_or_reanalyzes(api)
+    print("\nAll append tests passed!")
@@ -0,0 +1,102 @@
+# Test the insights cache from concurrent threads
+import os
+import sys
+import tempfile
+import sqlite3
+import threading
+
+# Add parent directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from csv_analyzer.core.config import Config
+from csv_analyzer.cache.cache_manager import CacheManager
+
+def test_connections_are_reused_per_thread():
+    """A thread keeps its connection, other threads get their own, in WAL mode"""
+    wal = Config.SQLITE_WAL
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            Config.SQLITE_WAL = True
+            cache = CacheManager(os.path.join(directory, "cache.db"))
+            conn = cache.pool.connection()
+            assert cache.pool.connection() is conn
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            
+            other = []
+            thread = threading.Thread(target=lambda: other.append(cache.pool.connection()))
+            thread.start()
+            thread.join()
+            assert other[0] is not conn
+            cache.close()
+        finally:
+            Config.SQLITE_WAL = wal
+    print("PASS: Connections are kept per thread in WAL mode")
+
+def test_connections_of_finished_threads_are_closed():
+    """A thread that exits does not keep its connection open"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CacheManager(os.path.join(directory, "cache.db"))
+        finished = []
+        for _ in range(4):
+            thread = threading.Thread(target=lambda: finished.append(cache.pool.connection()))
+            thread.start()
+            thread.join()
+        # Each thread's connection is closed once the next thread opens one
+        conn = cache.pool.connection()
+        assert list(cache.pool._connections.values()) == [conn, finished[-1]]
+        for old in finished[:-1]:
+            try:
+                old.execute("SELECT 1")
+            except sqlite3.ProgrammingError:
+                continue
+            raise AssertionError("The connection of a finished thread is still open")
+        assert conn.execute("SELECT 1").fetchone() == (1,)
+        cache.close()
+    print("PASS: Connections of finished threads are closed")
+
+def test_concurrent_reads_and_writes():
+    """Threads reading and writing at once see every committed entry and never fail"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CacheManager(os.path.join(directory, "cache.db"))
+        for i in range(50):
+            assert cache.save_insights(f"key-{i}", f"insights {i}")
+        failures = []
+        
+        def reader():
+            for _ in range(20):
+                for i in range(50):
+                    if cache.load_insights(f"key-{i}") != f"insights {i}":
+                        failures.append(i)
+        
+        def writer(index):
+            for i in range(50):
+                if not cache.save_insights(f"new-{index}-{i}", "insights"):
+                    failures.append((index, i))
+        
+        threads = [threading.Thread(target=reader) for _ in range(6)]
+        threads += [threading.Thread(target=writer, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not failures, failures[:5]
+        assert len(cache.get_all_insights()) == 50 + 4 * 50
+        cache.close()
+    print("PASS: Concurrent reads and writes succeed")
+
+def test_failed_write_is_rolled_back():
+    """A write that fails leaves the thread's connection usable"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CacheManager(os.path.join(directory, "cache.db"))
+        assert not cache.save_insights("key", None)
+        assert not cache.pool.connection().in_transaction
+        assert cache.save_insights("key", "insights") and cache.load_insights("key") == "insights"
+        cache.close()
+    print("PASS: Failed writes are rolled back")
+
+if __name__ == "__main__":
+    test_connections_are_reused_per_thread()
+    test_connections_of_finished_threads_are_closed()
+    test_concurrent_reads_and_writes()
+    test_failed_write_is_rolled_back()
+    print("\nAll cache concurrency tests passed!")
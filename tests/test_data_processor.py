@@ -0,0 +1,320 @@
+# Test data processing functionality
+import os
+import sys
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add parent directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from csv_analyzer.core.data_processor import (
+    load_data, get_dataset_info, get_dataset_info_streaming, profile_stream, StreamingProfile
+)
+from csv_analyzer.core.profiler import profile_drift
+
+def make_csv(rows: int = 1000) -> str:
+    """Build a CSV with numeric, text and partially missing columns"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "id": np.arange(rows),
+        "age": rng.integers(18, 70, rows),
+        "salary": rng.normal(60000, 15000, rows).round(2),
+        "department": rng.choice(["Engineering", "Marketing", "Sales"], rows),
+        "bonus": np.where(rng.random(rows) < 0.2, np.nan, rng.normal(5000, 500, rows)),
+    })
+    return df.to_csv(index=False)
+
+def test_streaming_matches_full_load():
+    """Chunked profiling should produce the same dataset info as a full load"""
+    csv_data = make_csv()
+    df = load_data(csv_data, "csv")
+    
+    expected = get_dataset_info(df)
+    streamed = get_dataset_info_streaming(csv_data, "csv", chunksize=97)
+    
+    assert streamed["columns"] == expected["columns"], "Column lists differ"
+    assert streamed["data_sample"] == expected["data_sample"], "Data samples differ"
+    assert streamed["stats_summary"] == expected["stats_summary"], "Statistical summaries differ"
+    print("PASS: Streaming dataset info matches full load")
+
+def test_streaming_column_turns_non_numeric():
+    """A column that stops parsing as numeric in a later chunk is profiled as text"""
+    csv_data = "a,b\n" + "".join(f"{i},{i * 2}\n" for i in range(10)) + "unknown,20\n"
+    profile = profile_stream(csv_data, "csv", chunksize=4)
+    
+    assert profile.row_count == 11, "Row count should cover every chunk"
+    stats = profile.stats_frame()
+    assert stats.loc["a", "dtype"] == str(load_data(csv_data, "csv")["a"].dtype), "Column should be profiled as text"
+    assert pd.isna(stats.loc["a", "mean"]), "Text columns should have no numeric stats"
+    assert stats.loc["b", "mean"] == 10.0 and stats.loc["b", "max"] == 20, "Numeric stats should cover every chunk"
+    print("PASS: Columns that turn non-numeric are profiled as text")
+
+def test_load_data_from_binary_handle():
+    """CSV can be parsed from a binary file handle without decoding it first"""
+    from io import BytesIO
+    csv_data = make_csv(50)
+    
+    from_text = load_data(csv_data, "csv")
+    from_handle = load_data(BytesIO(csv_data.encode()), "csv")
+    
+    pd.testing.assert_frame_equal(from_text, from_handle)
+    print("PASS: Loading from a binary handle matches loading from text")
+
+def test_csv_engines_agree():
+    """The pyarrow engine parses like the C engine"""
+    pytest.importorskip("pyarrow")
+    csv_data = make_csv(50)
+    c_df = load_data(csv_data, "csv", engine="c")
+    arrow_df = load_data(csv_data, "csv", engine="pyarrow")
+    assert c_df.shape == arrow_df.shape, "Engines should parse the same shape"
+    assert np.allclose(c_df["salary"], arrow_df["salary"]), "Engines should parse the same values"
+    print("PASS: CSV engines parse the same data")
+
+def test_csv_engine_fallback():
+    """The pyarrow engine falls back to the C parser when pyarrow is missing"""
+    from csv_analyzer.core import data_processor
+    csv_data = make_csv(50)
+    original = data_processor.pyarrow
+    data_processor.pyarrow = None
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            assert data_processor.resolve_csv_engine("pyarrow") == "c", "Missing pyarrow should fall back to the C parser"
+        assert any("pyarrow is not installed" in str(w.message) for w in caught), "The fallback should warn"
+        assert load_data(csv_data, "csv", engine="pyarrow").shape == (50, 5), "Fallback should still parse the file"
+    finally:
+        data_processor.pyarrow = original
+    print("PASS: CSV engine selection and fallback work correctly")
+
+def test_columnar_formats():
+    """Parquet, Feather and Arrow IPC files profile to the same dataset info as a full load"""
+    pytest.importorskip("pyarrow")
+    import tempfile
+    from csv_analyzer.core.data_processor import COLUMNAR_FORMATS
+    
+    df = load_data(make_csv(200), "csv")
+    expected = get_dataset_info(df)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {
+            "parquet": os.path.join(tmp, "data.parquet"),
+            "feather": os.path.join(tmp, "data.feather"),
+            "arrow": os.path.join(tmp, "data.arrow"),
+        }
+        df.to_parquet(paths["parquet"], row_group_size=64)
+        df.to_feather(paths["feather"])
+        df.to_feather(paths["arrow"], chunksize=64)
+        
+        for file_extension in COLUMNAR_FORMATS:
+            path = paths[file_extension]
+            assert load_data(path, file_extension).shape == df.shape, f"{file_extension} should load every row"
+            with open(path, "rb") as f:
+                for source in [path, f.read()]:
+                    profile = profile_stream(source, file_extension, chunksize=50)
+                    assert profile.row_count == len(df), f"{file_extension} row count is wrong"
+                    assert profile.dataset_info() == expected, f"{file_extension} dataset info differs"
+    print("PASS: Columnar formats profile correctly")
+
+def test_compressed_sources():
+    """Compressed CSV is detected by suffix or magic bytes and parsed as a stream"""
+    import bz2
+    import gzip
+    import lzma
+    from io import BytesIO
+    from csv_analyzer.core import data_processor
+    from csv_analyzer.core.data_processor import split_file_extension, open_decompressed
+    
+    assert split_file_extension("data.csv.gz") == ("csv", "gzip"), "Suffix should select gzip"
+    assert split_file_extension("Export.CSV.ZST") == ("csv", "zstd"), "Suffix matching should ignore case"
+    assert split_file_extension("data.csv") == ("csv", None), "Plain files have no compression"
+    
+    csv_data = make_csv(300)
+    expected = load_data(csv_data, "csv")
+    compressors = {"gzip": gzip.compress, "bz2": bz2.compress, "xz": lzma.compress}
+    if data_processor.zstandard is not None:
+        compressors["zstd"] = data_processor.zstandard.ZstdCompressor().compress
+    
+    for compression, compress in compressors.items():
+        payload = compress(csv_data.encode())
+        by_suffix = load_data(open_decompressed(BytesIO(payload), "csv", compression), "csv")
+        by_magic = open_decompressed(BytesIO(payload), "csv")
+        pd.testing.assert_frame_equal(by_suffix, expected)
+        assert profile_stream(by_magic, "csv", chunksize=64).row_count == len(expected), \
+            f"{compression} should be detected from its magic bytes"
+    
+    plain = BytesIO(csv_data.encode())
+    assert open_decompressed(plain, "csv") is plain, "Uncompressed input should be passed through"
+    print("PASS: Compressed sources are decompressed as streams")
+
+def test_excel_streaming():
+    """Excel sheets are profiled in read-only chunks with sheet selection and a row cap"""
+    from io import BytesIO
+    from csv_analyzer.core.data_processor import get_excel_sheet_names
+    
+    df = load_data(make_csv(120), "csv")
+    other = pd.DataFrame({"x": [1, 2, 3]})
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer) as writer:
+        df.to_excel(writer, sheet_name="main", index=False)
+        other.to_excel(writer, sheet_name="other", index=False)
+    workbook = buffer.getvalue()
+    
+    assert get_excel_sheet_names(workbook) == ["main", "other"], "Sheet names should be listed"
+    
+    expected = get_dataset_info(load_data(workbook, "xlsx"))
+    streamed = get_dataset_info_streaming(workbook, "xlsx", chunksize=25)
+    assert streamed == expected, "Streaming Excel profile should match a full load"
+    
+    assert profile_stream(workbook, "xlsx", sheet="other").row_count == 3, "Sheet should be selectable by name"
+    assert profile_stream(BytesIO(workbook), "xlsx", sheet="1").row_count == 3, "Sheet should be selectable by index"
+    assert profile_stream(workbook, "xlsx", chunksize=25, max_rows=40).row_count == 40, "Row cap should be applied"
+    assert len(load_data(workbook, "xlsx", sheet="main", max_rows=10)) == 10, "load_data should honour the row cap"
+    print("PASS: Excel sheets stream with sheet selection and row limits")
+
+def test_ndjson_streaming():
+    """NDJSON is parsed line by line in chunks, optionally flattening nested objects"""
+    import json
+    records = [
+        {"id": i, "user": {"name": f"user{i % 3}", "age": 20 + i % 7}, "amount": i * 1.5}
+        for i in range(40)
+    ]
+    records[30]["extra"] = 5
+    ndjson = "\n".join(json.dumps(record) for record in records) + "\n\n"
+    
+    flat = load_data(ndjson, "jsonl", flatten=True)
+    assert "user.age" in flat.columns, "Nested fields should be flattened into dotted columns"
+    streamed = get_dataset_info_streaming(ndjson.encode(), "ndjson", chunksize=7, flatten=True)
+    assert streamed == get_dataset_info(flat), "Streaming NDJSON profile should match a full load"
+    
+    nested = profile_stream(ndjson, "jsonl", chunksize=7)
+    assert nested.columns == ["id", "user", "amount", "extra"], "Columns first seen in later chunks should be added"
+    assert profile_stream(ndjson, "jsonl", chunksize=7, max_rows=12).row_count == 12, "Row cap should be applied"
+    
+    try:
+        load_data('{"a": 1}\n{"a": \n', "jsonl")
+        assert False, "Malformed lines should be rejected"
+    except ValueError as e:
+        assert "line 2" in str(e), "Errors should name the failing line"
+    print("PASS: NDJSON is streamed and flattened")
+
+def test_compact_load():
+    """Compact mode shrinks dtypes, parses dates and reports memory saved"""
+    rows = 2000
+    rng = np.random.default_rng(1)
+    csv_data = pd.DataFrame({
+        "id": np.arange(rows),
+        "price": rng.integers(0, 100, rows) * 0.5,
+        "ratio": rng.random(rows),
+        "department": rng.choice(["Engineering", "Marketing", "Sales"], rows),
+        "day": pd.date_range("2024-01-01", periods=rows, freq="h").strftime("%Y-%m-%d %H:%M"),
+        "code": ["12", "07"] * (rows // 2),
+    }).to_csv(index=False)
+    
+    df = load_data(csv_data, "csv", compact=True)
+    report = df.attrs["memory_report"]
+    
+    assert df["id"].dtype == np.uint16, "Integers should be downcast"
+    assert df["price"].dtype == np.float32, "Floats should be downcast when lossless"
+    assert df["ratio"].dtype == np.float64, "Floats that would lose precision should be kept"
+    assert isinstance(df["department"].dtype, pd.CategoricalDtype), "Low-cardinality text should be categorical"
+    assert pd.api.types.is_datetime64_any_dtype(df["day"]), "Date strings should be parsed"
+    assert not pd.api.types.is_datetime64_any_dtype(df["code"]), "Numeric-looking text is not a date"
+    assert report["memory_after"] < report["memory_before"], "Compact mode should save memory"
+    assert "memory_report" not in load_data(csv_data, "csv", compact=False).attrs, "Compact mode is opt-in"
+    print(f"PASS: Compact load reduced memory {report['reduction']}x")
+
+def test_streaming_quantiles():
+    """Percentiles are sketched per chunk and only added on request"""
+    csv_data = make_csv(5000)
+    df = load_data(csv_data, "csv")
+    
+    stats = profile_stream(csv_data, "csv", chunksize=700, quantiles=True).stats_frame()
+    for column in ["age", "salary", "bonus"]:
+        for field, q in [("p50", 0.5), ("p95", 0.95), ("p99", 0.99)]:
+            rank = (df[column].dropna() <= stats.loc[column, field]).mean()
+            assert abs(rank - q) < 0.02, f"{column} {field} should be within the sketch error"
+    assert "p50" in get_dataset_info(df, quantiles=True)["stats_summary"], "Percentiles should be in the summary"
+    assert "p50" not in get_dataset_info(df, quantiles=False)["stats_summary"], "Percentiles are optional"
+    print("PASS: Streaming quantiles are accurate and optional")
+
+def test_appended_rows_merge_into_stored_profile():
+    """A stored profile merged with appended rows matches a profile of the whole file"""
+    lines = make_csv(2000).splitlines(keepends=True)
+    original, appended = "".join(lines[:1201]), "".join(lines[:1] + lines[1201:])
+    whole = profile_stream("".join(lines), "csv", chunksize=300)
+    
+    stored = StreamingProfile.from_bytes(profile_stream(original, "csv", chunksize=300).to_bytes())
+    before = stored.stats_frame()
+    stored.merge(profile_stream(appended, "csv", chunksize=300, seed=stored.parts + 42))
+    assert stored.row_count == 2000 and stored.parts == 2
+    exact = ["dtype", "count", "nulls", "unique", "min", "max"]
+    pd.testing.assert_frame_equal(stored.stats_frame()[exact], whole.stats_frame()[exact])
+    pd.testing.assert_frame_equal(stored.stats_frame()[["mean", "std"]], whole.stats_frame()[["mean", "std"]])
+    
+    # Rows from the same distribution barely move the stats, a shifted column does
+    assert profile_drift(before, stored.stats_frame()) < 0.1
+    shifted = profile_stream(appended, "csv").stats_frame()
+    shifted.loc["salary", "mean"] += 2 * shifted.loc["salary", "std"]
+    assert profile_drift(before, shifted) > 1
+    assert profile_drift(before, shifted.drop(index="bonus")) == float("inf"), "Schema changes always count"
+    assert profile_drift(None, before) == float("inf")
+    print("PASS: Appended rows merge into a stored profile")
+
+def test_profile_state_round_trip():
+    """Stored profiles give the same dataset info and merges, and never unpickle"""
+    import pickle
+    from io import StringIO
+    from csv_analyzer.core import state
+    rng = np.random.default_rng(5)
+    df = pd.read_csv(StringIO(make_csv(3000)))
+    df["ordered_at"] = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 90, len(df)), unit="D")
+    df["note"] = np.where(rng.random(len(df)) < 0.5, None, "late")
+    profile = StreamingProfile(quantiles=True)
+    for start in range(0, 2000, 500):
+        profile.update(df.iloc[start:start + 500])
+    profile.analyzed_stats = profile.stats_frame()
+    restored = StreamingProfile.from_bytes(profile.to_bytes())
+    assert restored.dataset_info() == profile.dataset_info(), "Restored profiles should describe the same data"
+    pd.testing.assert_frame_equal(restored.analyzed_stats, profile.analyzed_stats)
+    
+    merged = []
+    for stored in (restored, profile):
+        appended = StreamingProfile(quantiles=True, seed=43)
+        appended.update(df.iloc[2000:])
+        merged.append(stored.merge(appended).dataset_info())
+    assert merged[0] == merged[1], "Restored profiles should merge the same way"
+    
+    for data in [pickle.dumps(profile.stats_frame()), b"not a profile"]:
+        try:
+            StreamingProfile.from_bytes(data)
+            assert False, "Other data should be rejected"
+        except ValueError:
+            pass
+    version = state.STATE_VERSION
+    try:
+        data = profile.to_bytes()
+        state.STATE_VERSION = version + 1
+        StreamingProfile.from_bytes(data)
+        assert False, "States of another version should be rejected"
+    except ValueError as e:
+        assert "version" in str(e)
+    finally:
+        state.STATE_VERSION = version
+    print("PASS: Profile state round-trips without pickle")
+
+if __name__ == "__main__":
+    test_streaming_matches_full_load()
+    test_streaming_column_turns_non_numeric()
+    test_load_data_from_binary_handle()
+    test_csv_engines_agree()
+    test_csv_engine_fallback()
+    test_columnar_formats()
+    test_compressed_sources()
+    test_excel_streaming()
+    test_ndjson_streaming()
+    test_compact_load()
+    test_streaming_quantiles()
+    test_appended_rows_merge_into_stored_profile()
+    test_profile_state_round_trip()
+    print("\nAll data processor tests passed!")
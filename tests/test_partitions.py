@@ -0,0 +1,161 @@
+# Test partitioned profiling of a single CSV file
+import io
+import os
+import sys
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+
+# Add parent directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from csv_analyzer.core.data_processor import profile_stream
+from csv_analyzer.core.partitions import split_byte_ranges, profile_partitioned
+from csv_analyzer.core.profiler import ColumnProfiler
+
+def write_csv(rows: int = 3000) -> str:
+    """Write a CSV file with numeric, text, datetime and missing values"""
+    rng = np.random.default_rng(5)
+    df = pd.DataFrame({
+        "id": np.arange(rows),
+        "amount": rng.normal(100, 15, rows).round(2),
+        "region": rng.choice(["north", "south", "east"], rows),
+        "day": pd.date_range("2024-01-01", periods=rows, freq="h").strftime("%Y-%m-%d %H:%M"),
+        "score": np.where(rng.random(rows) < 0.1, np.nan, rng.integers(0, 10, rows)),
+    })
+    df.loc[17, "amount"] = 10000
+    handle = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False)
+    df.to_csv(handle, index=False)
+    handle.close()
+    return handle.name
+
+def test_byte_ranges_split_on_lines():
+    """Ranges cover every data row once and start on line boundaries"""
+    path = write_csv()
+    try:
+        header, ranges = split_byte_ranges(path, 4)
+        with open(path, "rb") as handle:
+            data = handle.read()
+        assert header == data[:len(header)] and header.endswith(b"\n")
+        assert len(ranges) == 4
+        assert ranges[0][0] == len(header) and ranges[-1][1] == len(data)
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            assert end == start and data[start - 1:start] == b"\n", "Ranges meet at line starts"
+        assert sum(data[start:end].count(b"\n") for start, end in ranges) == 3000
+    finally:
+        os.remove(path)
+    print("PASS: Byte ranges split on line boundaries")
+
+def test_partitioned_profile_matches_serial():
+    """Merged profiles of byte ranges give the serial streaming profile"""
+    path = write_csv()
+    try:
+        with open(path, "rb") as source:
+            serial = profile_stream(source, "csv", chunksize=700, quantiles=True)
+        partitioned = profile_partitioned(path, workers=2, partitions=3, chunksize=700, quantiles=True, min_bytes=0)
+        assert partitioned.row_count == serial.row_count == 3000
+        assert partitioned.columns == serial.columns
+        
+        # Moments merge up to rounding
+        exact = ["dtype", "count", "nulls", "unique", "min", "max"]
+        pd.testing.assert_frame_equal(partitioned.stats_frame()[exact], serial.stats_frame()[exact])
+        pd.testing.assert_frame_equal(partitioned.stats_frame()[["mean", "std"]], serial.stats_frame()[["mean", "std"]])
+        
+        info = partitioned.dataset_info()
+        assert info["columns"] == serial.dataset_info()["columns"]
+        assert "amount" in info["anomalies"] and "1e+04" in info["anomalies"]
+        assert "3000 rows on 125 of 125 days" in info["temporal"], info["temporal"]
+        assert len(partitioned.sample_frame()) == len(serial.sample_frame())
+    finally:
+        os.remove(path)
+    print("PASS: Partitioned profile matches the serial one")
+
+def write_quoted_csv(rows: int = 3000, stray_quote: bool = False) -> str:
+    """Write a CSV file whose notes are quoted fields spanning several lines
+    
+    With `stray_quote` the first note holds a quote inside an unquoted
+    field, which pandas reads as text but which throws off quote counting.
+    """
+    lines = ["id,amount,note"]
+    if stray_quote:
+        lines.append('0,1.0,5" screen')
+    for i in range(1, rows):
+        note = '"' + "\n".join(f"part {j},{j},{j},{j},{j}" for j in range(i % 4 + 1)) + '"'
+        lines.append(f"{i},{i % 97 + 0.5},{note}")
+    handle = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, newline="")
+    handle.write("\n".join(lines) + "\n")
+    handle.close()
+    return handle.name
+
+def test_byte_ranges_skip_quoted_line_breaks():
+    """Ranges start after the end of rows, not inside quoted fields with line breaks"""
+    path = write_quoted_csv()
+    try:
+        header, ranges = split_byte_ranges(path, 4)
+        with open(path, "rb") as handle:
+            data = handle.read()
+        assert len(ranges) == 4
+        for start, end in ranges:
+            assert data[:start].count(b'"') % 2 == 0, "Ranges start outside quoted fields"
+            rows = pd.read_csv(io.BytesIO(header + data[start:end]))
+            assert rows["note"].str.startswith("part 0").all()
+        
+        serial = profile_partitioned(path, workers=1)
+        partitioned = profile_partitioned(path, workers=2, partitions=4, chunksize=500, min_bytes=0)
+        assert partitioned.row_count == serial.row_count == 2999
+        pd.testing.assert_frame_equal(partitioned.stats_frame()[["count", "min", "max"]],
+                                      serial.stats_frame()[["count", "min", "max"]])
+    finally:
+        os.remove(path)
+    print("PASS: Byte ranges skip quoted line breaks")
+
+def test_unparsable_ranges_fall_back_to_serial():
+    """A range starting inside a quoted field makes the whole file be read serially"""
+    path = write_quoted_csv(stray_quote=True)
+    try:
+        header, ranges = split_byte_ranges(path, 4)
+        with open(path, "rb") as handle:
+            data = handle.read()
+        # The stray quote makes some ranges start inside notes
+        assert any(data[start:end].startswith(b"part ") for start, end in ranges)
+        
+        partitioned = profile_partitioned(path, workers=2, partitions=4, chunksize=500, min_bytes=0)
+        assert partitioned.row_count == 3000
+        assert partitioned.stats_frame().loc["amount", "count"] == 3000
+    finally:
+        os.remove(path)
+    print("PASS: Unparsable ranges fall back to the serial reader")
+
+def test_partitioned_profile_beside_other_pools():
+    """A partitioned read keeps its pool while a profile with another worker count runs"""
+    path = write_csv()
+    try:
+        wide = pd.concat([pd.read_csv(path).add_suffix(f"_{i}") for i in range(10)], axis=1)
+        errors = []
+        
+        def profile_wide():
+            try:
+                for _ in range(3):
+                    ColumnProfiler(workers=3).update(wide)
+            except Exception as e:
+                errors.append(e)
+        
+        thread = threading.Thread(target=profile_wide)
+        thread.start()
+        for _ in range(3):
+            partitioned = profile_partitioned(path, workers=2, partitions=12, chunksize=700, min_bytes=0)
+            assert partitioned.row_count == 3000
+        thread.join()
+        assert not errors, errors
+    finally:
+        os.remove(path)
+    print("PASS: Partitioned profiles run beside pools of other sizes")
+
+if __name__ == "__main__":
+    test_byte_ranges_split_on_lines()
+    test_partitioned_profile_matches_serial()
+    test_byte_ranges_skip_quoted_line_breaks()
+    test_unparsable_ranges_fall_back_to_serial()
+    test_partitioned_profile_beside_other_pools()
+    print("\nAll partition tests passed!")
@@ -0,0 +1,121 @@
+# Test parsing uploads while they are received
+import os
+import sys
+import io
+import gzip
+import time
+import asyncio
+import threading
+import numpy as np
+import pandas as pd
+
+# Add parent directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from csv_analyzer.core.config import Config
+from csv_analyzer.api.uploads import PipeReader, MultipartFileReader, PipelinedUpload
+
+def test_multipart_file_reader():
+    """The file part is found whatever the boundaries of the received chunks"""
+    content = b"a,b\r\n1,2\r\n--not-a-boundary\r\n3,4\r\n"
+    body = (b"--xyz\r\nContent-Disposition: form-data; name=\"note\"\r\n\r\nhello\r\n"
+            b"--xyz\r\nContent-Disposition: form-data; name=\"file\"; filename=\"data.csv\"\r\n"
+            b"Content-Type: text/csv\r\n\r\n" + content + b"\r\n--xyz--\r\n")
+    for size in [1, 7, 64, len(body)]:
+        reader = MultipartFileReader("multipart/form-data; boundary=xyz")
+        received = b"".join(b"".join(reader.feed(body[i:i + size])) for i in range(0, len(body), size))
+        assert received == content and reader.filename == "data.csv" and reader.complete, size
+    print("PASS: Multipart file bytes are extracted from any chunking")
+
+def test_pipe_reader_pauses_writer():
+    """The writer waits while the pipe is full and the reader sees every byte"""
+    pipe = PipeReader(max_buffered=10)
+    data = bytes(range(256)) * 40
+    received = []
+    reader = threading.Thread(target=lambda: received.append(io.BufferedReader(pipe, 7).read()))
+    reader.start()
+    for i in range(0, len(data), 5):
+        pipe.feed(data[i:i + 5])
+        assert pipe._buffered < 10 + 5
+    pipe.finish()
+    reader.join(5)
+    assert received == [data]
+    print("PASS: Pipe delivers every byte with a bounded buffer")
+
+class StreamedRequest:
+    """A multipart request whose body arrives in chunks"""
+    
+    def __init__(self, content: bytes, chunk_size: int = 1024):
+        self.headers = {"content-type": "multipart/form-data; boundary=xyz"}
+        self.body = (b"--xyz\r\nContent-Disposition: form-data; name=\"file\"; filename=\"data.csv\"\r\n\r\n"
+                     + content + b"\r\n--xyz--\r\n")
+        self.chunk_size = chunk_size
+    
+    async def stream(self):
+        for i in range(0, len(self.body), self.chunk_size):
+            yield self.body[i:i + self.chunk_size]
+
+def test_skipped_parser_is_stopped():
+    """A parser skipped once the body is received fails on its next read instead of finishing"""
+    started, outcome = threading.Event(), []
+    
+    def parse(stream):
+        stream.read(1)
+        started.set()
+        # Still busy when the whole body has been received
+        time.sleep(0.2)
+        try:
+            outcome.append(len(stream.read()))
+        except ValueError:
+            outcome.append("stopped")
+    
+    async def run(skip):
+        upload = PipelinedUpload(StreamedRequest(b"a,b\n" + b"1,2\n" * 10000))
+        await upload.filename()
+        return await upload.into_parser(parse, skip=skip)
+    
+    assert asyncio.run(run(lambda: started.wait(5))) is None
+    assert outcome == ["stopped"], outcome
+    started.clear()
+    asyncio.run(run(lambda: not started.wait(5)))
+    assert outcome[-1] == 40003, outcome
+    print("PASS: Skipped parsers are stopped")
+
+def test_pipelined_upload_matches_spooled(api):
+    """Profiling a CSV upload while it arrives gives the analysis of the spooled file"""
+    calls = api.calls
+    pipelined, streaming = Config.PIPELINE_UPLOADS, Config.STREAMING_MODE
+    try:
+        rng = np.random.default_rng(8)
+        content = gzip.compress(pd.DataFrame({
+            "amount": rng.normal(100, 15, 30000).round(2), "region": rng.choice(["north", "south"], 30000)
+        }).to_csv(index=False).encode())
+            
+        responses = []
+        for streaming_mode in [False, True]:
+            for pipeline in [True, False]:
+                Config.PIPELINE_UPLOADS, Config.STREAMING_MODE = pipeline, streaming_mode
+                api.new_cache(f"{streaming_mode}-{pipeline}.db")
+                response = api.client.post("/insights/file", files={"file": ("data.csv.gz", content)})
+                assert response.status_code == 200, response.text
+                responses.append(response.json())
+        assert calls[0] == calls[1] and calls[2] == calls[3]
+        assert responses[0]["cache_key"] == responses[1]["cache_key"]
+        assert "30000" in calls[0]["stats_summary"]
+        
+        # Received again, the cached content is answered without another LLM call
+        Config.PIPELINE_UPLOADS = True
+        response = api.client.post("/insights/file", files={"file": ("data.csv.gz", content)})
+        assert response.json()["cache_key"] == responses[-1]["cache_key"] and len(calls) == 4
+    finally:
+        Config.PIPELINE_UPLOADS, Config.STREAMING_MODE = pipelined, streaming
+    print("PASS: Pipelined uploads match spooled ones")
+
+if __name__ == "__main__":
+    test_multipart_file_reader()
+    test_pipe_reader_pauses_writer()
+    test_skipped_parser_is_stopped()
+    from conftest import stub_api
+    with stub_api() as api:
+        test_pipelined_upload_matches_spooled(api)
+    print("\nAll pipelined upload tests passed!")
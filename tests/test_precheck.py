@@ -0,0 +1,74 @@
+# Test answering known uploads from a client-computed content hash
+import os
+import sys
+import hashlib
+import numpy as np
+import pandas as pd
+
+# Add parent directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+def make_csv(rows: int = 500) -> bytes:
+    """Build CSV bytes with numeric and text columns"""
+    rng = np.random.default_rng(3)
+    return pd.DataFrame({
+        "amount": rng.normal(100, 15, rows).round(2),
+        "region": rng.choice(["north", "south"], rows),
+    }).to_csv(index=False).encode()
+
+def test_known_content_skips_upload(api):
+    """Precheck and If-None-Match answer from the cache without parsing the file"""
+    client, calls = api.client, api.calls
+    content = make_csv()
+    content_hash = hashlib.blake2b(content, digest_size=16).hexdigest()
+        
+    assert client.get("/insights/precheck", params={"hash": content_hash, "filename": "data.csv"}).status_code == 404
+    uploaded = client.post("/insights/file", files={"file": ("data.csv", content)}).json()
+    assert uploaded["content_hash"] == content_hash and len(calls) == 1
+        
+    found = client.get("/insights/precheck", params={"hash": content_hash, "filename": "data.csv"}).json()
+    assert found["cache_key"] == uploaded["cache_key"] and found["insights"] == "insights 1"
+    # Other options, or the same bytes parsed as another format, are another analysis
+    assert client.get("/insights/precheck", params={"hash": content_hash, "filename": "data.csv",
+                                                    "columns": "amount"}).status_code == 404
+    assert client.get("/insights/precheck", params={"hash": content_hash, "filename": "data.tsv"}).status_code == 404
+        
+    # A hit is answered once the file's part headers are read, a miss falls back to the upload
+    parsed = len(calls)
+    hit = client.post("/insights/file", headers={"If-None-Match": f'"{content_hash}"'},
+                      files={"file": ("data.csv", content)})
+    assert hit.status_code == 200 and hit.json()["cache_key"] == uploaded["cache_key"] and len(calls) == parsed
+    miss = client.post("/insights/file", params={"columns": "amount"}, headers={"If-None-Match": content_hash},
+                       files={"file": ("data.csv", content)})
+    assert miss.status_code == 200 and len(calls) == 2
+    assert client.post("/insights/file", headers={"If-None-Match": "0" * 32}).status_code == 400
+    print("PASS: Known content is answered without parsing it")
+
+def test_max_rows_must_be_positive(api):
+    """A row cap below 1 is rejected instead of analyzing an empty frame"""
+    content = make_csv()
+    for max_rows in [0, -1]:
+        assert api.client.post("/insights/file", params={"max_rows": max_rows},
+                               files={"file": ("data.csv", content)}).status_code == 422
+        assert api.client.get("/insights/precheck", params={"hash": "0" * 32, "filename": "data.csv",
+                                                            "max_rows": max_rows}).status_code == 422
+        assert api.client.post("/uploads/missing/finalize", params={"max_rows": max_rows}).status_code == 422
+    assert api.client.post("/insights/file", params={"max_rows": 1}, files={"file": ("data.csv", content)}).status_code == 200
+    assert not api.calls[0]["stats_summary"].startswith("Empty")
+    print("PASS: max_rows below 1 is rejected")
+
+def test_format_is_part_of_the_key(api):
+    """The same bytes parsed as JSON and as NDJSON are different analyses"""
+    content = b'{"amount": {"0": 1.5, "1": 2.5}, "region": {"0": "north", "1": "south"}}\n'
+    as_json = api.client.post("/insights/file", files={"file": ("data.json", content)})
+    as_ndjson = api.client.post("/insights/file", files={"file": ("data.jsonl", content)})
+    assert as_json.status_code == 200 and as_ndjson.status_code == 200, (as_json.text, as_ndjson.text)
+    assert as_json.json()["cache_key"] != as_ndjson.json()["cache_key"] and len(api.calls) == 2
+    print("PASS: The file format is part of the cache key")
+
+if __name__ == "__main__":
+    from conftest import stub_api
+    for test in [test_known_content_skips_upload, test_max_rows_must_be_positive, test_format_is_part_of_the_key]:
+        with stub_api() as api:
+            test(api)
+    print("\nAll precheck tests passed!")
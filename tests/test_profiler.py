@@ -0,0 +1,127 @@
+# Test the single-pass column profiler
+import os
+import sys
+import threading
+import numpy as np
+import pandas as pd
+
+# Add parent directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from csv_analyzer.core.config import Config
+from csv_analyzer.core.profiler import ColumnProfiler, profile_dataframe, format_profile
+from csv_analyzer.core.parallel import get_executor
+
+def make_frame(rows: int = 500) -> pd.DataFrame:
+    """Build a frame with numeric, text, datetime and missing values"""
+    rng = np.random.default_rng(3)
+    return pd.DataFrame({
+        "amount": np.where(rng.random(rows) < 0.1, np.nan, rng.normal(100, 10, rows)),
+        "quantity": rng.integers(1, 9, rows),
+        "region": rng.choice(["north", "south", "east"], rows, p=[0.6, 0.3, 0.1]),
+        "day": pd.date_range("2024-01-01", periods=rows, freq="D"),
+    })
+
+def test_profile_matches_pandas():
+    """Every column is profiled with the statistics pandas would report"""
+    df = make_frame()
+    profile = profile_dataframe(df)
+    
+    assert profile.index.tolist() == df.columns.tolist(), "Every column should be profiled"
+    assert profile.loc["amount", "nulls"] == df["amount"].isna().sum(), "Null counts should match"
+    assert np.isclose(profile.loc["amount", "mean"], df["amount"].mean()), "Means should match"
+    assert np.isclose(profile.loc["amount", "std"], df["amount"].std()), "Standard deviations should match"
+    assert profile.loc["quantity", "min"] == df["quantity"].min(), "Minimums should match"
+    assert profile.loc["region", "unique"] == 3, "Text columns should report their cardinality"
+    counts = df["region"].value_counts()
+    assert profile.loc["region", "top_values"].startswith(f"north ({counts['north']})"), "Top values should be listed"
+    assert profile.loc["day", "max"] == df["day"].max(), "Datetime columns should report their range"
+    assert "region" in format_profile(profile), "Formatted profile should include text columns"
+    print("PASS: Column profile matches pandas")
+
+def test_chunked_profile_merges_exactly():
+    """Profiling in chunks and merging gives the same result as one pass"""
+    df = make_frame()
+    profiler = ColumnProfiler()
+    for start in range(0, len(df), 64):
+        profiler.update(df.iloc[start:start + 64])
+    
+    pd.testing.assert_frame_equal(profiler.result(), profile_dataframe(df), check_exact=False)
+    print("PASS: Chunked profiles merge exactly")
+
+def test_parallel_profile_matches_serial():
+    """Column batches profiled on the process pool give the in-process profile"""
+    df = pd.concat([make_frame().add_suffix(f"_{i}") for i in range(20)], axis=1)
+    df["nested"] = [{"a": i % 3} for i in range(len(df))]
+    serial = ColumnProfiler(quantiles=True, workers=1).update(df)
+    parallel = ColumnProfiler(quantiles=True, workers=2).update(df)
+    pd.testing.assert_frame_equal(parallel.result(), serial.result())
+    assert parallel.correlations() == serial.correlations(), "Correlations are computed in-process either way"
+    print("PASS: Parallel profile matches the serial one")
+
+def test_high_cardinality_columns_skip_counting():
+    """Columns of mostly distinct values are estimated from hashes and a sample"""
+    rows = 50000
+    df = pd.DataFrame({
+        "created_at": pd.Timestamp("2024-01-01") + pd.to_timedelta(np.arange(rows), unit="s"),
+        "user": np.where(np.arange(rows) % 4 == 0, "guest", pd.Series(np.arange(rows)).astype(str)),
+    })
+    profile = profile_dataframe(df)
+    assert abs(profile.loc["created_at", "unique"] - rows) < 0.03 * rows
+    assert not profile.loc["user", "exact"] and profile.loc["user", "top_values"].startswith("guest (~")
+    guests = int(profile.loc["user", "top_values"].split("~")[1].split(")")[0])
+    assert abs(guests - rows // 4) < 0.1 * rows // 4, guests
+    print("PASS: High-cardinality columns are profiled without exact counts")
+
+def test_value_counts_are_bounded_by_slices():
+    """Counting in slices of CHUNK_SIZE rows gives the exact counts, and estimates stay within the rows"""
+    df = make_frame(5000)
+    df["id"] = pd.Series(np.arange(len(df))).astype(str)
+    chunk_size = Config.CHUNK_SIZE
+    try:
+        Config.CHUNK_SIZE = 700
+        profile = profile_dataframe(df)
+    finally:
+        Config.CHUNK_SIZE = chunk_size
+    counts = df["region"].value_counts()
+    assert profile.loc["region", "exact"] and profile.loc["region", "unique"] == 3
+    assert profile.loc["region", "top_values"] == ", ".join(f"{value} ({count})" for value, count in counts.items())
+    assert profile.loc["id", "unique"] <= len(df), "Distinct estimates are capped at the non-null count"
+    print("PASS: Value counts are bounded by slices")
+
+def test_pools_of_different_sizes_coexist():
+    """Asking for another worker count leaves the pools other callers hold running"""
+    two = get_executor(2)
+    three = get_executor(3)
+    assert get_executor(2) is two and three is not two
+    assert two.submit(abs, -2).result() == 2 and three.submit(abs, -3).result() == 3
+    
+    df = pd.concat([make_frame().add_suffix(f"_{i}") for i in range(20)], axis=1)
+    expected = ColumnProfiler(workers=1).update(df).result()
+    results, errors = {}, []
+    
+    def profile(workers):
+        try:
+            for _ in range(3):
+                results[workers] = ColumnProfiler(workers=workers).update(df).result()
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=profile, args=(workers,)) for workers in (2, 3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors
+    for result in results.values():
+        pd.testing.assert_frame_equal(result, expected)
+    print("PASS: Pools of different sizes coexist")
+
+if __name__ == "__main__":
+    test_profile_matches_pandas()
+    test_chunked_profile_merges_exactly()
+    test_parallel_profile_matches_serial()
+    test_high_cardinality_columns_skip_counting()
+    test_value_counts_are_bounded_by_slices()
+    test_pools_of_different_sizes_coexist()
+    print("\nAll profiler tests passed!")
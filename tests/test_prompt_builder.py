@@ -0,0 +1,58 @@
+# Test token-budget-aware prompt compaction
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Add parent directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from csv_analyzer.core.data_processor import get_dataset_info
+from csv_analyzer.core.prompt_builder import estimate_tokens, rank_columns
+from csv_analyzer.core.profiler import profile_dataframe
+
+def make_wide_frame(rows: int = 300, columns: int = 400) -> pd.DataFrame:
+    """Build a wide frame with a few informative columns among constant and empty ones"""
+    rng = np.random.default_rng(1)
+    data = {"revenue": rng.normal(100, 20, rows), "region": rng.choice(["north", "south"], rows)}
+    data["cost"] = data["revenue"] * 0.6 + rng.normal(0, 2, rows)
+    for i in range(columns - 3):
+        if i % 3 == 0:
+            data[f"constant_{i}"] = np.ones(rows)
+        elif i % 3 == 1:
+            data[f"empty_{i}"] = np.full(rows, np.nan)
+        else:
+            data[f"metric_{i}"] = rng.random(rows)
+    return pd.DataFrame(data)
+
+def test_small_tables_are_unchanged():
+    """Tables that fit in the budget are rendered in full"""
+    df = make_wide_frame(columns=10)
+    assert get_dataset_info(df) == get_dataset_info(df.copy()), "Rendering is deterministic"
+    info = get_dataset_info(df)
+    assert info["columns"] == ", ".join(df.columns)
+    assert "more columns not shown" not in info["stats_summary"]
+    print("PASS: Small tables are rendered in full")
+
+def test_wide_tables_fit_the_budget():
+    """Wide tables keep their most informative columns within the token budget"""
+    df = make_wide_frame()
+    full = sum(estimate_tokens(text) for text in get_dataset_info(df.iloc[:, :3]).values())
+    info = get_dataset_info(df)
+    tokens = sum(estimate_tokens(text) for text in info.values())
+    assert full < tokens <= 4000, f"Prompt sections should fit the default budget, got {tokens} tokens"
+    assert "more columns not shown" in info["stats_summary"] and "empty" in info["stats_summary"]
+    for column in ["revenue", "cost", "region"]:
+        assert column in info["columns"] and column in info["data_sample"], f"{column} should be kept"
+    assert "constant_0" not in info["columns"] and "empty_1" not in info["columns"]
+    
+    ranked = rank_columns(profile_dataframe(df), mentioned=["cost"])
+    assert ranked[0] == "cost", "Columns named in other sections rank first"
+    uninformative = {c for c in df.columns if c.startswith(("constant", "empty"))}
+    assert set(ranked[-len(uninformative):]) == uninformative, "Constant and empty columns rank last"
+    print("PASS: Wide tables fit the token budget")
+
+if __name__ == "__main__":
+    test_small_tables_are_unchanged()
+    test_wide_tables_fit_the_budget()
+    print("\nAll prompt builder tests passed!")
@@ -0,0 +1,96 @@
+# Test column projection and row filters pushed into the readers
+import os
+import sys
+from io import BytesIO
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add parent directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from csv_analyzer.core.pushdown import parse_filter, format_filter, apply_filter
+from csv_analyzer.core.data_processor import load_data, profile_stream, _filter_batch
+from csv_analyzer.cache.cache_manager import content_cache_key
+
+def make_frame(rows: int = 2000) -> pd.DataFrame:
+    """Build a frame with numeric, text and missing values"""
+    rng = np.random.default_rng(9)
+    return pd.DataFrame({
+        "id": np.arange(rows),
+        "amount": np.where(rng.random(rows) < 0.05, np.nan, rng.normal(100, 15, rows).round(2)),
+        "region": rng.choice(["north", "south", "east"], rows),
+        "note": rng.choice(["a", "b"], rows),
+    })
+
+def test_parse_filter():
+    """Filters parse into (column, operator, value) conditions"""
+    conditions = parse_filter("region == 'north' and amount > 100 && `order id` in (1, 2) & note not in ('a')")
+    assert conditions == [
+        ("region", "==", "north"), ("amount", ">", 100), ("order id", "in", [1, 2]), ("note", "not in", ["a"])
+    ], conditions
+    assert parse_filter("amount = 1.5") == [("amount", "==", 1.5)]
+    assert parse_filter("") == [] and format_filter([]) is None
+    for invalid in ["amount >", "amount > 1 or id < 2", "region in north"]:
+        try:
+            parse_filter(invalid)
+        except ValueError:
+            continue
+        raise AssertionError(f"'{invalid}' should not parse")
+    print("PASS: Filters parse into conditions")
+
+def test_projected_and_filtered_loads():
+    """CSV and Parquet loads keep only the wanted columns and rows"""
+    df = make_frame()
+    expected = df[(df["region"] == "north") & (df["amount"] > 100)][["id", "amount"]].reset_index(drop=True)
+    filters = parse_filter("region == 'north' and amount > 100")
+    
+    csv = BytesIO(df.to_csv(index=False).encode())
+    loaded = load_data(csv, "csv", columns=["id", "amount"], filters=filters)
+    assert list(loaded.columns) == ["id", "amount"]
+    pd.testing.assert_frame_equal(loaded.reset_index(drop=True), expected, check_dtype=False)
+    
+    parquet = BytesIO()
+    df.to_parquet(parquet, index=False, row_group_size=250)
+    parquet.seek(0)
+    loaded = load_data(parquet, "parquet", columns=["id", "amount"], filters=filters)
+    pd.testing.assert_frame_equal(loaded.reset_index(drop=True), expected, check_dtype=False)
+    
+    parquet.seek(0)
+    profile = profile_stream(parquet, "parquet", columns=["amount"], filters=parse_filter("id < 500"))
+    assert profile.row_count == 500
+    assert profile.stats_frame().index.tolist() == ["amount"]
+    print("PASS: Projected and filtered loads keep the wanted columns and rows")
+
+def test_arrow_and_pandas_filters_agree():
+    """Both filter paths keep the same rows, missing values never matching"""
+    pyarrow = pytest.importorskip("pyarrow")
+    df = make_frame(400)
+    df["region"] = df["region"].where(df["amount"].notna(), None)
+    df["code"] = df["id"].astype(str).where(df["id"] % 7 > 0, None)
+    batch = pyarrow.RecordBatch.from_pandas(df, preserve_index=False)
+    for text in ["amount != 100", "amount not in (95.5, 100)", "region != 'north'",
+                 "region not in ('north', 'east')", "region in ('south')", "code in (1, 2, 3)",
+                 "code not in (1, 2)", "amount in ('100')", "id not in ('1', '2') and amount > 90"]:
+        conditions = parse_filter(text)
+        expected = apply_filter(df, conditions)
+        filtered = _filter_batch(batch, conditions).to_pandas()
+        assert filtered["id"].tolist() == expected["id"].tolist(), text
+        assert filtered[conditions[0][0]].notna().all(), text
+    print("PASS: Arrow and pandas filters agree")
+
+def test_content_cache_key():
+    """Keys differ by content and by any option that changes the analysis"""
+    key = content_cache_key("abc", {"format": "csv", "columns": None})
+    assert key == content_cache_key("abc", {"format": "csv"})
+    assert key != content_cache_key("abd", {"format": "csv"})
+    assert key != content_cache_key("abc", {"format": "csv", "filter": "amount > 1"})
+    assert key != content_cache_key("abc", {"format": "csv", "columns": ("id",)})
+    print("PASS: Content cache keys are distinct")
+
+if __name__ == "__main__":
+    test_parse_filter()
+    test_projected_and_filtered_loads()
+    test_arrow_and_pandas_filters_agree()
+    test_content_cache_key()
+    print("\nAll pushdown tests passed!")
@@ -0,0 +1,48 @@
+# Test representative row sampling
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Add parent directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from csv_analyzer.core.sampling import RowSampler, sample_dataframe
+
+def make_frame(rows: int = 1000) -> pd.DataFrame:
+    """Build a frame whose rows are ordered so head() is not representative"""
+    return pd.DataFrame({
+        "id": np.arange(rows),
+        "region": ["big"] * 700 + ["mid"] * 200 + ["small"] * 100,
+    })
+
+def test_reservoir_sample_is_seeded_and_chunk_independent():
+    """The same seed gives the same sample whether rows arrive whole or in chunks"""
+    df = make_frame()
+    whole = sample_dataframe(df, size=10, seed=7, method="reservoir")
+    
+    sampler = RowSampler(size=10, seed=7, method="reservoir")
+    for start in range(0, len(df), 33):
+        sampler.update(df.iloc[start:start + 33])
+    
+    pd.testing.assert_frame_equal(whole, sampler.result())
+    assert whole["id"].is_monotonic_increasing, "Sampled rows should keep file order"
+    assert whole["id"].max() > 100, "Rows should be drawn from the whole file, not the head"
+    assert not whole.equals(sample_dataframe(df, size=10, seed=8, method="reservoir")), "Seed should change the sample"
+    print("PASS: Reservoir sampling is seeded and independent of chunking")
+
+def test_stratified_sample_covers_every_stratum():
+    """Stratified sampling allocates rows by stratum size with every stratum present"""
+    df = make_frame()
+    sample = sample_dataframe(df, size=10, method="stratified", stratify_by="region")
+    
+    assert sample["region"].value_counts().to_dict() == {"big": 7, "mid": 2, "small": 1}, \
+        "Allocation should be proportional with each stratum represented"
+    assert len(sample_dataframe(df, size=10, method="head")) == 10, "Head sampling should keep the first rows"
+    assert sample_dataframe(df, size=5, method="head")["id"].tolist() == [0, 1, 2, 3, 4], "Head sampling keeps file order"
+    print("PASS: Stratified sampling covers every stratum")
+
+if __name__ == "__main__":
+    test_reservoir_sample_is_seeded_and_chunk_independent()
+    test_stratified_sample_covers_every_stratum()
+    print("\nAll sampling tests passed!")
@@ -0,0 +1,101 @@
+# Test serving insights of near-duplicate uploads
+import os
+import sys
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Add parent directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from csv_analyzer.core.config import Config
+from csv_analyzer.core.sketches import MinHash
+from csv_analyzer.core.data_processor import StreamingProfile
+from csv_analyzer.core.fingerprint import DatasetFingerprint
+from csv_analyzer.cache.cache_manager import CacheManager
+
+def make_report(seed: int, rows: int = 5000) -> pd.DataFrame:
+    """Build a report with numeric and text columns"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "order": np.arange(rows) + seed * rows,
+        "amount": rng.normal(100, 15, rows).round(2),
+        "region": rng.choice(["north", "south", "east"], rows),
+    })
+
+def test_minhash_estimates_jaccard():
+    """Merged chunk sketches estimate the row overlap of two files"""
+    a, b = MinHash(k=512), MinHash(k=512)
+    rows = pd.DataFrame({"x": np.arange(20000), "y": np.arange(20000) % 7})
+    for start in range(0, 15000, 4000):
+        a.update(rows.iloc[start:min(start + 4000, 15000)])
+    b.update(rows.iloc[5000:].astype({"x": "float64"}))
+    # 10000 shared rows of 20000, typed int in one file and float in the other
+    assert abs(a.jaccard(b) - 0.5) < 0.07, a.jaccard(b)
+    merged = MinHash(k=512).merge(a).merge(b)
+    assert merged.jaccard(b) > 0.7 and a.jaccard(a) == 1.0
+    print("PASS: MinHash estimates the Jaccard similarity of row sets")
+
+def test_fingerprints_are_stored_without_pickle():
+    """Stored fingerprints round-trip without pickle, pickled ones are skipped"""
+    similarity = Config.SIMILARITY_CACHE
+    try:
+        Config.SIMILARITY_CACHE = True
+        profile = StreamingProfile()
+    finally:
+        Config.SIMILARITY_CACHE = similarity
+    profile.update(make_report(0))
+    fingerprint = DatasetFingerprint.from_profile(profile)
+    restored = DatasetFingerprint.from_bytes(fingerprint.to_bytes())
+    assert restored.schema == fingerprint.schema and fingerprint.distance(restored) == 0
+    
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CacheManager(os.path.join(directory, "cache.db"))
+        cache.save_insights("key", "insights")
+        cache.save_fingerprint("key", "scope", fingerprint)
+        assert cache.find_similar("scope", fingerprint) == ("key", "insights", 0)
+        with cache.pool.transaction() as conn:
+            conn.execute("UPDATE fingerprints SET fingerprint = ?", (pickle.dumps(fingerprint),))
+        assert cache.find_similar("scope", fingerprint) is None
+        cache.close()
+    print("PASS: Fingerprints are stored without pickle")
+
+def test_near_duplicate_uploads_are_served(api):
+    """A re-export with a few changed rows reuses the insights, other data does not"""
+    calls = api.calls
+    similarity = Config.SIMILARITY_CACHE
+    try:
+        Config.SIMILARITY_CACHE = True
+            
+        def upload(frame):
+            response = api.client.post("/insights/file", files={"file": ("report.csv", frame.to_csv(index=False))})
+            assert response.status_code == 200, response.text
+            return response.json()
+            
+        report = make_report(0)
+        original = upload(report)
+        assert len(calls) == 1 and "approximate" not in original
+            
+        edited = report.copy()
+        edited.loc[:100, "amount"] += 1
+        near = upload(edited)
+        assert near["approximate"] and near["cache_key"] == original["cache_key"], near
+        assert near["insights"] == "insights 1" and 0 < near["distance"] <= Config.SIMILARITY_MAX_DISTANCE
+        assert len(calls) == 1
+            
+        # Other rows of the same shape, and the same rows with shifted values, are new analyses
+        assert "approximate" not in upload(make_report(1))
+        assert "approximate" not in upload(report.assign(amount=report["amount"] * 2))
+        assert len(calls) == 3
+    finally:
+        Config.SIMILARITY_CACHE = similarity
+    print("PASS: Near-duplicate uploads are served from the cache")
+
+if __name__ == "__main__":
+    test_minhash_estimates_jaccard()
+    test_fingerprints_are_stored_without_pickle()
+    from conftest import stub_api
+    with stub_api() as api:
+        test_near_duplicate_uploads_are_served(api)
+    print("\nAll similarity cache tests passed!")
@@ -0,0 +1,103 @@
+# Test cardinality and heavy-hitter sketches
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Add parent directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from csv_analyzer.core.sketches import HyperLogLog, MisraGries, KLLSketch
+from csv_analyzer.core.profiler import ColumnProfiler
+
+def test_hyperloglog_within_error():
+    """Distinct counts stay within a few standard errors and merge across chunks"""
+    values = pd.Series([f"user-{i}" for i in range(200000)] * 2)
+    merged = HyperLogLog(error=0.01)
+    for start in range(0, len(values), 50000):
+        sketch = HyperLogLog(error=0.01)
+        sketch.update(values.iloc[start:start + 50000].to_numpy(dtype=object))
+        merged.merge(sketch)
+    
+    assert abs(merged.count() - 200000) / 200000 < 0.03, "Estimate should be within 3 standard errors"
+    small = HyperLogLog()
+    small.update(np.array(["a", "b", "c", "a"], dtype=object))
+    assert small.count() == 3, "Small cardinalities should be counted exactly"
+    print("PASS: HyperLogLog estimates distinct counts")
+
+def test_misra_gries_heavy_hitters():
+    """Heavy hitters are found with bounded counters and a bounded undercount"""
+    rng = np.random.default_rng(5)
+    values = pd.Series(np.concatenate([
+        np.repeat(["home", "search", "cart"], [30000, 20000, 10000]),
+        [f"/item/{i}" for i in rng.integers(0, 10**7, 40000)],
+    ])).sample(frac=1, random_state=0)
+    
+    sketch = MisraGries(error=0.01)
+    for start in range(0, len(values), 7000):
+        sketch.update(values.iloc[start:start + 7000])
+    
+    exact = values.value_counts()
+    assert len(sketch.counters) <= sketch.capacity, "Counters should stay bounded"
+    assert sketch.top(3).index.tolist() == ["home", "search", "cart"], "Heavy hitters should be found"
+    for value, count in sketch.top(3).items():
+        assert exact[value] - sketch.error_bound() <= count <= exact[value], "Counts should be within the error bound"
+    print("PASS: Misra-Gries finds heavy hitters")
+
+def test_profile_marks_estimates():
+    """High-cardinality columns report estimated counts, low-cardinality ones stay exact"""
+    rows = 20000
+    df = pd.DataFrame({
+        "user_id": [f"u{i}" for i in range(rows)],
+        "plan": ["free", "pro"] * (rows // 2),
+    })
+    profiler = ColumnProfiler()
+    for start in range(0, rows, 3000):
+        profiler.update(df.iloc[start:start + 3000])
+    profile = profiler.result()
+    
+    assert profile.loc["plan", "exact"] and profile.loc["plan", "unique"] == 2, "Small columns should be exact"
+    assert not profile.loc["user_id", "exact"], "Large columns should be marked as estimates"
+    assert abs(profile.loc["user_id", "unique"] - rows) / rows < 0.05, "Estimate should be close"
+    assert profile.loc["plan", "top_values"] == "free (10000), pro (10000)", "Exact top values should be listed"
+    print("PASS: Profile marks estimated cardinality")
+
+def test_kll_quantiles_merge():
+    """Quantile sketches of separate chunks merge within the rank error bound"""
+    values = np.random.default_rng(2).lognormal(size=400000)
+    merged = KLLSketch(k=200)
+    for start in range(0, len(values), 60000):
+        sketch = KLLSketch(k=200, seed=start)
+        sketch.update(values[start:start + 60000])
+        merged.merge(sketch)
+    
+    qs = [0.5, 0.95, 0.99]
+    ranks = [(values <= estimate).mean() for estimate in merged.quantiles(qs)]
+    assert all(abs(rank - q) < 0.0165 for rank, q in zip(ranks, qs)), "Rank error should stay within 1.65 / k"
+    assert sum(len(level) for level in merged.levels) < 3 * 200, "Sketch size should not grow with the data"
+    
+    small = KLLSketch(k=200)
+    small.update(np.arange(1, 101, dtype=float))
+    assert small.quantiles(qs).tolist() == [50.0, 95.0, 99.0], "Small inputs should give exact quantiles"
+    print("PASS: KLL quantile sketches merge accurately")
+
+def test_kll_thinned_updates():
+    """Large arrays added by block sampling keep their total weight and close ranks"""
+    values = np.sort(np.random.default_rng(4).normal(size=1000003))
+    sketch = KLLSketch(k=400)
+    sketch.update_thinned(values)
+    values_kept, weights = sketch.items()
+    assert sketch.count == len(values) and weights.sum() == len(values), "No weight should be lost"
+    assert sum(len(level) for level in sketch.levels) < 3 * 400, "Sketch size should not grow with the data"
+    for q in [0.25, 0.5, 0.75]:
+        assert abs((values <= sketch.quantiles(q)[0]).mean() - q) < 0.01, "Quartiles should be close"
+        assert abs(sketch.rank(np.quantile(values, q)) - q) < 0.01, "Ranks should be close"
+    print("PASS: Thinned KLL updates stay accurate")
+
+if __name__ == "__main__":
+    test_hyperloglog_within_error()
+    test_misra_gries_heavy_hitters()
+    test_profile_marks_estimates()
+    test_kll_quantiles_merge()
+    test_kll_thinned_updates()
+    print("\nAll sketch tests passed!")
@@ -0,0 +1,80 @@
+# Test datetime detection and time-series rollups
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Add parent directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from csv_analyzer.core.temporal import TemporalRollup, format_temporal
+from csv_analyzer.core.data_processor import get_dataset_info
+
+def make_frame(rows: int = 5000) -> pd.DataFrame:
+    """Build hourly orders over 200 days with a rising amount and two missing weeks"""
+    rng = np.random.default_rng(1)
+    hours = np.sort(rng.integers(0, 200 * 24, rows))
+    timestamps = pd.Timestamp("2024-01-01") + pd.to_timedelta(hours, unit="h")
+    df = pd.DataFrame({
+        "order_id": np.arange(rows),
+        "ordered_at": timestamps.strftime("%Y-%m-%d %H:%M"),
+        "amount": rng.normal(100, 10, rows) + 0.5 * (hours // 24),
+        "region": rng.choice(["north", "south"], rows),
+    })
+    missing = (timestamps >= "2024-03-01") & (timestamps < "2024-03-15")
+    return df[~missing].reset_index(drop=True)
+
+def test_rollup_trend_and_gaps():
+    """Text timestamps are detected and rolled up the same way in any chunking"""
+    df = make_frame()
+    whole = TemporalRollup()
+    whole.update(df, ["order_id", "amount"])
+    summary = whole.result()
+    
+    assert list(summary["bounds"]) == ["ordered_at"], "Only the timestamp column should be detected"
+    assert whole.metrics == ["amount"], "Row ids should not be rolled up"
+    assert summary["rows"] == len(df), "Every row should be counted"
+    assert summary["gaps"] == 1 and summary["missing_days"] == 14, "The missing two weeks should be a gap"
+    assert abs(summary["trends"]["amount"]["per_day"] - 0.5) < 0.02, "The trend slope should be recovered"
+    label, table = summary["rollup"]
+    assert label == "monthly" and len(table) == 7, "200 days should be rolled up by month"
+    
+    chunked = TemporalRollup()
+    for start in range(0, len(df), 97):
+        chunked.update(df.iloc[start:start + 97], ["order_id", "amount"])
+    assert format_temporal(chunked.result()) == format_temporal(summary), "Chunking should not change the summary"
+    print("PASS: Time-series rollup finds the trend and the gap")
+
+def test_relative_trend_needs_a_clear_mean():
+    """A trend is not given relative to a mean that is near zero or negative"""
+    df = make_frame()
+    days = pd.to_datetime(df["ordered_at"]).dt.dayofyear
+    df["profit"] = np.random.default_rng(2).normal(-0.05, 20, len(df)) + 0.001 * days
+    df["loss"] = -df["amount"]
+    rollup = TemporalRollup()
+    rollup.update(df, ["amount", "profit", "loss"])
+    trends = rollup.result()["trends"]
+    assert np.isnan(trends["profit"]["relative"]), "A mean near zero should not give a relative trend"
+    assert trends["loss"]["relative"] < 0 < trends["amount"]["relative"], "A falling negative series should be a decrease"
+    assert abs(trends["loss"]["relative"] + trends["amount"]["relative"]) < 1e-9
+    
+    profile = get_dataset_info(df)["temporal"]
+    assert "profit" in profile and "%" not in profile.split("profit")[1].split(",")[0], "Only the slope should be shown"
+    print("PASS: Relative trends are left out for means near zero")
+
+def test_detection_and_dataset_info():
+    """Datetime dtypes are used directly, other text and numbers are not dates"""
+    df = make_frame(2000)
+    df["ordered_at"] = pd.to_datetime(df["ordered_at"])
+    info = get_dataset_info(df)
+    assert "Rows by ordered_at" in info["temporal"], "Datetime columns should be rolled up"
+    
+    plain = df.drop(columns=["ordered_at"])
+    assert get_dataset_info(plain)["temporal"] == "No datetime columns detected."
+    print("PASS: Datetime columns are detected for the prompt")
+
+if __name__ == "__main__":
+    test_rollup_trend_and_gaps()
+    test_relative_trend_needs_a_clear_mean()
+    test_detection_and_dataset_info()
+    print("\nAll temporal tests passed!")